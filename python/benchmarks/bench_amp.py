@@ -0,0 +1,126 @@
+"""
+混合精度训练对比：吞吐量和峰值内存
+
+用随机数据通过 BaseTrainer.train_epoch 训练若干步，分别测试 fp32 和
+autocast（CPU 为 bf16，CUDA 默认 fp16 + GradScaler）。每个配置在单独的
+子进程中运行，CUDA 上统计 max_memory_allocated，CPU 上统计进程 RSS 峰值的增量。
+
+用法:
+    python benchmarks/bench_amp.py
+    python benchmarks/bench_amp.py --device cuda --models segmentation heatmap --batch_size 16
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from common.base_trainer import BaseTrainer
+from segmentation.model import SegmentationModel
+from landmarks.model import LandmarkDetectionModel, HeatmapBasedLandmarkModel
+from tooth_axis.model import ToothAxisModel, AxisLoss
+
+
+MODELS = ['segmentation', 'landmarks', 'tooth_axis', 'heatmap']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='混合精度训练对比')
+    parser.add_argument('--models', type=str, nargs='+', default=MODELS, choices=MODELS)
+    parser.add_argument('--modes', type=str, nargs='+', default=['fp32', 'amp'],
+                        choices=['fp32', 'amp', 'bf16', 'fp16'])
+    parser.add_argument('--batch_size', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=10,
+                        help='计时的训练步数（另有 2 步预热）')
+    parser.add_argument('--device', type=str, default='cpu')
+    return parser.parse_args()
+
+
+def build(task, batch_size, num_batches):
+    """返回 (model, criterion, dataset)"""
+    n = batch_size * num_batches
+    if task == 'segmentation':
+        model, criterion = SegmentationModel(num_classes=33), nn.CrossEntropyLoss()
+        tensors = (torch.randn(n, 10000, 3), torch.randint(0, 33, (n, 10000)))
+    elif task == 'landmarks':
+        model, criterion = LandmarkDetectionModel(num_landmarks=10), nn.MSELoss()
+        tensors = (torch.randn(n, 2048, 3), torch.randn(n, 10, 3))
+    elif task == 'tooth_axis':
+        model, criterion = ToothAxisModel(), AxisLoss()
+        tensors = (torch.randn(n, 2048, 3), torch.randn(n, 3),
+                   nn.functional.normalize(torch.randn(n, 3), dim=1))
+    else:
+        model, criterion = HeatmapBasedLandmarkModel(num_landmarks=10), nn.MSELoss()
+        tensors = (torch.randn(n, 3, 128, 128), torch.rand(n, 10, 128, 128))
+    return model, criterion, TensorDataset(*tensors)
+
+
+def run(task, mode, args, queue):
+    """子进程：训练 steps 步，返回 (samples/s, 峰值内存 MB)"""
+    device = torch.device(args.device)
+    model, criterion, dataset = build(task, args.batch_size, args.steps + 2)
+    model = model.to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+
+    training = {'amp': mode != 'fp32', 'amp_dtype': 'auto' if mode == 'amp' else mode}
+    loader = DataLoader(dataset, batch_size=args.batch_size, drop_last=True)
+    trainer = BaseTrainer(model, loader, None, criterion, optimizer, None, device,
+                          {'training': training})
+
+    # 峰值内存从预热前开始统计（包括激活、梯度和优化器状态），不含数据集本身
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # 预热
+    trainer.train_loader = [next(iter(loader))] * 2
+    trainer.train_epoch()
+
+    trainer.train_loader = loader
+    start = time.perf_counter()
+    trainer.train_epoch()
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+    elapsed = time.perf_counter() - start
+
+    if device.type == 'cuda':
+        peak_mb = torch.cuda.max_memory_allocated() / 2 ** 20
+    else:
+        peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    dtype = trainer.amp_dtype or torch.float32
+    queue.put((len(loader) * args.batch_size / elapsed, peak_mb, str(dtype).replace('torch.', '')))
+
+
+def main():
+    args = parse_args()
+    ctx = mp.get_context('spawn')
+
+    print(f"设备: {args.device}, batch={args.batch_size}, steps={args.steps}")
+    print(f"{'模型':12s} {'模式':>6s} {'精度':>9s} {'样本/秒':>10s} {'峰值内存(MB)':>13s} {'加速':>6s}")
+    for task in args.models:
+        baseline = None
+        for mode in args.modes:
+            queue = ctx.Queue()
+            process = ctx.Process(target=run, args=(task, mode, args, queue))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                print(f"{task:12s} {mode:>6s} 失败 (exit code {process.exitcode})")
+                continue
+
+            throughput, peak_mb, dtype = queue.get()
+            baseline = baseline or throughput
+            print(f"{task:12s} {mode:>6s} {dtype:>9s} {throughput:10.2f} {peak_mb:13.1f} "
+                  f"{throughput / baseline:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
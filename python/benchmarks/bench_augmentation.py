@@ -0,0 +1,79 @@
+"""
+逐样本 NumPy 增强与批量增强的性能对比
+
+对 batch_size 个 (N, 3) 点云分别测试：
+    - 数据集中原有的逐样本增强（ToothSegmentationDataset._augment，加载进程中的 CPU 时间）
+    - BatchAugmentation 对整个批次增强（CPU，collate 阶段）
+    - BatchAugmentation 在 GPU 上增强（device 阶段，CUDA 可用时）
+
+用法:
+    python benchmarks/bench_augmentation.py
+    python benchmarks/bench_augmentation.py --batch_size 32 --num_points 10000 50000
+"""
+
+import argparse
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import torch
+
+from common.augmentation import BatchAugmentation
+from segmentation.dataset import ToothSegmentationDataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='数据增强性能对比')
+    parser.add_argument('--batch_size', type=int, default=16)
+    parser.add_argument('--num_points', type=int, nargs='+', default=[2048, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=10)
+    return parser.parse_args()
+
+
+def timeit(fn, repeat, cuda=False):
+    fn()
+    times = []
+    for _ in range(repeat):
+        if cuda:
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn()
+        if cuda:
+            torch.cuda.synchronize()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+def main():
+    args = parse_args()
+    # 与 segmentation/config.yaml 中的批量增强配置相同
+    augmentation = BatchAugmentation(target_types=('labels',), rotation='z', scale=(0.9, 1.1),
+                                     jitter_std=0.01, normalize=True)
+    dataset = ToothSegmentationDataset.__new__(ToothSegmentationDataset)
+
+    print(f"batch={args.batch_size}, torch 线程数={torch.get_num_threads()}")
+    header = f"{'点数':>8s} | {'逐样本 NumPy':>12s} | {'批量 CPU':>10s} | {'加速':>6s}"
+    if torch.cuda.is_available():
+        header += f" | {'批量 GPU':>10s}"
+    print(header)
+
+    for num_points in args.num_points:
+        arrays = [np.random.randn(num_points, 3).astype(np.float32) for _ in range(args.batch_size)]
+        points = torch.from_numpy(np.stack(arrays))
+        labels = torch.zeros(args.batch_size, num_points, dtype=torch.long)
+
+        numpy_ms = timeit(lambda: [dataset._augment(p) for p in arrays], args.repeat)
+        batch_ms = timeit(lambda: augmentation([points, labels]), args.repeat)
+        line = f"{num_points:8d} | {numpy_ms:9.2f} ms | {batch_ms:7.2f} ms | {numpy_ms / batch_ms:5.1f}x"
+
+        if torch.cuda.is_available():
+            gpu_batch = [points.cuda(), labels.cuda()]
+            gpu_ms = timeit(lambda: augmentation(gpu_batch), args.repeat, cuda=True)
+            line += f" | {gpu_ms:7.2f} ms"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+数据并行训练的扩展性测试
+
+固定数据集大小和每个进程的 batch，用 1、2、4... 个进程（gloo / nccl）通过
+BaseTrainer.train_epoch 训练一个 epoch，比较 epoch 耗时、加速比和并行效率。
+CPU 上每个进程分到 核数 / 进程数 个线程，进程数不应超过物理核数。
+
+用法:
+    python benchmarks/bench_ddp.py
+    python benchmarks/bench_ddp.py --model segmentation --nprocs 1 2 4 8 --num_samples 256
+"""
+
+import argparse
+import multiprocessing
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from common.base_trainer import BaseTrainer
+from common.distributed import launch, setup_distributed, cleanup_distributed, build_sampler, get_rank
+from segmentation.model import SegmentationModel
+from landmarks.model import LandmarkDetectionModel
+from tooth_axis.model import ToothAxisModel, AxisLoss
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='数据并行扩展性测试')
+    parser.add_argument('--model', type=str, default='landmarks',
+                        choices=['segmentation', 'landmarks', 'tooth_axis'])
+    parser.add_argument('--nprocs', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--num_samples', type=int, default=128,
+                        help='数据集样本数（所有进程合计）')
+    parser.add_argument('--batch_size', type=int, default=8, help='每个进程的 batch')
+    parser.add_argument('--num_points', type=int, default=2048)
+    return parser.parse_args()
+
+
+def build(task, num_samples, num_points):
+    """返回 (model, criterion, dataset)"""
+    torch.manual_seed(0)
+    points = torch.randn(num_samples, num_points, 3)
+    if task == 'segmentation':
+        model, criterion = SegmentationModel(num_classes=33), nn.CrossEntropyLoss()
+        dataset = TensorDataset(points, torch.randint(0, 33, (num_samples, num_points)))
+    elif task == 'landmarks':
+        model, criterion = LandmarkDetectionModel(num_landmarks=10), nn.MSELoss()
+        dataset = TensorDataset(points, torch.randn(num_samples, 10, 3))
+    else:
+        model, criterion = ToothAxisModel(), AxisLoss()
+        dataset = TensorDataset(points, torch.randn(num_samples, 3),
+                                nn.functional.normalize(torch.randn(num_samples, 3), dim=1))
+    return model, criterion, dataset
+
+
+def run(args, queue):
+    """单个训练进程：预热后计时一个 epoch，rank 0 返回耗时"""
+    device = setup_distributed()
+    model, criterion, dataset = build(args.model, args.num_samples, args.num_points)
+    model = model.to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+
+    sampler = build_sampler(dataset, shuffle=True)
+    loader = DataLoader(dataset, batch_size=args.batch_size, shuffle=sampler is None,
+                        sampler=sampler, drop_last=True)
+    trainer = BaseTrainer(model, loader, None, criterion, optimizer, None, device,
+                          {'training': {}})
+
+    # 预热
+    trainer.train_loader = [next(iter(loader))] * 2
+    trainer.train_epoch()
+
+    trainer.train_loader = loader
+    if dist.is_initialized():
+        dist.barrier()
+    start = time.perf_counter()
+    loss = trainer.train_epoch()
+    elapsed = time.perf_counter() - start
+
+    if get_rank() == 0:
+        queue.put((elapsed, len(loader), loss))
+    cleanup_distributed()
+
+
+def main():
+    args = parse_args()
+    queue = multiprocessing.get_context('spawn').SimpleQueue()
+
+    print(f"模型: {args.model}, 样本数: {args.num_samples}, 每进程 batch: {args.batch_size}, "
+          f"点数: {args.num_points}")
+    print(f"{'进程数':>6s} {'步数/进程':>9s} {'epoch耗时(s)':>12s} {'加速比':>7s} {'效率':>6s}")
+    baseline = None
+    for nproc in args.nprocs:
+        launch(run, nproc, args, queue)
+        elapsed, steps, _ = queue.get()
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{nproc:6d} {steps:9d} {elapsed:12.2f} {speedup:6.2f}x {speedup / nproc:6.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+带标签分割结果的写出性能对比：逐行 f-string OBJ vs np.savetxt OBJ vs 二进制 PLY
+
+用法:
+    python benchmarks/bench_mesh_writer.py --num_vertices 500000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from common.mesh_io import write_obj, write_ply, read_ply, read_obj
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='网格写出性能测试')
+    parser.add_argument('--num_vertices', type=int, default=500000,
+                        help='顶点数')
+    return parser.parse_args()
+
+
+def legacy_save_mesh(file_path, vertices, faces, labels=None):
+    """原先逐行 f-string 的实现，仅用于对比"""
+    with open(file_path, 'w') as f:
+        for i, v in enumerate(vertices):
+            if labels is not None:
+                f.write(f"v {v[0]} {v[1]} {v[2]} # label: {labels[i]}\n")
+            else:
+                f.write(f"v {v[0]} {v[1]} {v[2]}\n")
+        for face in faces:
+            f.write(f"f {face[0]+1} {face[1]+1} {face[2]+1}\n")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    vertices = rng.uniform(-30, 30, (args.num_vertices, 3)).astype(np.float32)
+    faces = rng.integers(0, args.num_vertices, (args.num_vertices * 2, 3)).astype(np.int32)
+    labels = rng.integers(0, 33, args.num_vertices)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        writers = [
+            ('逐行 OBJ', legacy_save_mesh, tmp_dir / 'legacy.obj'),
+            ('savetxt OBJ', write_obj, tmp_dir / 'result.obj'),
+            ('二进制 PLY', write_ply, tmp_dir / 'result.ply'),
+        ]
+        print(f"写出 {args.num_vertices} 顶点 / {len(faces)} 面（含顶点标签）")
+        for name, writer, path in writers:
+            elapsed, _ = timed(writer, path, vertices, faces, labels=labels)
+            print(f"{name:12s}: {elapsed * 1000:9.1f} ms, {path.stat().st_size / 1e6:7.1f} MB")
+
+        elapsed, (ply_vertices, ply_faces, properties) = timed(read_ply, tmp_dir / 'result.ply')
+        print(f"读取 PLY     : {elapsed * 1000:9.1f} ms")
+        elapsed, _ = timed(read_obj, tmp_dir / 'result.obj')
+        print(f"读取 OBJ     : {elapsed * 1000:9.1f} ms")
+
+        assert np.array_equal(ply_vertices, vertices)
+        assert np.array_equal(ply_faces, faces)
+        assert np.array_equal(properties['label'], labels)
+
+
+if __name__ == '__main__':
+    main()
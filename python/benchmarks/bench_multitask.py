@@ -0,0 +1,87 @@
+"""
+单任务模型串行推理与共享主干多任务模型的性能对比
+
+对 batch 颗牙齿（每颗 num_points 个点）分别测试：
+    - LandmarkDetectionModel + ToothAxisModel 各运行一次（现有的逐牙流程）
+    - ToothMultiTaskModel 运行一次（主干只计算一次）
+
+同时检查从两个单任务模型加载参数后，多任务模型的输出与单任务模型一致
+（主干来自地标点模型，地标点输出应完全一致）。
+
+用法:
+    python benchmarks/bench_multitask.py
+    python benchmarks/bench_multitask.py --batch_size 1 16 --num_points 2048 10000
+"""
+
+import argparse
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import torch
+
+from landmarks.model import LandmarkDetectionModel
+from tooth_axis.model import ToothAxisModel
+from tooth_multitask.model import ToothMultiTaskModel
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='多任务模型推理性能对比')
+    parser.add_argument('--batch_size', type=int, nargs='+', default=[1, 16])
+    parser.add_argument('--num_points', type=int, nargs='+', default=[2048, 10000])
+    parser.add_argument('--num_landmarks', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--device', type=str, default='cuda' if torch.cuda.is_available() else 'cpu')
+    return parser.parse_args()
+
+
+def timeit(fn, repeat, cuda=False):
+    fn()
+    times = []
+    for _ in range(repeat):
+        if cuda:
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn()
+        if cuda:
+            torch.cuda.synchronize()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+def main():
+    args = parse_args()
+    device = torch.device(args.device)
+    cuda = device.type == 'cuda'
+    
+    landmark_model = LandmarkDetectionModel(num_landmarks=args.num_landmarks).to(device).eval()
+    axis_model = ToothAxisModel().to(device).eval()
+    multitask_model = ToothMultiTaskModel(num_landmarks=args.num_landmarks)
+    multitask_model.load_single_task_weights(landmark_model.state_dict(), axis_model.state_dict())
+    multitask_model = multitask_model.to(device).eval()
+    
+    with torch.no_grad():
+        x = torch.randn(2, 2048, 3, device=device)
+        diff = (multitask_model(x)[0] - landmark_model(x)).abs().max().item()
+    print(f"设备={device}, torch 线程数={torch.get_num_threads()}, 地标点输出最大差异={diff:.2e}")
+    print(f"{'batch':>6s} | {'点数':>6s} | {'单任务 x2':>10s} | {'多任务':>10s} | {'耗时比':>6s}")
+    
+    for batch_size in args.batch_size:
+        for num_points in args.num_points:
+            x = torch.randn(batch_size, num_points, 3, device=device)
+            
+            def single_task():
+                landmark_model(x)
+                axis_model(x)
+            
+            with torch.no_grad():
+                single_ms = timeit(single_task, args.repeat, cuda)
+                multi_ms = timeit(lambda: multitask_model(x), args.repeat, cuda)
+            print(f"{batch_size:6d} | {num_points:6d} | {single_ms:7.2f} ms | {multi_ms:7.2f} ms | "
+                  f"{multi_ms / single_ms:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+OBJ 解析性能对比：逐行解析 vs 向量化批量解析
+
+用法:
+    python benchmarks/bench_obj_parser.py --num_vertices 500000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from common.mesh_io import read_obj
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='OBJ 解析性能测试')
+    parser.add_argument('--num_vertices', type=int, default=500000,
+                        help='合成网格的顶点数')
+    parser.add_argument('--face_format', type=str, default='v/vt/vn',
+                        choices=['v', 'v//vn', 'v/vt/vn'],
+                        help='面记录格式')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='重复次数（取最快一次）')
+    return parser.parse_args()
+
+
+def legacy_load_mesh(file_path):
+    """原先的逐行解析实现，仅用于对比"""
+    vertices = []
+    faces = []
+
+    with open(file_path, 'r') as f:
+        for line in f:
+            if line.startswith('v '):
+                parts = line.strip().split()
+                vertex = [float(parts[1]), float(parts[2]), float(parts[3])]
+                vertices.append(vertex)
+            elif line.startswith('f '):
+                parts = line.strip().split()
+                face = [int(p.split('/')[0]) - 1 for p in parts[1:]]
+                faces.append(face)
+
+    return np.array(vertices, dtype=np.float32), np.array(faces, dtype=np.int32)
+
+
+def write_synthetic_obj(path, num_vertices, face_format):
+    """写一个带法向/纹理坐标的合成网格"""
+    rng = np.random.default_rng(0)
+    vertices = rng.uniform(-30, 30, (num_vertices, 3))
+    faces = rng.integers(1, num_vertices + 1, (num_vertices * 2, 3))
+
+    with open(path, 'w') as f:
+        f.write("# synthetic intraoral scan\n")
+        np.savetxt(f, vertices, fmt='v %.6f %.6f %.6f')
+        np.savetxt(f, vertices, fmt='vn %.4f %.4f %.4f')
+        np.savetxt(f, vertices[:, :2], fmt='vt %.4f %.4f')
+        if face_format == 'v':
+            np.savetxt(f, faces, fmt='f %d %d %d')
+        elif face_format == 'v//vn':
+            np.savetxt(f, faces.repeat(2, axis=1), fmt='f %d//%d %d//%d %d//%d')
+        else:
+            np.savetxt(f, faces.repeat(3, axis=1),
+                       fmt='f %d/%d/%d %d/%d/%d %d/%d/%d')
+
+
+def best_time(fn, path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'scan.obj'
+        write_synthetic_obj(path, args.num_vertices, args.face_format)
+        size_mb = path.stat().st_size / 1e6
+        print(f"文件: {args.num_vertices} 顶点, {size_mb:.1f} MB, 面格式 {args.face_format}")
+
+        legacy_time, (legacy_v, legacy_f) = best_time(legacy_load_mesh, path, args.repeat)
+        bulk_time, (bulk_v, bulk_f) = best_time(read_obj, path, args.repeat)
+
+        assert np.array_equal(legacy_v, bulk_v), "顶点解析结果不一致"
+        assert np.array_equal(legacy_f, bulk_f), "面解析结果不一致"
+
+        for name, elapsed in [('逐行解析', legacy_time), ('批量解析', bulk_time)]:
+            print(f"{name}: {elapsed * 1000:8.1f} ms, "
+                  f"{args.num_vertices / elapsed / 1e6:6.2f} M 顶点/秒")
+        print(f"加速比: {legacy_time / bulk_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
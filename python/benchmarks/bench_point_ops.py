@@ -0,0 +1,84 @@
+"""
+最远点采样和球查询的性能测试
+
+在不同点数下测试 common.point_ops 中的批量最远点采样、网格哈希球查询，
+以及作为参照的稠密距离球查询（导出 ONNX 时使用）。
+
+用法:
+    python benchmarks/bench_point_ops.py
+    python benchmarks/bench_point_ops.py --num_points 10000 50000 100000 --device cuda
+"""
+
+import argparse
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import torch
+
+from common.point_ops import farthest_point_sample, ball_query, index_points, _ball_query_dense
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='FPS / 球查询性能测试')
+    parser.add_argument('--num_points', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--batch_size', type=int, default=4)
+    parser.add_argument('--npoint', type=int, default=1024)
+    parser.add_argument('--radius', type=float, default=0.1)
+    parser.add_argument('--nsample', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--device', type=str, default='cpu')
+    parser.add_argument('--dense_max_points', type=int, default=50000,
+                        help='超过该点数时跳过稠密球查询（内存占用为 batch * npoint * N）')
+    return parser.parse_args()
+
+
+def make_points(batch_size, num_points, device):
+    """单位球内靠近球面分布的点，近似归一化后的牙颌扫描"""
+    points = torch.randn(batch_size, num_points, 3, device=device)
+    points = points / points.norm(dim=-1, keepdim=True)
+    return points * torch.rand(batch_size, num_points, 1, device=device) ** 0.1
+
+
+def timeit(fn, repeat, device):
+    fn()
+    times = []
+    for _ in range(repeat):
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn()
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    args = parse_args()
+    device = torch.device(args.device if args.device != 'cuda' or torch.cuda.is_available() else 'cpu')
+
+    print(f"设备: {device}, batch={args.batch_size}, npoint={args.npoint}, "
+          f"radius={args.radius}, nsample={args.nsample}")
+    print(f"{'点数':>8s} | {'FPS':>10s} | {'球查询(网格)':>12s} | {'球查询(稠密)':>12s}")
+
+    with torch.no_grad():
+        for num_points in args.num_points:
+            xyz = make_points(args.batch_size, num_points, device)
+            new_xyz = index_points(xyz, farthest_point_sample(xyz, args.npoint))
+
+            fps_ms = timeit(lambda: farthest_point_sample(xyz, args.npoint), args.repeat, device)
+            grid_ms = timeit(lambda: ball_query(xyz, new_xyz, args.radius, args.nsample),
+                             args.repeat, device)
+            if num_points > args.dense_max_points:
+                dense = '-'
+            else:
+                dense_ms = timeit(lambda: _ball_query_dense(xyz, new_xyz, args.radius, args.nsample),
+                                  args.repeat, device)
+                dense = f"{dense_ms:9.1f} ms"
+            print(f"{num_points:8d} | {fps_ms:7.1f} ms | {grid_ms:9.1f} ms | {dense:>12s}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+fp32 vs int8 量化对比：延迟、模型大小、精度差异
+
+提供检查点和数据集时，用数据集前若干个样本校准，并在后续样本上用
+common.metrics 分别计算 fp32 / int8 的指标；否则用随机初始化的模型和随机点云，
+以 fp32 输出为参照报告 int8 输出的偏差。
+
+用法:
+    python benchmarks/bench_quantization.py
+    python benchmarks/bench_quantization.py --models landmarks \\
+        --landmark_checkpoint checkpoints/landmarks/best_model.pth \\
+        --landmark_data data/landmarks/val
+"""
+
+import argparse
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Subset
+
+from common.metrics import segmentation_metrics, batch_landmark_metrics, batch_axis_metrics
+from common.quantization import quantize_model, calibration_batches, model_size_bytes
+from segmentation.model import SegmentationModel, MeshSegNet
+from segmentation.dataset import ToothSegmentationDataset
+from landmarks.model import LandmarkDetectionModel
+from landmarks.dataset import LandmarkDataset
+from tooth_axis.model import ToothAxisModel
+from tooth_axis.dataset import ToothAxisDataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='int8 量化对比')
+    parser.add_argument('--models', type=str, nargs='+',
+                        default=['segmentation', 'meshsegnet', 'landmarks', 'tooth_axis'],
+                        choices=['segmentation', 'meshsegnet', 'landmarks', 'tooth_axis'])
+    parser.add_argument('--segmentation_checkpoint', type=str, default=None)
+    parser.add_argument('--segmentation_data', type=str, default=None)
+    parser.add_argument('--landmark_checkpoint', type=str, default=None)
+    parser.add_argument('--landmark_data', type=str, default=None)
+    parser.add_argument('--axis_checkpoint', type=str, default=None)
+    parser.add_argument('--axis_data', type=str, default=None)
+    parser.add_argument('--batch_size', type=int, default=8)
+    parser.add_argument('--calibration_samples', type=int, default=32)
+    parser.add_argument('--eval_samples', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--threads', type=int, default=None,
+                        help='torch 线程数，默认不修改')
+    return parser.parse_args()
+
+
+def build(task, args):
+    """返回 (model, dataset, 随机输入生成函数)"""
+    if task == 'segmentation':
+        model = SegmentationModel(num_classes=33)
+        checkpoint, data_path = args.segmentation_checkpoint, args.segmentation_data
+        dataset = ToothSegmentationDataset(data_path, num_points=10000) if data_path else None
+        make_input = lambda: torch.randn(args.batch_size, 10000, 3)
+    elif task == 'meshsegnet':
+        model = MeshSegNet(num_classes=33)
+        checkpoint, dataset = None, None
+        make_input = lambda: torch.randn(args.batch_size, 15, 10000)
+    elif task == 'landmarks':
+        model = LandmarkDetectionModel(num_landmarks=10)
+        checkpoint, data_path = args.landmark_checkpoint, args.landmark_data
+        dataset = LandmarkDataset(data_path) if data_path else None
+        make_input = lambda: torch.randn(args.batch_size, 2048, 3)
+    else:
+        model = ToothAxisModel()
+        checkpoint, data_path = args.axis_checkpoint, args.axis_data
+        dataset = ToothAxisDataset(data_path) if data_path else None
+        make_input = lambda: torch.randn(args.batch_size, 2048, 3)
+
+    if checkpoint:
+        model.load_state_dict(torch.load(checkpoint, map_location='cpu')['model_state_dict'])
+    return model.eval(), dataset, make_input
+
+
+def latency_ms(model, inputs, repeat):
+    with torch.no_grad():
+        model(inputs)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            model(inputs)
+            times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+def predict(task, model, inputs):
+    with torch.no_grad():
+        output = model(inputs)
+    if task in ('segmentation', 'meshsegnet'):
+        return output.argmax(dim=1).numpy()
+    if task == 'tooth_axis':
+        return tuple(o.numpy() for o in output)
+    return output.numpy()
+
+
+def score(task, pred, target):
+    """以 target 为参照计算指标（target 可以是真值，也可以是 fp32 输出）"""
+    if task in ('segmentation', 'meshsegnet'):
+        metrics = segmentation_metrics(pred.ravel(), target.ravel(), 33)
+        return {'accuracy': metrics['accuracy'], 'mean_iou': metrics['mean_iou']}
+    if task == 'landmarks':
+        metrics = batch_landmark_metrics(pred, target)
+        return {'mre': metrics['mre'], 'pck@1.0mm': metrics['pck@1.0mm']}
+    metrics = batch_axis_metrics(pred[0], pred[1], target[0], target[1])
+    return {key: metrics[key] for key in ('origin_error', 'angle_error_deg')}
+
+
+def evaluate(task, fp32, int8, dataset, make_input, args):
+    """返回 [(指标名, fp32 值, int8 值)]"""
+    if dataset is None:
+        inputs = make_input()
+        reference = predict(task, fp32, inputs)
+        return [(f"{key} (vs fp32)", None, value)
+                for key, value in score(task, predict(task, int8, inputs), reference).items()]
+
+    start = args.calibration_samples
+    subset = Subset(dataset, range(start, min(start + args.eval_samples, len(dataset))))
+    preds = {'fp32': [], 'int8': []}
+    targets = []
+    for batch in DataLoader(subset, batch_size=args.batch_size):
+        inputs = batch[0]
+        preds['fp32'].append(predict(task, fp32, inputs))
+        preds['int8'].append(predict(task, int8, inputs))
+        targets.append(tuple(t.numpy() for t in batch[1:]) if task == 'tooth_axis'
+                       else batch[1].numpy())
+
+    def merge(items):
+        if isinstance(items[0], tuple):
+            return tuple(np.concatenate(parts) for parts in zip(*items))
+        return np.concatenate(items)
+
+    target = merge(targets)
+    fp32_metrics = score(task, merge(preds['fp32']), target)
+    int8_metrics = score(task, merge(preds['int8']), target)
+    return [(key, fp32_metrics[key], int8_metrics[key]) for key in fp32_metrics]
+
+
+def main():
+    args = parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    for task in args.models:
+        model, dataset, make_input = build(task, args)
+        if dataset is not None and len(dataset) > 0:
+            calibration = calibration_batches(dataset, args.calibration_samples, args.batch_size)
+        else:
+            dataset = None
+            calibration = [make_input() for _ in range(4)]
+
+        try:
+            quantized, mode = quantize_model(model, calibration)
+            inputs = make_input()
+            fp32_ms = latency_ms(model, inputs, args.repeat)
+            int8_ms = latency_ms(quantized, inputs, args.repeat)
+            metrics = evaluate(task, model, quantized, dataset, make_input, args)
+        except Exception as e:
+            print(f"\n[{task}] 跳过: {e}")
+            continue
+
+        fp32_size = model_size_bytes(model) / 1e6
+        int8_size = model_size_bytes(quantized) / 1e6
+        print(f"\n[{task}] int8 {mode} 量化, batch={args.batch_size}")
+        print(f"  延迟:     fp32 {fp32_ms:8.1f} ms | int8 {int8_ms:8.1f} ms | {fp32_ms / int8_ms:.2f}x")
+        print(f"  模型大小: fp32 {fp32_size:8.2f} MB | int8 {int8_size:8.2f} MB | {fp32_size / int8_size:.2f}x")
+        for key, fp32_value, int8_value in metrics:
+            if fp32_value is None:
+                print(f"  {key}: {int8_value:.4f}")
+            else:
+                print(f"  {key}: fp32 {fp32_value:.4f} | int8 {int8_value:.4f} | "
+                      f"差值 {int8_value - fp32_value:+.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+批量点云数据增强
+
+对整个 (B, N, 3) 批次做随机旋转（绕 z 轴或整个 SO(3)）、缩放、抖动和单位球归一化，
+每个样本独立抽取随机参数，地标点 / 牙轴起点与点云做相同的变换，方向向量只旋转。
+全部为张量运算，可以作为 DataLoader 的 collate_fn 在加载进程中运行（stage='collate'），
+也可以在 BaseTrainer 把批次拷贝到训练设备后运行（stage='device'）。
+"""
+
+import math
+
+import torch
+from torch.utils.data import default_collate
+
+
+__all__ = ['BatchAugmentation', 'build_augmentation', 'random_rotation_matrices']
+
+
+# 目标的类型：labels 不变换；points 为坐标，与点云做相同变换；directions 为方向，只旋转
+TARGET_TYPES = ('labels', 'points', 'directions')
+
+
+def random_rotation_matrices(batch_size, mode='z', device=None, dtype=torch.float32):
+    """
+    随机旋转矩阵
+
+    Args:
+        batch_size: 矩阵个数
+        mode: 'z' 绕 z 轴均匀随机旋转；'so3' 在 SO(3) 上均匀分布（由单位四元数生成）
+        device: 设备
+        dtype: 数据类型
+
+    Returns:
+        (B, 3, 3) 旋转矩阵
+    """
+    if mode == 'z':
+        theta = torch.rand(batch_size, device=device, dtype=dtype) * (2 * math.pi)
+        c, s = torch.cos(theta), torch.sin(theta)
+        zeros, ones = torch.zeros_like(theta), torch.ones_like(theta)
+        matrix = [c, -s, zeros,
+                  s, c, zeros,
+                  zeros, zeros, ones]
+    elif mode == 'so3':
+        q = torch.randn(batch_size, 4, device=device, dtype=dtype)
+        w, x, y, z = (q / q.norm(dim=1, keepdim=True)).unbind(1)
+        matrix = [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w),
+                  2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w),
+                  2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]
+    else:
+        raise ValueError(f"未知的旋转方式: {mode}")
+    return torch.stack(matrix, dim=-1).view(batch_size, 3, 3)
+
+
+class BatchAugmentation:
+    """
+    批量数据增强
+
+    依次执行旋转、缩放、抖动和归一化，每一步对每个样本以对应概率独立生效。
+
+    Args:
+        target_types: 批次中点云之后各个目标的类型（见 TARGET_TYPES），
+            例如分割为 ('labels',)，牙轴为 ('points', 'directions')
+        rotation: None / 'z' / 'so3'
+        rotation_prob: 旋转概率
+        scale: (min, max) 均匀缩放范围，None 表示不缩放
+        scale_prob: 缩放概率
+        jitter_std: 逐点高斯抖动的标准差，None 或 0 表示不抖动（目标不抖动）
+        jitter_prob: 抖动概率
+        normalize: 是否把每个样本平移到质心并缩放到单位球（目标使用同样的平移和缩放）
+        stage: 'collate' 在 DataLoader 的 collate_fn 中运行，'device' 在 BaseTrainer 中拷贝到设备后运行
+    """
+
+    def __init__(self, target_types=(), rotation='z', rotation_prob=0.5,
+                 scale=(0.9, 1.1), scale_prob=0.5, jitter_std=0.01, jitter_prob=0.5,
+                 normalize=False, stage='device'):
+        for target_type in target_types:
+            if target_type not in TARGET_TYPES:
+                raise ValueError(f"未知的目标类型: {target_type}")
+        if stage not in ('collate', 'device'):
+            raise ValueError(f"未知的增强阶段: {stage}")
+        self.target_types = tuple(target_types)
+        self.rotation = rotation
+        self.rotation_prob = rotation_prob
+        self.scale = tuple(scale) if scale else None
+        self.scale_prob = scale_prob
+        self.jitter_std = jitter_std
+        self.jitter_prob = jitter_prob
+        self.normalize = normalize
+        self.stage = stage
+
+    @property
+    def collate_fn(self):
+        """stage='collate' 时用作 DataLoader 的 collate_fn，否则为 None"""
+        return self.collate if self.stage == 'collate' else None
+
+    def collate(self, samples):
+        """默认拼接后对整个批次做增强"""
+        return self(default_collate(samples))
+
+    @torch.no_grad()
+    def __call__(self, batch):
+        """
+        Args:
+            batch: (points, *targets)，points 为 (B, N, 3)，
+                points / directions 类型的目标为 (B, 3) 或 (B, K, 3)
+
+        Returns:
+            与输入结构相同的列表
+        """
+        points, *targets = batch
+        if len(targets) != len(self.target_types):
+            raise ValueError(f"批次中有 {len(targets)} 个目标，配置了 {len(self.target_types)} 个目标类型")
+        B = points.shape[0]
+        device, dtype = points.device, points.dtype
+
+        # 目标统一为 (B, K, 3)，最后再恢复形状
+        squeeze = [t != 'labels' and target.dim() == 2 for t, target in zip(self.target_types, targets)]
+        targets = [target.unsqueeze(1) if sq else target for target, sq in zip(targets, squeeze)]
+
+        def where(prob, transformed, original):
+            mask = torch.rand(B, device=device) < prob
+            return torch.where(mask.view(B, 1, 1), transformed, original)
+
+        if self.rotation and self.rotation_prob > 0:
+            rotation = random_rotation_matrices(B, self.rotation, device, dtype)
+            mask = (torch.rand(B, device=device) < self.rotation_prob).view(B, 1, 1)
+            rotation = torch.where(mask, rotation, torch.eye(3, device=device, dtype=dtype))
+            points = points @ rotation.transpose(1, 2)
+            targets = [target if t == 'labels' else target @ rotation.transpose(1, 2)
+                       for t, target in zip(self.target_types, targets)]
+
+        if self.scale and self.scale_prob > 0:
+            low, high = self.scale
+            scale = torch.empty(B, 1, 1, device=device, dtype=dtype).uniform_(low, high)
+            scale = where(self.scale_prob, scale, torch.ones_like(scale))
+            points = points * scale
+            targets = [target * scale if t == 'points' else target
+                       for t, target in zip(self.target_types, targets)]
+
+        if self.jitter_std and self.jitter_prob > 0:
+            jittered = points + torch.randn_like(points) * self.jitter_std
+            points = where(self.jitter_prob, jittered, points)
+
+        if self.normalize:
+            centroid = points.mean(dim=1, keepdim=True)
+            points = points - centroid
+            max_dist = points.norm(dim=-1).amax(dim=1).view(B, 1, 1) + 1e-8
+            points = points / max_dist
+            targets = [(target - centroid) / max_dist if t == 'points' else target
+                       for t, target in zip(self.target_types, targets)]
+
+        targets = [target.squeeze(1) if sq else target for target, sq in zip(targets, squeeze)]
+        return [points, *targets]
+
+
+def build_augmentation(config, target_types):
+    """
+    根据配置的 augmentation 段创建批量增强
+
+    Args:
+        config: augmentation 配置，stage 为 'dataset'（默认，数据集中逐样本增强）时返回 None
+        target_types: 见 BatchAugmentation
+
+    Returns:
+        BatchAugmentation 或 None
+    """
+    config = dict(config or {})
+    stage = config.pop('stage', 'dataset')
+    if stage == 'dataset':
+        return None
+    return BatchAugmentation(target_types=target_types, stage=stage, **config)
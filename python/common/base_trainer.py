@@ -2,19 +2,58 @@
 通用训练器基类
 """
 
+import contextlib
 import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DistributedSampler
 from tqdm import tqdm
 from pathlib import Path
 import logging
 
+from .profiler import StepProfiler
+from .checkpoint import CheckpointWriter
+from .distributed import get_rank, get_world_size
+
 
 class BaseTrainer:
     """
     通用训练器，所有任务可以继承使用
+    
+    metrics 为验证指标累加器的工厂函数（例如 partial(SegmentationMeter, 33)），
+    返回的对象需提供 update(outputs, targets) 和 compute()，多进程时还需要 merge(other)；
+    为 None 时只统计损失。
+    logger 默认为本模块的 logger，训练脚本可传入 setup_logger 创建的 logger。
+    augmentation 为 common.augmentation.BatchAugmentation，stage='device' 时
+    训练批次拷贝到设备后在这里做批量增强（stage='collate' 时由 DataLoader 完成）。
+    
+    混合精度由配置的 training 段控制：
+        amp: true 开启 autocast（默认关闭）
+        amp_dtype: 'auto' / 'bf16' / 'fp16'，auto 时 CUDA 用 fp16（配合 GradScaler），CPU 用 bf16
+    模型参数始终为 fp32，保存的检查点不受影响。
+    
+    分阶段计时由 training.profiling 段控制（见 common/profiler.py）：
+        enabled: 每个 epoch 的训练/验证计时追加写入 log_dir/profile.jsonl
+        cuda_sync: 每个阶段结束时同步 CUDA，计时准确但更慢
+        trace_steps: [50, 60] 在第一个训练 epoch 的这些步导出 Chrome trace 到 log_dir
+    
+    训练步的其他选项（training 段）：
+        log_frequency: 每 N 步把累计损失同步回主机并刷新进度条，其余步不做设备同步（默认 10）
+        grad_accumulation_steps: 每 K 个 micro-batch 更新一次参数，等效 batch 为 batch_size * K（默认 1）
+        compile: true 时用 torch.compile 编译模型（默认关闭），检查点仍保存原始模型的参数
+        keep_last_checkpoints: 定期检查点只保留最近 K 个（默认全部保留）
+    
+    检查点由 CheckpointWriter 在后台线程写入（临时文件 + 原子重命名），
+    load_checkpoint 恢复模型、优化器、学习率调度器和 GradScaler 的状态。
+    
+    进程组已初始化（见 common/distributed.py）时自动用 DistributedDataParallel 包装模型，
+    数据加载器应使用 DistributedSampler。训练/验证损失在进程间取平均，验证指标通过
+    meter.merge(other) 合并各进程的累加器；只有 rank 0 显示进度条、写计时和保存检查点。
     """
     
     def __init__(self, model, train_loader, val_loader, criterion,
-                 optimizer, scheduler, device, config):
+                 optimizer, scheduler, device, config, metrics=None, logger=None,
+                 augmentation=None):
         self.model = model
         self.train_loader = train_loader
         self.val_loader = val_loader
@@ -23,60 +62,216 @@ class BaseTrainer:
         self.scheduler = scheduler
         self.device = device
         self.config = config
+        self.metrics = metrics
+        self.augmentation = augmentation if getattr(augmentation, 'stage', None) == 'device' else None
+        self.val_metrics = {}
+        self.train_profile = {}
+        self.epoch = 0
+        self.best_val_loss = float('inf')
+        
+        training_config = config.get('training', {})
+        self.profiling = training_config.get('profiling') or {}
+        self.log_dir = Path(training_config.get('log_dir', '.'))
+        self._traced = False
+        self.log_frequency = max(int(training_config.get('log_frequency', 10)), 1)
+        self.grad_accumulation_steps = max(int(training_config.get('grad_accumulation_steps', 1)), 1)
+        self.checkpoint_writer = CheckpointWriter(keep_last=training_config.get('keep_last_checkpoints'))
+        
+        self.logger = logger or logging.getLogger(__name__)
+        self.rank = get_rank()
+        self.world_size = get_world_size()
+        self.is_main = self.rank == 0
+        
+        # 混合精度
+        self.amp_dtype = self._resolve_amp_dtype(config.get('training', {}))
+        self.scaler = None
+        if self.amp_dtype == torch.float16:
+            self.scaler = torch.amp.GradScaler(self.device.type)
+        if self.amp_dtype is not None:
+            self.logger.info(f"混合精度训练: {self.amp_dtype}")
         
-        self.logger = logging.getLogger(__name__)
+        # DDP 构造时从 rank 0 广播参数，之后每次反向传播时同步梯度
+        if self.world_size > 1:
+            device_ids = [self.device.index] if self.device.type == 'cuda' else None
+            self.model = DistributedDataParallel(self.model, device_ids=device_ids)
+            self.logger.info(f"分布式训练: {self.world_size} 个进程 ({dist.get_backend()})")
+        
+        # 编译后的模型与原模型共享参数，self.model 用于前向，保存检查点时取原模型
+        if training_config.get('compile', False):
+            self.logger.info("使用 torch.compile 编译模型")
+            self.model = torch.compile(self.model)
+    
+    def _resolve_amp_dtype(self, training_config):
+        """根据配置和设备选择 autocast 精度，未开启时返回 None"""
+        if not training_config.get('amp', False):
+            return None
+        
+        amp_dtype = training_config.get('amp_dtype', 'auto')
+        if amp_dtype == 'auto':
+            amp_dtype = 'fp16' if self.device.type == 'cuda' else 'bf16'
+        if amp_dtype == 'fp16' and self.device.type != 'cuda':
+            self.logger.warning("fp16 autocast 仅支持 CUDA，改用 bf16")
+            amp_dtype = 'bf16'
+        if amp_dtype == 'bf16' and self.device.type == 'cuda' and not torch.cuda.is_bf16_supported():
+            self.logger.warning("当前 GPU 不支持 bf16，改用 fp16")
+            amp_dtype = 'fp16'
+        
+        dtypes = {'bf16': torch.bfloat16, 'fp16': torch.float16}
+        if amp_dtype not in dtypes:
+            raise ValueError(f"未知的 amp_dtype: {amp_dtype}")
+        return dtypes[amp_dtype]
+    
+    def _create_profiler(self, trace=False):
+        """按 training.profiling 配置创建本 epoch 的计时器"""
+        trace_steps = self.profiling.get('trace_steps') if trace else None
+        return StepProfiler(
+            self.device,
+            enabled=self.profiling.get('enabled', False),
+            cuda_sync=self.profiling.get('cuda_sync', False),
+            trace_steps=tuple(trace_steps) if trace_steps else None,
+            trace_path=self.log_dir / f'trace_epoch{self.epoch + 1}.json',
+            point_axis=getattr(_unwrap(self.model), 'point_axis', 1)
+        )
+    
+    def _reduce_mean(self, value):
+        """设备上的标量在进程间取平均"""
+        if self.world_size > 1:
+            dist.all_reduce(value)
+            value /= self.world_size
+        return value
+    
+    def _autocast(self):
+        """前向和损失计算的 autocast 上下文，未开启混合精度时不生效"""
+        return torch.autocast(device_type=self.device.type, dtype=self.amp_dtype or torch.float32,
+                              enabled=self.amp_dtype is not None)
     
     def train_epoch(self):
         """训练一个epoch"""
         self.model.train()
-        total_loss = 0.0
+        # 损失在设备上累加，只在每 log_frequency 步和 epoch 结束时同步回主机
+        total_loss = torch.zeros((), device=self.device)
+        num_batches = len(self.train_loader)
+        accumulation = self.grad_accumulation_steps
+        profiler = self._create_profiler(trace=self.is_main and not self._traced)
         
-        pbar = tqdm(self.train_loader, desc="Training")
-        for batch_idx, batch_data in enumerate(pbar):
-            # 数据移到设备
-            batch_data = [x.to(self.device) if torch.is_tensor(x) else x 
-                         for x in batch_data]
-            
-            # 前向传播
-            self.optimizer.zero_grad()
-            loss = self._compute_loss(batch_data)
-            
-            # 反向传播
-            loss.backward()
-            self.optimizer.step()
-            
-            total_loss += loss.item()
-            
-            # 更新进度条
-            pbar.set_postfix({'loss': total_loss / (batch_idx + 1)})
+        sampler = getattr(self.train_loader, 'sampler', None)
+        if isinstance(sampler, DistributedSampler):
+            sampler.set_epoch(self.epoch)
+        
+        self.optimizer.zero_grad(set_to_none=True)
+        pbar = tqdm(self.train_loader, desc="Training", disable=not self.is_main)
+        with profiler.trace():
+            for batch_idx, batch_data in enumerate(profiler.iterate(pbar)):
+                # 数据移到设备
+                with profiler.section('h2d'):
+                    batch_data = to_device(batch_data, self.device, non_blocking=True)
+                if self.augmentation is not None:
+                    with profiler.section('augment'):
+                        batch_data = self.augmentation(batch_data)
+                
+                # 前向传播；梯度累加时按本组实际的 micro-batch 数平均损失（最后一组可能不满 K 个）
+                group_start = batch_idx - batch_idx % accumulation
+                group_size = min(accumulation, num_batches - group_start)
+                update = batch_idx + 1 == group_start + group_size
+                
+                # 多进程时只在每组最后一个 micro-batch 的反向传播中同步梯度
+                no_sync = self.model.no_sync() if self.world_size > 1 and not update \
+                    else contextlib.nullcontext()
+                with no_sync:
+                    with profiler.section('forward'), self._autocast():
+                        loss = self._compute_loss(batch_data)
+                    
+                    # 反向传播（fp16 时缩放损失，step 前自动反缩放并跳过含 inf/nan 的梯度）
+                    with profiler.section('backward'):
+                        scaled_loss = loss / group_size if group_size > 1 else loss
+                        if self.scaler is not None:
+                            self.scaler.scale(scaled_loss).backward()
+                        else:
+                            scaled_loss.backward()
+                
+                if update:
+                    with profiler.section('optimizer'):
+                        if self.scaler is not None:
+                            self.scaler.step(self.optimizer)
+                            self.scaler.update()
+                        else:
+                            self.optimizer.step()
+                        self.optimizer.zero_grad(set_to_none=True)
+                
+                total_loss += loss.detach().float()
+                
+                # 定期同步并更新进度条
+                if (batch_idx + 1) % self.log_frequency == 0:
+                    with profiler.section('sync'):
+                        pbar.set_postfix({'loss': total_loss.item() / (batch_idx + 1)})
+                profiler.step(_first_tensor(batch_data[0]))
+        
+        with profiler.section('sync'):
+            total_loss = self._reduce_mean(total_loss).item()
         
-        return total_loss / len(self.train_loader)
+        self._traced = self._traced or profiler.trace_steps is not None
+        self.train_profile = profiler.summary()
+        if self.is_main:
+            profiler.write(self.log_dir / 'profile.jsonl', epoch=self.epoch + 1, phase='train')
+        return total_loss / num_batches
     
     def validate(self):
-        """验证"""
+        """验证，返回平均损失；配置了 metrics 时指标保存在 self.val_metrics"""
         self.model.eval()
-        total_loss = 0.0
+        total_loss = torch.zeros((), device=self.device)
+        meter = self.metrics() if self.metrics else None
+        profiler = self._create_profiler()
         
         with torch.no_grad():
-            for batch_data in tqdm(self.val_loader, desc="Validating"):
-                batch_data = [x.to(self.device) if torch.is_tensor(x) else x 
-                             for x in batch_data]
-                loss = self._compute_loss(batch_data)
-                total_loss += loss.item()
+            for batch_data in profiler.iterate(tqdm(self.val_loader, desc="Validating",
+                                                    disable=not self.is_main)):
+                with profiler.section('h2d'):
+                    batch_data = to_device(batch_data, self.device, non_blocking=True)
+                with profiler.section('forward'), self._autocast():
+                    if meter is None:
+                        loss = self._compute_loss(batch_data)
+                    else:
+                        loss, outputs, targets = self._compute_loss(batch_data, return_outputs=True)
+                if meter is not None:
+                    # 低精度输出转回 fp32 再计算指标
+                    with profiler.section('metrics'):
+                        meter.update(_to_float(outputs), targets)
+                total_loss += loss.detach().float()
+                profiler.step(_first_tensor(batch_data[0]))
         
+        with profiler.section('sync'):
+            total_loss = self._reduce_mean(total_loss).item()
+        
+        # 合并各进程的指标累加器（DistributedSampler 补齐的重复样本也会计入）
+        if meter is not None and self.world_size > 1:
+            meters = [None] * self.world_size
+            dist.all_gather_object(meters, meter)
+            meter = meters[0]
+            for other in meters[1:]:
+                meter.merge(other)
+        self.val_metrics = meter.compute() if meter else {}
+        if self.is_main:
+            profiler.write(self.log_dir / 'profile.jsonl', epoch=self.epoch + 1, phase='val')
         return total_loss / len(self.val_loader)
     
-    def _compute_loss(self, batch_data):
-        """计算损失，子类可以重写"""
-        # 默认实现：假设 batch_data = (inputs, targets)
-        if len(batch_data) == 2:
-            inputs, targets = batch_data
-            outputs = self.model(inputs)
-            loss = self.criterion(outputs, targets)
-        else:
-            # 更复杂的情况，子类需要重写
-            raise NotImplementedError("请在子类中实现 _compute_loss 方法")
+    def _compute_loss(self, batch_data, return_outputs=False):
+        """
+        计算损失，子类可以重写
+        
+        默认实现假设 batch_data = (inputs, target) 或 (inputs, target1, target2, ...)，
+        多个目标时以元组形式传给 criterion。inputs 为元组时展开作为模型的多个输入
+        （例如 MeshSegNet 的 (features, adjacency)）。
         
+        Returns:
+            loss，return_outputs=True 时返回 (loss, outputs, targets)
+        """
+        inputs, *targets = batch_data
+        targets = targets[0] if len(targets) == 1 else tuple(targets)
+        outputs = self.model(*inputs) if isinstance(inputs, (tuple, list)) else self.model(inputs)
+        loss = self.criterion(outputs, targets)
+        
+        if return_outputs:
+            return loss, outputs, targets
         return loss
     
     def train(self, epochs, start_epoch=0, save_dir='checkpoints'):
@@ -84,38 +279,115 @@ class BaseTrainer:
         save_path = Path(save_dir)
         save_path.mkdir(parents=True, exist_ok=True)
         
-        best_val_loss = float('inf')
-        
         for epoch in range(start_epoch, epochs):
+            self.epoch = epoch
             self.logger.info(f"\nEpoch {epoch + 1}/{epochs}")
             
             # 训练
             train_loss = self.train_epoch()
             self.logger.info(f"Train Loss: {train_loss:.4f}")
+            self._log_throughput()
             
             # 验证
             val_loss = self.validate()
             self.logger.info(f"Val Loss: {val_loss:.4f}")
+            if self.val_metrics:
+                self.logger.info("Val Metrics: " + ", ".join(
+                    f"{key}: {value:.4f}" for key, value in self.val_metrics.items()
+                    if isinstance(value, float)))
             
             # 学习率调度
             if self.scheduler:
                 self.scheduler.step()
             
-            # 保存最佳模型
-            if val_loss < best_val_loss:
-                best_val_loss = val_loss
+            # 保存最佳模型（各进程的 val_loss 相同，只有 rank 0 写文件）
+            if val_loss < self.best_val_loss:
+                self.best_val_loss = val_loss
                 self.save_checkpoint(save_path / 'best_model.pth', epoch)
                 self.logger.info(f"保存最佳模型 (val_loss: {val_loss:.4f})")
             
             # 定期保存
             if (epoch + 1) % self.config['training'].get('save_frequency', 10) == 0:
-                self.save_checkpoint(save_path / f'checkpoint_epoch_{epoch + 1}.pth', epoch)
+                self.save_checkpoint(save_path / f'checkpoint_epoch_{epoch + 1}.pth', epoch,
+                                     periodic=True)
+        
+        self.checkpoint_writer.wait()
     
-    def save_checkpoint(self, path, epoch):
-        """保存检查点"""
-        torch.save({
+    def _log_throughput(self):
+        """记录本 epoch 的训练吞吐量和等待数据的时间占比（单个进程）"""
+        profile = self.train_profile
+        if not profile.get('elapsed_s'):
+            return
+        message = f"训练吞吐: {profile['samples_per_s']:.1f} 样本/秒"
+        if 'data_wait' in profile['time_s']:
+            message += f"，等待数据 {profile['time_s']['data_wait'] / profile['elapsed_s']:.0%}"
+        self.logger.info(message)
+    
+    def save_checkpoint(self, path, epoch, periodic=False):
+        """
+        保存检查点，多进程时只有 rank 0 保存
+        
+        状态拷贝到 CPU 后立即返回，写盘在后台完成；periodic=True 时按
+        keep_last_checkpoints 清理较早的定期检查点。
+        """
+        if not self.is_main:
+            return
+        self.checkpoint_writer.save({
             'epoch': epoch,
-            'model_state_dict': self.model.state_dict(),
+            'best_val_loss': self.best_val_loss,
+            'model_state_dict': _unwrap(self.model).state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
             'scheduler_state_dict': self.scheduler.state_dict() if self.scheduler else None,
-        }, path)
+            'scaler_state_dict': self.scaler.state_dict() if self.scaler else None,
+        }, path, periodic=periodic)
+    
+    def load_checkpoint(self, path):
+        """
+        从检查点恢复训练状态
+        
+        Returns:
+            继续训练的起始 epoch
+        """
+        checkpoint = torch.load(path, map_location=self.device)
+        _unwrap(self.model).load_state_dict(checkpoint['model_state_dict'])
+        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        if self.scheduler and checkpoint.get('scheduler_state_dict'):
+            self.scheduler.load_state_dict(checkpoint['scheduler_state_dict'])
+        if self.scaler and checkpoint.get('scaler_state_dict'):
+            self.scaler.load_state_dict(checkpoint['scaler_state_dict'])
+        self.best_val_loss = checkpoint.get('best_val_loss', self.best_val_loss)
+        self.epoch = checkpoint['epoch'] + 1
+        return self.epoch
+
+
+def _unwrap(model):
+    """取 torch.compile / DistributedDataParallel 包装前的原始模型"""
+    model = getattr(model, '_orig_mod', model)
+    if isinstance(model, DistributedDataParallel):
+        model = model.module
+    return model
+
+
+def to_device(data, device, non_blocking=False):
+    """把批次（张量，或嵌套的 list / tuple）中的张量移到设备，其余对象保持不变"""
+    if isinstance(data, (tuple, list)):
+        return type(data)(to_device(x, device, non_blocking) for x in data)
+    if torch.is_tensor(data):
+        return data.to(device, non_blocking=non_blocking)
+    return data
+
+
+def _first_tensor(inputs):
+    """多输入模型取第一个输入，用于统计样本数"""
+    while isinstance(inputs, (tuple, list)) and inputs:
+        inputs = inputs[0]
+    return inputs
+
+
+def _to_float(outputs):
+    """把 autocast 下的浮点输出（可以是元组）转为 fp32"""
+    if isinstance(outputs, (tuple, list)):
+        return type(outputs)(_to_float(o) for o in outputs)
+    if torch.is_tensor(outputs) and outputs.is_floating_point():
+        return outputs.float()
+    return outputs
@@ -0,0 +1,100 @@
+"""
+后台检查点写入
+
+save() 在调用线程里把 state dict 中的张量拷贝到 CPU 内存（拷贝完成后训练可以继续
+修改参数），序列化和写盘在后台线程中完成：先写同目录下的临时文件并 fsync，再用
+os.replace 原子替换目标文件，写到一半崩溃时旧文件保持完整。
+定期检查点只保留最近 keep_last 个。
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import torch
+
+
+__all__ = ['CheckpointWriter', 'snapshot_state']
+
+
+def snapshot_state(state):
+    """递归地把 state dict（可嵌套 dict / list / tuple）中的张量拷贝到 CPU"""
+    if torch.is_tensor(state):
+        return state.detach().to('cpu', copy=True)
+    if isinstance(state, dict):
+        return type(state)((key, snapshot_state(value)) for key, value in state.items())
+    if isinstance(state, (list, tuple)):
+        return type(state)(snapshot_state(value) for value in state)
+    return state
+
+
+class CheckpointWriter:
+    """
+    异步、原子的检查点写入器
+
+    同一时间最多有一个检查点在后台写入，上一个还没写完时 save() 会先等待，
+    内存中最多保留两份快照。后台写入的异常在下一次 save() / wait() 时抛出。
+
+    Args:
+        keep_last: 定期检查点保留的个数，None 或 0 表示全部保留
+        pattern: 定期检查点文件名的正则，第一个分组为 epoch
+    """
+
+    def __init__(self, keep_last=None, pattern=r'checkpoint_epoch_(\d+)\.pth'):
+        self.keep_last = keep_last
+        self.pattern = re.compile(pattern)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        self._pending = None
+
+    def save(self, state, path, periodic=False):
+        """
+        保存检查点
+
+        Args:
+            state: 检查点字典，张量会在返回前拷贝到 CPU
+            path: 目标路径
+            periodic: 是否为定期检查点，写入后按 keep_last 清理同目录下较早的定期检查点
+        """
+        self.wait()
+        self._pending = self._executor.submit(self._write, snapshot_state(state), Path(path), periodic)
+
+    def wait(self):
+        """等待后台写入完成"""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def close(self):
+        """等待写入完成并结束后台线程"""
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def _write(self, state, path, periodic):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                torch.save(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        if periodic and self.keep_last:
+            self._prune(path.parent)
+
+    def _prune(self, directory):
+        """删除 keep_last 个之前的定期检查点（按文件名中的 epoch 排序）"""
+        checkpoints = []
+        for path in directory.iterdir():
+            match = self.pattern.fullmatch(path.name)
+            if match:
+                checkpoints.append((int(match.group(1)), path))
+        checkpoints.sort()
+        for _, path in checkpoints[:-self.keep_last]:
+            path.unlink(missing_ok=True)
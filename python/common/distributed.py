@@ -0,0 +1,136 @@
+"""
+多进程数据并行训练
+
+训练脚本用 launch() 在本机启动 world_size 个进程（也可以直接用 torchrun 启动），
+每个进程调用 setup_distributed() 初始化进程组并得到本进程使用的设备：
+CUDA 上使用 nccl，每个进程一块 GPU；CPU 上使用 gloo，
+本机的 CPU 核在进程间平均分配，避免各进程的 intra-op 线程互相抢占。
+"""
+
+import logging
+import os
+import socket
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch.utils.data import DistributedSampler
+
+from .utils import setup_logger
+
+
+__all__ = ['launch', 'setup_distributed', 'cleanup_distributed', 'get_rank', 'get_world_size',
+           'is_main_process', 'build_sampler', 'setup_main_logger']
+
+
+def launch(fn, world_size, *args):
+    """
+    在 world_size 个进程中运行 fn(*args)
+
+    world_size 为 1 或已经由 torchrun 启动（环境变量中有 RANK）时直接在当前进程运行。
+
+    Args:
+        fn: 每个进程的入口函数，需可被 pickle（模块级函数）
+        world_size: 进程数
+        *args: 传给 fn 的参数
+    """
+    if world_size <= 1 or 'RANK' in os.environ:
+        return fn(*args)
+    port = _free_port()
+    mp.spawn(_worker, args=(world_size, port, fn, args), nprocs=world_size, join=True)
+
+
+def _worker(rank, world_size, port, fn, args):
+    """mp.spawn 的子进程入口，设置与 torchrun 相同的环境变量"""
+    os.environ.update({
+        'RANK': str(rank),
+        'LOCAL_RANK': str(rank),
+        'WORLD_SIZE': str(world_size),
+        'LOCAL_WORLD_SIZE': str(world_size),
+        'MASTER_ADDR': '127.0.0.1',
+        'MASTER_PORT': str(port),
+    })
+    fn(*args)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_count():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def setup_distributed(gpus=None, backend=None):
+    """
+    初始化本进程的设备和进程组
+
+    Args:
+        gpus: GPU ID 列表，第 LOCAL_RANK 个进程使用 gpus[LOCAL_RANK]（列表不够长时使用第
+            LOCAL_RANK 块 GPU）；CUDA 不可用时忽略
+        backend: 进程组后端，默认 CUDA 上为 nccl、CPU 上为 gloo
+
+    Returns:
+        torch.device
+    """
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    local_rank = int(os.environ.get('LOCAL_RANK', 0))
+
+    if torch.cuda.is_available():
+        gpu = gpus[local_rank] if gpus and local_rank < len(gpus) else local_rank
+        device = torch.device(f"cuda:{gpu}")
+        torch.cuda.set_device(device)
+    else:
+        device = torch.device('cpu')
+
+    if world_size > 1 and not dist.is_initialized():
+        if device.type == 'cpu':
+            local_world_size = int(os.environ.get('LOCAL_WORLD_SIZE', world_size))
+            torch.set_num_threads(max(1, _cpu_count() // local_world_size))
+        dist.init_process_group(backend or ('nccl' if device.type == 'cuda' else 'gloo'),
+                                init_method='env://')
+    return device
+
+
+def cleanup_distributed():
+    """销毁进程组"""
+    if dist.is_initialized():
+        dist.destroy_process_group()
+
+
+def get_rank():
+    """进程组初始化前按 launch / torchrun 设置的环境变量返回"""
+    return dist.get_rank() if dist.is_initialized() else int(os.environ.get('RANK', 0))
+
+
+def get_world_size():
+    return dist.get_world_size() if dist.is_initialized() else 1
+
+
+def is_main_process():
+    """是否为 rank 0，只有主进程写日志和检查点"""
+    return get_rank() == 0
+
+
+def build_sampler(dataset, shuffle):
+    """
+    多进程时返回 DistributedSampler，单进程时返回 None
+
+    DataLoader 中使用 sampler=sampler, shuffle=(shuffle and sampler is None)。
+    """
+    if get_world_size() <= 1:
+        return None
+    return DistributedSampler(dataset, shuffle=shuffle)
+
+
+def setup_main_logger(name, log_dir):
+    """主进程用 setup_logger 写控制台和日志文件，其他进程只保留警告和错误"""
+    if is_main_process():
+        return setup_logger(name, log_dir)
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.WARNING)
+    return logger
@@ -0,0 +1,250 @@
+"""
+点云 / 网格几何工具
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+__all__ = ['propagate_labels', 'voxel_downsample', 'point_pyramid', 'group_by_label',
+           'sample_groups', 'split_mesh_by_label']
+
+
+def propagate_labels(source_points, source_labels, target_points, k=1,
+                     num_classes=None, batch_size=200000, workers=-1):
+    """
+    把稀疏点上的标签传播到所有目标点
+
+    用 KD 树为每个目标点查找最近的 k 个源点（构建 O(M log M)，查询 O(N log M)），
+    k=1 时直接取最近邻标签，k>1 时按距离倒数加权投票。
+
+    Args:
+        source_points: (M, 3) 已有预测的点（例如网络输入的采样点）
+        source_labels: (M,) 对应标签
+        target_points: (N, 3) 需要标签的点（例如网格全部顶点）
+        k: 近邻个数
+        num_classes: 类别数，默认取 source_labels.max() + 1
+        batch_size: 每批查询的目标点数，限制投票矩阵的内存
+        workers: cKDTree 查询使用的线程数，-1 表示全部核心
+
+    Returns:
+        labels: (N,) 目标点标签
+    """
+    source_labels = np.asarray(source_labels)
+    target_points = np.asarray(target_points)
+    if len(source_points) == 0:
+        raise ValueError("source_points 不能为空")
+
+    k = min(k, len(source_points))
+    tree = cKDTree(source_points)
+    labels = np.empty(len(target_points), dtype=source_labels.dtype)
+
+    if num_classes is None and k > 1:
+        num_classes = int(source_labels.max()) + 1
+
+    for start in range(0, len(target_points), batch_size):
+        end = min(start + batch_size, len(target_points))
+        distances, indices = tree.query(target_points[start:end], k=k, workers=workers)
+
+        if k == 1:
+            labels[start:end] = source_labels[indices]
+            continue
+
+        # 距离倒数加权投票：(B, k) 邻居标签累加到 (B, C) 票数矩阵
+        weights = 1.0 / (distances + 1e-8)
+        neighbor_labels = source_labels[indices]
+        rows = np.arange(end - start)[:, None]
+        votes = np.bincount((rows * num_classes + neighbor_labels).ravel(),
+                            weights=weights.ravel(),
+                            minlength=(end - start) * num_classes)
+        labels[start:end] = votes.reshape(end - start, num_classes).argmax(axis=1)
+
+    return labels
+
+
+def voxel_downsample(points, num_points, rng=None, max_iters=20):
+    """
+    体素网格降采样到固定点数
+
+    二分搜索体素边长，使非空体素数略多于 num_points，每个体素保留一个点，
+    再随机去掉多余的体素。点数不足时重复采样补齐。
+
+    Args:
+        points: (N, 3) 点坐标
+        num_points: 输出点数
+        rng: np.random.Generator，默认固定种子
+        max_iters: 二分搜索的最大迭代次数
+
+    Returns:
+        indices: (num_points,) 选中点在 points 中的索引
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) <= num_points:
+        return _pad_indices(np.arange(len(points)), num_points, rng)
+
+    origin = points.min(axis=0)
+    extent = points.max(axis=0) - origin
+    low, high = 0.0, float(extent.max()) + 1e-6
+    best = None
+    for _ in range(max_iters):
+        size = (low + high) / 2
+        if size <= 0:
+            break
+        cells = np.floor((points - origin) / size).astype(np.int64)
+        dims = cells.max(axis=0) + 1
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        _, first = np.unique(keys, return_index=True)
+        if len(first) >= num_points:
+            best = first
+            low = size
+            if len(first) <= num_points * 1.05:
+                break
+        else:
+            high = size
+
+    if best is None:
+        best = np.arange(len(points))
+    return np.sort(rng.choice(best, num_points, replace=False))
+
+
+def point_pyramid(points, levels, method='fps', rng=None):
+    """
+    多分辨率点云金字塔
+
+    method='fps' 时最高层用体素降采样，其余层在最高层上做一次最远点采样，
+    低层是高层采样顺序的前缀（互相嵌套，分布均匀）；method='voxel' 时每层
+    独立做体素降采样。
+
+    Args:
+        points: (N, 3) 点坐标
+        levels: 各层点数，例如 [2048, 10000, 50000]
+        method: 'fps' 或 'voxel'
+        rng: np.random.Generator，默认固定种子
+
+    Returns:
+        {层级点数: (点数,) 索引}
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    levels = sorted(set(levels))
+    if method == 'voxel':
+        return {level: voxel_downsample(points, level, rng) for level in levels}
+    if method != 'fps':
+        raise ValueError(f"未知的降采样方法: {method}")
+
+    import torch
+    from .point_ops import farthest_point_sample
+
+    top = voxel_downsample(points, levels[-1], rng)
+    pyramid = {levels[-1]: top}
+    if len(levels) > 1:
+        top_points = torch.from_numpy(np.ascontiguousarray(points[top], dtype=np.float32))
+        order = farthest_point_sample(top_points.unsqueeze(0), levels[-2])[0].numpy()
+        for level in levels[:-1]:
+            pyramid[level] = top[order[:level]]
+    return pyramid
+
+
+def group_by_label(labels, ignore=(), shuffle=False, rng=None):
+    """
+    按标签分组（一次排序，不逐标签循环）
+
+    Args:
+        labels: (N,) 每个点的标签
+        ignore: 不分组的标签，例如背景 0
+        shuffle: 组内顺序是否随机（打乱后稳定排序），便于取前缀作为无放回采样
+        rng: np.random.Generator，shuffle=True 时使用
+
+    Returns:
+        unique: (G,) 各组标签（升序）
+        order: (M,) 按组排列的点索引，第 g 组为 order[starts[g]:starts[g] + counts[g]]
+        starts: (G,) 各组在 order 中的起始位置
+        counts: (G,) 各组点数
+    """
+    labels = np.asarray(labels)
+    order = np.flatnonzero(~np.isin(labels, ignore)) if len(ignore) else np.arange(len(labels))
+    if shuffle:
+        rng = rng if rng is not None else np.random.default_rng()
+        order = rng.permutation(order)
+    order = order[np.argsort(labels[order], kind='stable')]
+    unique, starts, counts = np.unique(labels[order], return_index=True, return_counts=True)
+    return unique, order, starts, counts
+
+
+def sample_groups(order, starts, counts, num_points):
+    """
+    每组取 num_points 个点索引，组成 (G, num_points) 的规则批次
+
+    order 组内已打乱时（group_by_label(shuffle=True)）点数足够的组相当于无放回采样，
+    点数不足的组循环重复。
+
+    Returns:
+        indices: (G, num_points) 点索引
+    """
+    offsets = np.arange(num_points)[None, :] % counts[:, None]
+    return order[starts[:, None] + offsets]
+
+
+def split_mesh_by_label(vertices, faces, labels, ignore=(), min_vertices=1, return_index=False):
+    """
+    按逐顶点标签把网格拆分为每个标签一个紧凑子网格
+
+    顶点和面各做一次稳定排序分组，面的顶点索引通过一次查表重新编号，
+    不对标签或面做 Python 循环（最后只按组切片）。三个顶点标签相同的面属于该标签，
+    跨越边界的面丢弃。子网格中顶点保持原网格中的相对顺序。
+
+    Args:
+        vertices: (N, 3) 顶点
+        faces: (F, 3) 面，可为空
+        labels: (N,) 每个顶点的标签（例如分割结果）
+        ignore: 不输出的标签，例如背景 0
+        min_vertices: 顶点数少于该值的标签不输出
+        return_index: 是否同时返回子网格顶点在原网格中的索引
+
+    Returns:
+        {标签: (vertices, faces)}，return_index=True 时为 (vertices, faces, vertex_indices)，
+        faces 的 dtype 与输入相同，索引指向子网格的 vertices
+    """
+    vertices = np.asarray(vertices)
+    labels = np.asarray(labels)
+    if faces is None or len(faces) == 0:
+        faces = np.zeros((0, 3), dtype=np.int32)
+    faces = np.asarray(faces)
+    if len(labels) != len(vertices):
+        raise ValueError(f"标签数量 ({len(labels)}) 与顶点数量 ({len(vertices)}) 不匹配")
+
+    unique, order, starts, counts = group_by_label(labels, ignore=ignore)
+
+    # 每个顶点在所属子网格中的新索引，被忽略的顶点为 -1
+    local = np.full(len(vertices), -1, dtype=np.int64)
+    local[order] = np.arange(len(order)) - np.repeat(starts, counts)
+
+    # 三个顶点同标签（且未被忽略）的面，按标签稳定排序后与顶点分组对齐
+    face_labels = labels[faces]
+    intact = ((face_labels[:, 0] == face_labels[:, 1]) & (face_labels[:, 1] == face_labels[:, 2])
+              & (local[faces[:, 0]] >= 0))
+    face_index = np.flatnonzero(intact)
+    face_index = face_index[np.argsort(face_labels[face_index, 0], kind='stable')]
+    sorted_face_labels = face_labels[face_index, 0]
+    face_starts = np.searchsorted(sorted_face_labels, unique, side='left')
+    face_ends = np.searchsorted(sorted_face_labels, unique, side='right')
+    new_faces = local[faces[face_index]].astype(faces.dtype)
+
+    grouped = vertices[order]
+    parts = {}
+    for label, start, count, face_start, face_end in zip(unique, starts, counts, face_starts, face_ends):
+        if count < min_vertices:
+            continue
+        part = (grouped[start:start + count], new_faces[face_start:face_end])
+        if return_index:
+            part += (order[start:start + count],)
+        parts[label.item()] = part
+    return parts
+
+
+def _pad_indices(indices, num_points, rng):
+    """重复采样补齐到 num_points 个索引"""
+    if len(indices) >= num_points:
+        return indices[:num_points]
+    extra = rng.choice(indices, num_points - len(indices), replace=True)
+    return np.concatenate([indices, extra])
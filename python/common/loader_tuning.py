@@ -0,0 +1,225 @@
+"""
+DataLoader 参数自动校准
+
+训练开始前在主进程中测量单个样本的读取/预处理耗时和模型一步（前向 + 反向）的耗时，
+据此选择 num_workers（让数据吞吐量略高于模型吞吐量）、prefetch_factor、
+persistent_workers、pin_memory，batch_size 为 'auto' 时还会选择吞吐量最高的批大小。
+配置中给出的值优先于校准结果。最后用选定的参数读取几个批次，记录实际的数据吞吐量。
+"""
+
+import logging
+import math
+import os
+import time
+
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.utils.data import DataLoader, default_collate
+
+from .base_trainer import to_device
+
+
+__all__ = ['tune_dataloader']
+
+
+# 数据吞吐量相对模型吞吐量的余量
+HEADROOM = 1.25
+
+# 读取一个批次的耗时低于模型一步的该比例时，在主进程中读取（不启动 worker）
+INLINE_LOAD_RATIO = 0.05
+
+
+def _cpu_count():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def measure_sample_time(dataset, num_samples=8, seed=0):
+    """
+    主进程中读取 num_samples 个随机样本的平均耗时（秒）
+
+    Returns:
+        (耗时, 读取的样本列表)，样本可用于拼接测量模型步耗时
+    """
+    rng = np.random.default_rng(seed)
+    indices = rng.choice(len(dataset), min(num_samples, len(dataset)), replace=False)
+    dataset[int(indices[0])]  # 预热（打开文件、建立缓存）
+    samples = []
+    start = time.perf_counter()
+    for idx in indices:
+        samples.append(dataset[int(idx)])
+    return (time.perf_counter() - start) / len(indices), samples
+
+
+def measure_step_time(model, criterion, samples, batch_size, device, collate_fn=None, repeat=2):
+    """
+    模型一步（前向 + 反向）的耗时（秒）
+
+    批次由 samples 循环填满 batch_size 后拼接，约定与 BaseTrainer 相同：
+    batch = (inputs, target) 或 (inputs, target1, ...)。参数不会被更新，
+    BatchNorm 等缓冲区在测量结束后恢复。inputs 为元组时展开作为模型的多个输入。
+    """
+    batch = (collate_fn or default_collate)([samples[i % len(samples)] for i in range(batch_size)])
+    inputs, *targets = to_device(batch, device)
+    targets = targets[0] if len(targets) == 1 else tuple(targets)
+
+    buffers = {name: buffer.clone() for name, buffer in model.named_buffers()}
+    was_training = model.training
+    model.train()
+    try:
+        times = []
+        for _ in range(repeat + 1):
+            if device.type == 'cuda':
+                torch.cuda.synchronize(device)
+            start = time.perf_counter()
+            outputs = model(*inputs) if isinstance(inputs, (tuple, list)) else model(inputs)
+            loss = criterion(outputs, targets)
+            loss.backward()
+            if device.type == 'cuda':
+                torch.cuda.synchronize(device)
+            times.append(time.perf_counter() - start)
+            model.zero_grad(set_to_none=True)
+        return min(times[1:])
+    finally:
+        model.zero_grad(set_to_none=True)
+        with torch.no_grad():
+            for name, buffer in model.named_buffers():
+                buffer.copy_(buffers[name])
+        model.train(was_training)
+
+
+def _select_batch_size(model, criterion, samples, device, collate_fn, max_batch_size, logger):
+    """依次尝试 2、4、8 ... max_batch_size，返回 (每秒样本数最高的批大小, 对应的步耗时)"""
+    best = None
+    batch_size = 2
+    while batch_size <= max_batch_size:
+        try:
+            step_time = measure_step_time(model, criterion, samples, batch_size, device, collate_fn)
+        except torch.cuda.OutOfMemoryError:
+            torch.cuda.empty_cache()
+            logger.info(f"batch_size={batch_size} 显存不足，停止尝试")
+            break
+        logger.info(f"batch_size={batch_size}: {batch_size / step_time:.1f} 样本/秒")
+        if best is None or batch_size / step_time > best[0] / best[1]:
+            best = (batch_size, step_time)
+        elif batch_size / step_time < 0.95 * best[0] / best[1]:
+            break
+        batch_size *= 2
+    if best is None:
+        raise RuntimeError("无法确定 batch_size：最小批次也无法运行")
+    return best
+
+
+def measure_loader_throughput(loader, num_batches):
+    """
+    读取最多 num_batches 个批次，返回每秒样本数
+
+    多于一个批次时不计第一个批次（包含 worker 启动时间）。样本数按 batch_size 和数据集
+    大小计算（最后一个批次可能不满），不从批次内容推断：collate_mesh_graphs 等会把
+    多个样本拼成一行。
+    """
+    samples = 0
+    start = time.perf_counter()
+    for i, batch in enumerate(loader):
+        if i == 0 and len(loader) > 1:
+            start = time.perf_counter()
+            continue
+        if loader.batch_size is None:
+            samples += len(batch[-1])
+        else:
+            samples += min(loader.batch_size, len(loader.dataset) - i * loader.batch_size)
+        if i >= num_batches:
+            break
+    elapsed = time.perf_counter() - start
+    return samples / elapsed if samples and elapsed > 0 else float('nan')
+
+
+def tune_dataloader(dataset, model, criterion, device, training_config,
+                    collate_fn=None, world_size=1, logger=None):
+    """
+    选择 DataLoader 参数
+
+    Args:
+        dataset: 训练数据集
+        model, criterion: 用于测量模型步耗时
+        device: 训练设备
+        training_config: 配置的 training 段，读取 batch_size（可为 'auto'）和 dataloader 子段：
+            num_workers / prefetch_factor / persistent_workers / pin_memory 为 null 时自动选择，
+            max_batch_size 为自动选择批大小的上限，calibration_samples 为测量读取耗时的样本数，
+            auto_tune: false 时不做校准，未指定的参数使用 PyTorch 默认值（数据集为空时同样不校准）
+        collate_fn: DataLoader 的 collate_fn
+        world_size: 数据并行的进程数，CPU 核数在进程间平均分配
+        logger: 日志
+
+    Returns:
+        dict: batch_size、num_workers、pin_memory，以及 num_workers > 0 时的
+            prefetch_factor、persistent_workers，可直接传给 DataLoader
+    """
+    logger = logger or logging.getLogger(__name__)
+    options = dict(training_config.get('dataloader') or {})
+    batch_size = training_config.get('batch_size', 'auto')
+    num_workers = options.get('num_workers')
+    pin_memory = options.get('pin_memory')
+    if pin_memory is None:
+        pin_memory = device.type == 'cuda'
+
+    # 每个进程可用的 CPU 核，留一个给主进程
+    max_workers = max(_cpu_count() // max(world_size, 1) - 1, 0)
+
+    # 空数据集没有样本可测，使用配置值和默认值
+    auto_tune = options.get('auto_tune', True)
+    if auto_tune and len(dataset) == 0:
+        logger.warning("训练集为空，跳过 DataLoader 校准")
+        auto_tune = False
+
+    if not auto_tune:
+        settings = dict(batch_size=32 if batch_size == 'auto' else batch_size,
+                        num_workers=num_workers or 0, pin_memory=pin_memory)
+    else:
+        sample_time, samples = measure_sample_time(dataset, options.get('calibration_samples', 8))
+        if batch_size == 'auto':
+            batch_size, step_time = _select_batch_size(model, criterion, samples, device, collate_fn,
+                                                       options.get('max_batch_size', 64), logger)
+        else:
+            step_time = measure_step_time(model, criterion, samples, batch_size, device, collate_fn)
+
+        # 每个 worker 每秒产出 1 / (sample_time * batch_size) 个批次，需要跟上每秒 1 / step_time 步
+        batch_load_time = sample_time * batch_size
+        needed = math.ceil(HEADROOM * batch_load_time / step_time)
+        if batch_load_time < INLINE_LOAD_RATIO * step_time:
+            needed = 0
+        if num_workers is None:
+            num_workers = min(needed, max_workers)
+        settings = dict(batch_size=batch_size, num_workers=num_workers, pin_memory=pin_memory)
+        logger.info(f"DataLoader 校准: 单样本读取 {sample_time * 1000:.2f} ms，"
+                    f"batch_size={batch_size} 模型一步 {step_time * 1000:.1f} ms，"
+                    f"需要约 {needed} 个 worker（可用 {max_workers}）")
+        data_rate = max(settings['num_workers'], 1) / sample_time
+        if data_rate < batch_size / step_time:
+            logger.warning(f"数据加载预计限制吞吐量到 {data_rate:.1f} 样本/秒"
+                           f"（模型 {batch_size / step_time:.1f} 样本/秒），可增加 CPU 核或使用打包数据集")
+
+    if settings['num_workers'] > 0:
+        # 保证至少约 4 个批次在预取，worker 在 epoch 之间保持存活
+        prefetch_factor = options.get('prefetch_factor')
+        persistent_workers = options.get('persistent_workers')
+        settings['prefetch_factor'] = prefetch_factor or min(max(math.ceil(4 / settings['num_workers']), 2), 8)
+        settings['persistent_workers'] = True if persistent_workers is None else persistent_workers
+
+    # 多进程时各进程使用 rank 0 的结果，保证批大小一致
+    if dist.is_initialized() and dist.get_world_size() > 1:
+        objects = [settings]
+        dist.broadcast_object_list(objects, src=0)
+        settings = objects[0]
+
+    logger.info("DataLoader 参数: " + ", ".join(f"{key}={value}" for key, value in settings.items()))
+
+    if auto_tune:
+        trial = DataLoader(dataset, shuffle=True, collate_fn=collate_fn,
+                           **dict(settings, persistent_workers=False))
+        throughput = measure_loader_throughput(trial, max(2 * settings['num_workers'], 4))
+        logger.info(f"数据加载吞吐量 {throughput:.1f} 样本/秒，"
+                    f"模型约 {settings['batch_size'] / step_time:.1f} 样本/秒")
+    return settings
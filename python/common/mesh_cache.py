@@ -0,0 +1,170 @@
+"""
+网格/标签二进制缓存
+
+首次访问时把解析好的数组保存为 `.npy` 旁路文件，之后直接内存映射读取，
+避免每个 epoch 重复解析文本 OBJ 和 JSON。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+
+__all__ = ['MeshCache']
+
+
+# 条目中记录数组名的清单文件，读取时据此判断条目是否完整
+MANIFEST = 'manifest.json'
+
+
+class MeshCache:
+    """
+    以源文件路径 + mtime（或内容哈希）为键的 `.npy` 缓存
+
+    每个条目是缓存目录下的一个子目录，其中每个数组对应一个 `<name>.npy`，
+    另有一个记录全部数组名的清单；缺少清单或任一数组的条目（例如正被其他进程淘汰）视为未命中。
+    命中时更新条目目录的 mtime，超过容量上限时按 mtime 淘汰最久未使用的条目。
+
+    Args:
+        cache_dir: 缓存目录
+        max_size_gb: 缓存容量上限（GB），None 表示不限制
+        key_mode: 'mtime' 使用路径 + 修改时间 + 文件大小；'hash' 使用文件内容哈希
+        mmap: 是否以内存映射（写时复制）方式读取
+    """
+
+    def __init__(self, cache_dir, max_size_gb=None, key_mode='mtime', mmap=True):
+        if key_mode not in ('mtime', 'hash'):
+            raise ValueError(f"未知的缓存键模式: {key_mode}")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = int(max_size_gb * 1024 ** 3) if max_size_gb else None
+        self.key_mode = key_mode
+        self.mmap = mmap
+
+        # 当前进程对缓存大小的估计，首次写入时扫描目录初始化
+        self._size = None
+
+    def load(self, source_path, loader, kind='mesh'):
+        """
+        读取缓存，未命中时调用 loader 解析并写入缓存
+
+        Args:
+            source_path: 源文件路径
+            loader: loader(source_path) -> dict[str, np.ndarray]
+            kind: 数据种类，同一源文件的不同解析结果使用不同的 kind
+
+        Returns:
+            dict[str, np.ndarray]: 解析结果
+        """
+        entry = self.cache_dir / self._key(source_path, kind)
+
+        if entry.is_dir():
+            try:
+                arrays = self._read_entry(entry)
+                os.utime(entry)
+                return arrays
+            except (OSError, ValueError):
+                # 条目被其他进程淘汰或损坏，重新解析
+                shutil.rmtree(entry, ignore_errors=True)
+
+        arrays = loader(source_path)
+        self._write_entry(entry, arrays)
+        return arrays
+
+    def clear(self):
+        """清空缓存"""
+        for entry in self.cache_dir.iterdir():
+            shutil.rmtree(entry, ignore_errors=True)
+        self._size = 0
+
+    def _key(self, source_path, kind):
+        """计算缓存键"""
+        source_path = Path(source_path).resolve()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{kind}|{source_path}".encode())
+
+        if self.key_mode == 'hash':
+            with open(source_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        else:
+            stat = source_path.stat()
+            digest.update(f"|{stat.st_mtime_ns}|{stat.st_size}".encode())
+
+        return digest.hexdigest()
+
+    def _read_entry(self, entry):
+        """按清单读取条目，条目不完整时抛出 ValueError"""
+        try:
+            with open(entry / MANIFEST) as f:
+                names = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"缓存条目缺少清单: {entry}") from None
+        mmap_mode = 'c' if self.mmap else None
+        arrays = {}
+        for name in names:
+            try:
+                arrays[name] = np.load(entry / f"{name}.npy", mmap_mode=mmap_mode)
+            except FileNotFoundError:
+                raise ValueError(f"缓存条目不完整: {entry}") from None
+        return arrays
+
+    def _write_entry(self, entry, arrays):
+        """先写入临时目录再原子重命名，多个 worker 并发写同一条目也是安全的"""
+        tmp_entry = self.cache_dir / f".tmp-{entry.name}-{uuid.uuid4().hex}"
+        tmp_entry.mkdir()
+        try:
+            for name, array in arrays.items():
+                np.save(tmp_entry / f"{name}.npy", np.ascontiguousarray(array))
+            with open(tmp_entry / MANIFEST, 'w') as f:
+                json.dump(list(arrays), f)
+            entry_size = _dir_size(tmp_entry)
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # 其他进程已经写入了相同条目
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+
+        if self.max_size is None:
+            return
+        if self._size is None:
+            self._size = sum(size for _, _, size in self._scan())
+        else:
+            self._size += entry_size
+        if self._size > self.max_size:
+            self._evict(keep=entry)
+
+    def _scan(self):
+        """返回所有条目的 (mtime, path, size)"""
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if entry.name.startswith('.tmp-'):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry, _dir_size(entry)))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self, keep):
+        """按 LRU 淘汰条目，直到总大小不超过容量上限"""
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in entries:
+            if total <= self.max_size:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+        self._size = total
+
+
+def _dir_size(path):
+    return sum(child.stat().st_size for child in os.scandir(path))
@@ -0,0 +1,227 @@
+"""
+MeshSegNet 的逐面特征与面邻接矩阵
+
+每个三角面 15 维特征：三个顶点坐标 (9) + 面重心 (3) + 面法向 (3)，坐标平移到网格质心
+并缩放到单位球。面邻接为稀疏 CSR 矩阵（只保存 indptr / indices，值均为 1）：
+    - edge: 共享一条边的面（每个面最多 3 个邻居）
+    - vertex: 共享至少一个顶点的面（一环邻域，通常 10–15 个邻居）
+两者都由顶点-面关联矩阵的乘积一次得到，内存与边数成正比。
+多个网格组成批次时拼成块对角的 torch 稀疏 CSR 矩阵（block_diagonal_adjacency），供图卷积使用。
+图卷积训练时用 sample_face_patches 采样连通的面片，而不是独立随机采样面（后者几乎去掉所有邻居）。
+
+特征和邻接的计算与 epoch 无关，通过 MeshCache 按扫描缓存到磁盘，只在第一次读取时计算。
+"""
+
+import numpy as np
+import scipy.sparse as sp
+import torch
+
+from .utils import load_mesh
+
+
+__all__ = ['NUM_FEATURES', 'ADJACENCY_TYPES', 'face_features', 'face_adjacency',
+           'face_labels_from_vertices', 'build_mesh_features', 'load_mesh_features',
+           'adjacency_matrix', 'sample_face_patches', 'block_diagonal_adjacency']
+
+
+NUM_FEATURES = 15
+
+ADJACENCY_TYPES = ('edge', 'vertex')
+
+
+def face_features(vertices, faces):
+    """
+    逐面特征
+
+    Args:
+        vertices: (N, 3) 顶点
+        faces: (F, 3) 面
+
+    Returns:
+        features: (F, 15) float32，依次为三个顶点坐标、重心、单位法向（退化面为 0）
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    centroid = vertices.mean(axis=0)
+    scale = np.linalg.norm(vertices - centroid, axis=1).max() + 1e-8
+
+    corners = (vertices[faces] - centroid) / scale  # (F, 3, 3)
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    norms = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, norms, out=np.zeros_like(normals), where=norms > 1e-12)
+
+    return np.concatenate([corners.reshape(-1, 9), corners.mean(axis=1), normals],
+                          axis=1).astype(np.float32)
+
+
+def face_adjacency(faces, num_vertices=None):
+    """
+    面邻接矩阵（CSR，不含自环）
+
+    Args:
+        faces: (F, 3) 面
+        num_vertices: 顶点数，默认取 faces.max() + 1
+
+    Returns:
+        {'edge': csr_matrix, 'vertex': csr_matrix}，形状均为 (F, F)
+    """
+    faces = np.asarray(faces)
+    num_faces = len(faces)
+    if num_vertices is None:
+        num_vertices = int(faces.max()) + 1 if num_faces else 0
+
+    # 顶点-面关联矩阵 (V, F)，乘积 (F, F) 的元素为两个面共享的顶点数
+    incidence = sp.csr_matrix((np.ones(3 * num_faces, dtype=np.int32),
+                               (faces.ravel(), np.repeat(np.arange(num_faces), 3))),
+                              shape=(num_vertices, num_faces))
+    shared = (incidence.T @ incidence).tocsr()
+    shared.setdiag(0)
+    shared.eliminate_zeros()
+
+    adjacency = {}
+    for name, min_shared in (('edge', 2), ('vertex', 1)):
+        matrix = shared.copy()
+        matrix.data = (matrix.data >= min_shared).astype(np.float32)
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+        adjacency[name] = matrix
+    return adjacency
+
+
+def face_labels_from_vertices(faces, labels):
+    """
+    由逐顶点标签得到逐面标签：至少两个顶点相同时取该标签，三者都不同时取第一个顶点的标签
+    """
+    corner_labels = np.asarray(labels)[faces]
+    majority = (corner_labels[:, 1] == corner_labels[:, 2]) & (corner_labels[:, 0] != corner_labels[:, 1])
+    return np.where(majority, corner_labels[:, 1], corner_labels[:, 0])
+
+
+def build_mesh_features(vertices, faces):
+    """
+    计算一个网格的全部缓存数组
+
+    Returns:
+        dict: features (F, 15)、faces (F, 3)、num_vertices (1,)，以及每种邻接的
+            {类型}_indptr / {类型}_indices（CSR，int64 / int32）
+    """
+    faces = np.asarray(faces)
+    arrays = {
+        'features': face_features(vertices, faces),
+        'faces': faces.astype(np.int32),
+        'num_vertices': np.array([len(vertices)], dtype=np.int64),
+    }
+    for name, matrix in face_adjacency(faces, len(vertices)).items():
+        arrays[f'{name}_indptr'] = matrix.indptr.astype(np.int64)
+        arrays[f'{name}_indices'] = matrix.indices.astype(np.int32)
+    return arrays
+
+
+def _load_mesh_features(file_path):
+    vertices, faces = load_mesh(file_path)
+    if len(faces) == 0:
+        raise ValueError(f"网格没有面: {file_path}")
+    return build_mesh_features(vertices, faces)
+
+
+def load_mesh_features(file_path, cache=None):
+    """
+    读取网格并计算特征和邻接，给出 cache（MeshCache）时结果缓存到磁盘
+
+    Returns:
+        dict: 见 build_mesh_features
+    """
+    if cache is None:
+        return _load_mesh_features(str(file_path))
+    return cache.load(str(file_path), _load_mesh_features, kind=f'meshsegnet:{NUM_FEATURES}')
+
+
+def adjacency_matrix(arrays, name='edge', faces=None):
+    """
+    由缓存数组重建 CSR 邻接矩阵
+
+    Args:
+        arrays: load_mesh_features 的结果
+        name: 邻接类型，见 ADJACENCY_TYPES
+        faces: 可选的面索引，给出时返回这些面之间的诱导子图（按给出的顺序编号）
+    """
+    if name not in ADJACENCY_TYPES:
+        raise ValueError(f"未知的邻接类型: {name}")
+    indptr = np.asarray(arrays[f'{name}_indptr'])
+    indices = np.asarray(arrays[f'{name}_indices'])
+    num_faces = len(indptr) - 1
+    matrix = sp.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                           shape=(num_faces, num_faces))
+    if faces is not None:
+        matrix = matrix[faces][:, faces]
+    return matrix
+
+
+def sample_face_patches(matrix, num_faces, num_seeds=8, rng=np.random):
+    """
+    采样若干连通面片：从 num_seeds 个随机种子面同时按邻接环向外扩张，直到选满 num_faces 个面
+
+    最后一环只随机取一部分补足面数。面片内部的面保留全部邻居，只有边界上的面缺少邻居；
+    种子所在的连通分量取完后从未选的面中另选种子。
+
+    Args:
+        matrix: scipy CSR 邻接矩阵 (F, F)
+        num_faces: 采样面数，不小于 F 时返回全部面
+        num_seeds: 种子面数（面片数）
+        rng: 随机数生成器（np.random 或 np.random.Generator）
+
+    Returns:
+        (min(num_faces, F),) 升序的面索引
+    """
+    total = matrix.shape[0]
+    if num_faces >= total:
+        return np.arange(total)
+
+    selected = np.zeros(total, dtype=bool)
+    frontier = np.empty(0, dtype=np.int64)
+    count = 0
+    while count < num_faces:
+        if len(frontier):
+            frontier = np.unique(matrix[frontier].indices)
+            frontier = frontier[~selected[frontier]]
+        if len(frontier) == 0:
+            remaining = np.flatnonzero(~selected)
+            frontier = rng.choice(remaining, min(num_seeds, len(remaining)), replace=False)
+        if count + len(frontier) > num_faces:
+            frontier = rng.choice(frontier, num_faces - count, replace=False)
+        selected[frontier] = True
+        count += len(frontier)
+    return np.flatnonzero(selected)
+
+
+def block_diagonal_adjacency(matrices):
+    """
+    把多个网格的邻接矩阵拼成块对角矩阵并做对称归一化 D^-1/2 A D^-1/2
+
+    第 i 个网格的面编号加上前面网格的面数偏移，与特征沿面维拼接（或 (B, C, N) 按
+    样本展平）的顺序一致。对称归一化后矩阵仍对称，图卷积的反向传播可以直接复用它。
+
+    Args:
+        matrices: scipy CSR 邻接矩阵列表（对称、不含自环）
+
+    Returns:
+        torch 稀疏 CSR 张量 (ΣF, ΣF)，float32
+    """
+    sizes = np.array([matrix.shape[0] for matrix in matrices])
+    nnz = np.array([matrix.nnz for matrix in matrices])
+    face_offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    nnz_offsets = np.concatenate([[0], np.cumsum(nnz)[:-1]])
+
+    index_dtype = np.int32 if nnz.sum() < np.iinfo(np.int32).max else np.int64
+    indptr = np.concatenate([[0]] + [matrix.indptr[1:] + offset
+                                     for matrix, offset in zip(matrices, nnz_offsets)]).astype(index_dtype)
+    indices = np.concatenate([matrix.indices + offset
+                              for matrix, offset in zip(matrices, face_offsets)]).astype(index_dtype)
+
+    degree = np.diff(indptr)
+    inv_sqrt = 1.0 / np.sqrt(np.maximum(degree, 1))
+    values = (np.repeat(inv_sqrt, degree) * inv_sqrt[indices]).astype(np.float32)
+
+    num_faces = int(sizes.sum())
+    return torch.sparse_csr_tensor(torch.from_numpy(indptr), torch.from_numpy(indices),
+                                   torch.from_numpy(values), size=(num_faces, num_faces),
+                                   check_invariants=False)
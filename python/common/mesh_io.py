@@ -0,0 +1,457 @@
+"""
+网格文件读写
+
+OBJ 解析不逐行调用 str.split/float：整个文件按字节读入后，
+先用 NumPy 在行级别定位连续的 v/f 记录段，再把每段（按块切分）
+一次性交给 np.fromstring 批量解码。
+PLY 读写使用结构化 dtype + np.frombuffer/tobytes，整块完成编解码。
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+
+__all__ = ['read_mesh', 'write_mesh', 'read_obj', 'write_obj', 'read_ply', 'write_ply']
+
+# 每块最多解码的行数，限制中间缓冲区大小
+OBJ_CHUNK_LINES = 1 << 20
+
+# 把记录标记和 '/' 替换为空格的转换表
+_VERTEX_TABLE = bytes.maketrans(b'v', b' ')
+_FACE_TABLE = bytes.maketrans(b'f/', b'  ')
+
+
+def read_mesh(file_path, load_faces=True):
+    """
+    按扩展名读取 OBJ 或 PLY 网格
+
+    Returns:
+        vertices: (N, 3) float32 顶点
+        faces: (F, 3) int32 面
+    """
+    if Path(file_path).suffix.lower() == '.ply':
+        vertices, faces, _ = read_ply(file_path, load_faces=load_faces)
+        return vertices, faces
+    return read_obj(file_path, load_faces=load_faces)
+
+
+def write_mesh(file_path, vertices, faces, labels=None):
+    """按扩展名写出 OBJ 或 PLY 网格（PLY 为二进制格式）"""
+    if Path(file_path).suffix.lower() == '.ply':
+        write_ply(file_path, vertices, faces, labels=labels)
+    else:
+        write_obj(file_path, vertices, faces, labels=labels)
+
+
+def read_obj(file_path, load_faces=True, chunk_lines=OBJ_CHUNK_LINES):
+    """
+    批量解析 OBJ 文件
+
+    支持 `v x y z [r g b]` 顶点（只取前三个分量）、`f a b c` 以及
+    `f a/b/c`、`f a//c` 形式的面，多边形面按扇形三角化，`#` 注释会被忽略。
+
+    Args:
+        file_path: OBJ 文件路径
+        load_faces: 是否解析面
+        chunk_lines: 每块解码的最大行数
+
+    Returns:
+        vertices: (N, 3) float32 顶点
+        faces: (F, 3) int32 面（0 起始索引），load_faces=False 时为空数组
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if not data.endswith(b'\n'):
+        data += b'\n'
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    line_ends = np.flatnonzero(buf == ord('\n')) + 1
+    line_starts = np.concatenate(([0], line_ends[:-1]))
+
+    # 记录类型由行首两个字节决定，`vt`/`vn` 不会被误认为顶点
+    first = buf[line_starts]
+    second = buf[np.minimum(line_starts + 1, len(buf) - 1)]
+    tagged = (second == ord(' ')) | (second == ord('\t'))
+
+    vertex_lines = tagged & (first == ord('v'))
+    vertices = [_decode_vertices(block)
+                for block in _iter_blocks(data, line_starts, line_ends,
+                                          vertex_lines, chunk_lines)]
+    vertices = (np.concatenate(vertices) if vertices
+                else np.zeros((0, 3), dtype=np.float32))
+
+    faces = []
+    if load_faces:
+        face_lines = tagged & (first == ord('f'))
+        faces = [_decode_faces(block)
+                 for block in _iter_blocks(data, line_starts, line_ends,
+                                           face_lines, chunk_lines)]
+    faces = (np.concatenate(faces) if faces
+             else np.zeros((0, 3), dtype=np.int32))
+
+    return vertices, faces
+
+
+def _iter_blocks(data, line_starts, line_ends, selected, chunk_lines):
+    """按连续段（每段不超过 chunk_lines 行）产出选中行的原始字节"""
+    if not selected.any():
+        return
+
+    # 连续选中行的起止行号
+    edges = np.diff(np.concatenate(([0], selected.view(np.int8), [0])))
+    run_begin = np.flatnonzero(edges == 1)
+    run_end = np.flatnonzero(edges == -1)
+
+    for begin, end in zip(run_begin, run_end):
+        for chunk_begin in range(begin, end, chunk_lines):
+            chunk_end = min(chunk_begin + chunk_lines, end)
+            yield data[line_starts[chunk_begin]:line_ends[chunk_end - 1]]
+
+
+def _decode_vertices(block):
+    """解码一段 `v` 记录"""
+    if b'#' in block:
+        block = _strip_comments(block)
+
+    num_lines = block.count(b'\n')
+    width = len(block[:block.index(b'\n')].split()) - 1
+    if width < 3:
+        raise ValueError("OBJ 顶点记录至少需要 3 个分量")
+
+    values = np.fromstring(block.translate(_VERTEX_TABLE), dtype=np.float32, sep=' ')
+    if len(values) != num_lines * width:
+        # 每行分量数不一致（例如部分顶点带颜色），逐行取前三个分量
+        return np.array([line.split()[1:4] for line in block.splitlines()],
+                        dtype=np.float32)
+
+    return np.ascontiguousarray(values.reshape(num_lines, width)[:, :3])
+
+
+def _decode_faces(block):
+    """解码一段 `f` 记录，返回 0 起始的三角形索引"""
+    if b'#' in block:
+        block = _strip_comments(block)
+
+    num_lines = block.count(b'\n')
+    tokens = block[:block.index(b'\n')].split()[1:]
+    if len(tokens) < 3:
+        raise ValueError("OBJ 面记录至少需要 3 个顶点")
+    # 每个面顶点包含的索引个数：a -> 1, a//c -> 2, a/b/c -> 3
+    stride = sum(1 for part in tokens[0].split(b'/') if part)
+    width = len(tokens) * stride
+
+    values = np.fromstring(block.translate(_FACE_TABLE), dtype=np.int64, sep=' ')
+    if len(values) != num_lines * width:
+        # 面的顶点数或索引格式不一致，逐行解析
+        polygons = [[int(token.split(b'/')[0]) for token in line.split()[1:]]
+                    for line in block.splitlines()]
+        return np.concatenate([_fan_triangulate(np.array(polygon) - 1)
+                               for polygon in polygons])
+
+    polygons = values.reshape(num_lines, width)[:, ::stride] - 1
+    if polygons.shape[1] == 3:
+        return polygons.astype(np.int32)
+    return _fan_triangulate(polygons)
+
+
+def _fan_triangulate(polygons):
+    """(F, K) 或 (K,) 多边形按扇形拆为 (F * (K - 2), 3) 三角形"""
+    polygons = np.atleast_2d(polygons)
+    corners = np.arange(1, polygons.shape[1] - 1)
+    triangles = np.stack([
+        np.broadcast_to(polygons[:, :1], (len(polygons), len(corners))),
+        polygons[:, corners],
+        polygons[:, corners + 1],
+    ], axis=2)
+    return triangles.reshape(-1, 3).astype(np.int32)
+
+
+def _strip_comments(block):
+    """去掉行内 `#` 注释，保留换行"""
+    return b''.join(line.split(b'#', 1)[0].rstrip() + b'\n'
+                    for line in block.splitlines())
+
+
+def write_obj(file_path, vertices, faces, labels=None):
+    """
+    写出文本 OBJ，标签以 `# label: N` 注释附在顶点行尾
+
+    Args:
+        file_path: 输出路径
+        vertices: (N, 3) 顶点
+        faces: (F, 3) 0 起始的面索引
+        labels: 可选的 (N,) 顶点标签
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+
+    with open(file_path, 'w') as f:
+        if labels is not None:
+            columns = np.column_stack([vertices, np.asarray(labels, dtype=np.float64)])
+            np.savetxt(f, columns, fmt='v %.9g %.9g %.9g # label: %d')
+        else:
+            np.savetxt(f, vertices, fmt='v %.9g %.9g %.9g')
+        np.savetxt(f, faces + 1, fmt='f %d %d %d')
+
+
+# PLY 标量类型 -> NumPy 类型码
+_PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1',
+    'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2',
+    'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4',
+    'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4',
+    'double': 'f8', 'float64': 'f8',
+}
+
+_PLY_BYTE_ORDER = {
+    'binary_little_endian': '<',
+    'binary_big_endian': '>',
+    'ascii': '=',
+}
+
+
+def read_ply(file_path, load_faces=True):
+    """
+    读取 PLY 网格（binary_little_endian / binary_big_endian / ascii）
+
+    Args:
+        file_path: PLY 文件路径
+        load_faces: 是否读取面
+
+    Returns:
+        vertices: (N, 3) float32 顶点
+        faces: (F, 3) int32 面，多边形按扇形三角化
+        properties: 除 x/y/z 外的其他顶点属性，例如 {'label': (N,) 数组}
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    header_end = data.find(b'end_header')
+    if not data.startswith(b'ply') or header_end < 0:
+        raise ValueError(f"不是有效的 PLY 文件: {file_path}")
+    body_start = data.index(b'\n', header_end) + 1
+    fmt, elements = _parse_ply_header(data[:body_start].decode('ascii', 'replace'))
+
+    byte_order = _PLY_BYTE_ORDER[fmt]
+    if fmt == 'ascii':
+        body = _split_ascii_elements(data[body_start:], elements)
+    else:
+        body = memoryview(data)[body_start:]
+
+    vertices = np.zeros((0, 3), dtype=np.float32)
+    faces = np.zeros((0, 3), dtype=np.int32)
+    properties = {}
+
+    offset = 0
+    has_vertex = any(name == 'vertex' for name, _, _ in elements)
+    vertices_read = False
+    for name, count, props in elements:
+        if name not in ('vertex', 'face'):
+            if fmt == 'ascii':
+                continue
+            if any(prop[0] == 'list' for prop in props):
+                # 变长元素无法跳过，后面的元素也就无法定位
+                if has_vertex and not vertices_read:
+                    raise ValueError(f"PLY 元素 {name} 含列表属性且位于 vertex 之前，"
+                                     f"无法定位顶点: {file_path}")
+                break
+            offset += count * _ply_dtype(props, byte_order).itemsize
+            continue
+
+        if name == 'vertex':
+            records, offset = _read_ply_records(body, fmt, name, count, props,
+                                                byte_order, offset)
+            vertices = np.stack([records['x'], records['y'], records['z']],
+                                axis=1).astype(np.float32)
+            properties = {prop[-1]: np.array(records[prop[-1]]) for prop in props
+                          if prop[-1] not in ('x', 'y', 'z')}
+            vertices_read = True
+        elif load_faces:
+            faces, offset = _read_ply_faces(body, fmt, count, props, byte_order, offset)
+        elif fmt != 'ascii':
+            if vertices_read:
+                break
+            # 面在顶点之前：二进制面块长度不固定，只能解析一遍来跳过
+            _, offset = _read_ply_faces(body, fmt, count, props, byte_order, offset)
+
+    return vertices, faces, properties
+
+
+def write_ply(file_path, vertices, faces=None, labels=None):
+    """
+    写出二进制小端 PLY
+
+    Args:
+        file_path: 输出路径
+        vertices: (N, 3) 顶点
+        faces: 可选的 (F, 3) 0 起始的面索引
+        labels: 可选的 (N,) 顶点标签，写为 `label` 属性
+    """
+    vertices = np.asarray(vertices)
+    num_vertices = len(vertices)
+
+    vertex_fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    header = ['ply', 'format binary_little_endian 1.0',
+              f'element vertex {num_vertices}',
+              'property float x', 'property float y', 'property float z']
+    if labels is not None:
+        labels = np.asarray(labels)
+        # 牙齿标签通常 < 256，用 uchar 存储可进一步减小文件
+        fits_uchar = labels.size == 0 or (labels.min() >= 0 and labels.max() <= 255)
+        label_type, label_code = ('uchar', 'u1') if fits_uchar else ('int', '<i4')
+        vertex_fields.append(('label', label_code))
+        header.append(f'property {label_type} label')
+
+    vertex_data = np.empty(num_vertices, dtype=vertex_fields)
+    vertex_data['x'] = vertices[:, 0]
+    vertex_data['y'] = vertices[:, 1]
+    vertex_data['z'] = vertices[:, 2]
+    if labels is not None:
+        vertex_data['label'] = labels
+
+    face_data = None
+    if faces is not None:
+        faces = np.asarray(faces).reshape(-1, 3)
+        face_data = np.empty(len(faces), dtype=[('n', 'u1'), ('v', '<i4', (3,))])
+        face_data['n'] = 3
+        face_data['v'] = faces
+        header += [f'element face {len(faces)}',
+                   'property list uchar int vertex_indices']
+    header.append('end_header')
+
+    with open(file_path, 'wb') as f:
+        f.write(('\n'.join(header) + '\n').encode('ascii'))
+        f.write(vertex_data.tobytes())
+        if face_data is not None:
+            f.write(face_data.tobytes())
+
+
+def _parse_ply_header(header):
+    """解析 PLY 头，返回 (格式, [(元素名, 数量, 属性列表)])"""
+    fmt = None
+    elements = []
+    for line in header.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == 'format':
+            fmt = parts[1]
+        elif parts[0] == 'element':
+            elements.append((parts[1], int(parts[2]), []))
+        elif parts[0] == 'property':
+            if parts[1] == 'list':
+                # ('list', 数量类型, 元素类型, 名称)
+                elements[-1][2].append(('list', parts[2], parts[3], parts[4]))
+            else:
+                elements[-1][2].append((parts[1], parts[2]))
+
+    if fmt not in _PLY_BYTE_ORDER:
+        raise ValueError(f"不支持的 PLY 格式: {fmt}")
+    return fmt, elements
+
+
+def _ply_dtype(props, byte_order, list_length=None):
+    """由属性列表构造结构化 dtype，list 属性按固定长度 list_length 展开"""
+    fields = []
+    for prop in props:
+        if prop[0] == 'list':
+            fields.append((prop[3] + '_count', byte_order + _PLY_TYPES[prop[1]]))
+            fields.append((prop[3], byte_order + _PLY_TYPES[prop[2]], (list_length,)))
+        else:
+            fields.append((prop[1], byte_order + _PLY_TYPES[prop[0]]))
+    return np.dtype(fields)
+
+
+def _read_ply_records(body, fmt, name, count, props, byte_order, offset):
+    """读取定长记录元素，返回 (结构化数组, 新偏移)"""
+    dtype = _ply_dtype(props, byte_order)
+    if fmt == 'ascii':
+        values = np.fromstring(body[name], dtype=np.float64, sep=' ')
+        values = values.reshape(count, len(props))
+        records = np.empty(count, dtype=dtype)
+        for i, prop in enumerate(props):
+            records[prop[1]] = values[:, i]
+        return records, offset
+
+    records = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+    return records, offset + count * dtype.itemsize
+
+
+def _read_ply_faces(body, fmt, count, props, byte_order, offset):
+    """读取面元素，返回 (0 起始三角形索引, 新偏移)"""
+    list_props = [prop for prop in props if prop[0] == 'list']
+    if len(list_props) != 1 or list_props[0][3] not in ('vertex_indices', 'vertex_index'):
+        raise ValueError("PLY 面元素需要且仅需要一个 vertex_indices 列表属性")
+    index_name = list_props[0][3]
+
+    if fmt == 'ascii':
+        lines = body['face'].splitlines()
+        if len(props) == 1:
+            values = np.fromstring(body['face'], dtype=np.int64, sep=' ')
+            if len(lines) and len(values) % len(lines) == 0:
+                values = values.reshape(len(lines), -1)
+                if (values[:, 0] == values.shape[1] - 1).all():
+                    return _polygons_to_triangles(values[:, 1:]), offset
+        # 多边形顶点数不一致或存在其他属性，逐行解析
+        position = [prop[0] for prop in props].index('list')
+        polygons = []
+        for line in lines:
+            tokens = line.split()
+            size = int(tokens[position])
+            polygons.append(np.array(tokens[position + 1:position + 1 + size], dtype=np.int64))
+        return _ragged_to_triangles(polygons), offset
+
+    if count == 0:
+        return np.zeros((0, 3), dtype=np.int32), offset
+
+    # 先看第一个面的顶点数，假设所有面相同，再整体校验
+    probe = _ply_dtype(props, byte_order, list_length=0)
+    first_size = int(np.frombuffer(body, dtype=probe, count=1,
+                                   offset=offset)[index_name + '_count'][0])
+    dtype = _ply_dtype(props, byte_order, list_length=first_size)
+    if offset + count * dtype.itemsize <= len(body):
+        records = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        if (records[index_name + '_count'] == first_size).all():
+            return (_polygons_to_triangles(records[index_name].astype(np.int64)),
+                    offset + count * dtype.itemsize)
+
+    # 面的顶点数不一致，只能顺序扫描
+    polygons = []
+    for _ in range(count):
+        record = np.frombuffer(body, dtype=probe, count=1, offset=offset)
+        size = int(record[index_name + '_count'][0])
+        dtype = _ply_dtype(props, byte_order, list_length=size)
+        record = np.frombuffer(body, dtype=dtype, count=1, offset=offset)
+        polygons.append(record[index_name][0].astype(np.int64))
+        offset += dtype.itemsize
+    return _ragged_to_triangles(polygons), offset
+
+
+def _split_ascii_elements(body, elements):
+    """把 ASCII PLY 的数据部分按元素切分为 {元素名: 字节串}"""
+    lines = body.split(b'\n')
+    parts = {}
+    start = 0
+    for name, count, _ in elements:
+        parts[name] = b'\n'.join(lines[start:start + count]) + b'\n'
+        start += count
+    return parts
+
+
+def _polygons_to_triangles(polygons):
+    """(F, K) 多边形 -> 三角形"""
+    if polygons.shape[1] == 3:
+        return polygons.astype(np.int32)
+    if polygons.shape[1] < 3:
+        raise ValueError("面至少需要 3 个顶点")
+    return _fan_triangulate(polygons)
+
+
+def _ragged_to_triangles(polygons):
+    if not polygons:
+        return np.zeros((0, 3), dtype=np.int32)
+    return np.concatenate([_fan_triangulate(polygon) for polygon in polygons])
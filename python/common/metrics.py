@@ -4,6 +4,7 @@
 
 import numpy as np
 import torch
+import torch.nn.functional as F
 
 
 def segmentation_metrics(pred, target, num_classes):
@@ -18,41 +19,106 @@ def segmentation_metrics(pred, target, num_classes):
     Returns:
         dict: 包含各种指标的字典
     """
-    metrics = {}
+    meter = SegmentationMeter(num_classes)
+    meter.update(pred, target)
+    return meter.compute()
+
+
+class SegmentationMeter:
+    """
+    基于混淆矩阵的分割指标累加器
     
-    # 整体准确率
-    accuracy = (pred == target).sum() / len(pred)
-    metrics['accuracy'] = accuracy
+    每个批次用 bincount 更新一个 num_classes x num_classes 的混淆矩阵，
+    整个验证集结束后再从混淆矩阵计算准确率、IoU 和 Dice，内存为 O(C^2)。
+    输入为 torch.Tensor 时混淆矩阵留在输入所在的设备上，compute 前不会同步。
+    超出 [0, num_classes) 的标签（例如 -1 忽略标签）不计入统计。
     
-    # 每个类别的 IoU
-    ious = []
-    for c in range(num_classes):
-        pred_mask = pred == c
-        target_mask = target == c
-        
-        intersection = (pred_mask & target_mask).sum()
-        union = (pred_mask | target_mask).sum()
-        
-        if union > 0:
-            iou = intersection / union
-            ious.append(iou)
-    
-    metrics['mean_iou'] = np.mean(ious) if ious else 0.0
-    metrics['per_class_iou'] = ious
-    
-    # Dice系数
-    dice_scores = []
-    for c in range(num_classes):
-        pred_mask = pred == c
-        target_mask = target == c
+    Args:
+        num_classes: 类别数量
+    """
+    
+    def __init__(self, num_classes):
+        self.num_classes = num_classes
+        self.reset()
+    
+    def reset(self):
+        """清空累计的混淆矩阵"""
+        self.confusion = None
+    
+    def update(self, pred, target):
+        """
+        累加一个批次
         
-        intersection = (pred_mask & target_mask).sum()
-        dice = 2 * intersection / (pred_mask.sum() + target_mask.sum() + 1e-8)
-        dice_scores.append(dice)
+        Args:
+            pred: 任意形状的预测标签（np.ndarray 或 torch.Tensor），
+                也可以是 (B, C, ...) 的 logits，此时按第 1 维取 argmax
+            target: 与预测标签形状相同的真实标签
+        """
+        C = self.num_classes
+        if pred.ndim == np.ndim(target) + 1:
+            pred = pred.argmax(1)
+        if torch.is_tensor(pred):
+            pred = pred.reshape(-1).long()
+            target = torch.as_tensor(target, device=pred.device).reshape(-1).long()
+            valid = (target >= 0) & (target < C) & (pred >= 0) & (pred < C)
+            # 无效的点计入末尾的丢弃位，形状固定；布尔索引和 bincount（要求最大值）在 CUDA 上都会同步
+            index = torch.where(valid, target * C + pred, C * C)
+            counts = torch.zeros(C * C + 1, dtype=torch.long, device=pred.device)
+            counts = counts.index_add_(0, index, torch.ones_like(index))[:C * C]
+        else:
+            pred = np.asarray(pred).reshape(-1).astype(np.int64)
+            target = np.asarray(target).reshape(-1).astype(np.int64)
+            valid = (target >= 0) & (target < C) & (pred >= 0) & (pred < C)
+            counts = np.bincount(target[valid] * C + pred[valid], minlength=C * C)
+        self._add(counts.reshape(C, C))
     
-    metrics['mean_dice'] = np.mean(dice_scores) if dice_scores else 0.0
+    def merge(self, other):
+        """合并另一个累加器的统计（例如分布式验证时其他进程的结果）"""
+        if other.confusion is not None:
+            self._add(other.confusion)
+        return self
     
-    return metrics
+    def _add(self, counts):
+        if self.confusion is None:
+            self.confusion = counts
+        elif torch.is_tensor(self.confusion):
+            self.confusion += torch.as_tensor(counts, device=self.confusion.device)
+        else:
+            self.confusion += counts.cpu().numpy() if torch.is_tensor(counts) else counts
+    
+    def confusion_matrix(self):
+        """(C, C) 混淆矩阵，行为真实类别、列为预测类别"""
+        if self.confusion is None:
+            return np.zeros((self.num_classes, self.num_classes), dtype=np.int64)
+        if torch.is_tensor(self.confusion):
+            return self.confusion.cpu().numpy()
+        return self.confusion
+    
+    def compute(self):
+        """
+        Returns:
+            dict: accuracy、mean_iou、per_class_iou（出现过的类别）、
+                class_iou（全部类别，未出现为 nan）、mean_dice
+        """
+        cm = self.confusion_matrix().astype(np.float64)
+        tp = np.diag(cm)
+        pred_count = cm.sum(axis=0)
+        target_count = cm.sum(axis=1)
+        total = cm.sum()
+        
+        union = pred_count + target_count - tp
+        present = union > 0
+        iou = np.full(self.num_classes, np.nan)
+        iou[present] = tp[present] / union[present]
+        dice = 2 * tp / (pred_count + target_count + 1e-8)
+        
+        return {
+            'accuracy': float(tp.sum() / total) if total > 0 else 0.0,
+            'mean_iou': float(iou[present].mean()) if present.any() else 0.0,
+            'per_class_iou': iou[present].tolist(),
+            'class_iou': iou,
+            'mean_dice': float(dice.mean()),
+        }
 
 
 def landmark_metrics(pred_landmarks, gt_landmarks):
@@ -66,21 +132,7 @@ def landmark_metrics(pred_landmarks, gt_landmarks):
     Returns:
         dict: 包含各种指标的字典
     """
-    metrics = {}
-    
-    # Mean Radial Error (MRE)
-    distances = np.linalg.norm(pred_landmarks - gt_landmarks, axis=1)
-    mre = distances.mean()
-    metrics['mre'] = mre
-    metrics['std'] = distances.std()
-    
-    # Percentage of Correct Keypoints (PCK)
-    thresholds = [1.0, 2.0, 3.0, 5.0]  # mm
-    for threshold in thresholds:
-        pck = (distances < threshold).mean()
-        metrics[f'pck@{threshold}mm'] = pck
-    
-    return metrics
+    return batch_landmark_metrics(np.asarray(pred_landmarks)[None], np.asarray(gt_landmarks)[None])
 
 
 def axis_metrics(pred_origin, pred_direction, gt_origin, gt_direction):
@@ -96,23 +148,264 @@ def axis_metrics(pred_origin, pred_direction, gt_origin, gt_direction):
     Returns:
         dict: 包含各种指标的字典
     """
-    metrics = {}
+    origin_error, angle_error = batch_axis_errors(
+        *(np.asarray(v, dtype=np.float64)[None] for v in
+          (pred_origin, pred_direction, gt_origin, gt_direction)))
+    return {'origin_error': origin_error[0], 'angle_error_deg': angle_error[0]}
+
+
+def batch_landmark_errors(pred_landmarks, gt_landmarks):
+    """
+    批量计算地标点径向误差
+    
+    Args:
+        pred_landmarks: (B, L, 3) 预测的地标点（np.ndarray 或 torch.Tensor）
+        gt_landmarks: (B, L, 3) 真实的地标点
+    
+    Returns:
+        (B, L) 每个地标点的欧氏距离误差，类型与 pred_landmarks 一致
+    """
+    if torch.is_tensor(pred_landmarks):
+        gt_landmarks = torch.as_tensor(gt_landmarks, device=pred_landmarks.device,
+                                       dtype=pred_landmarks.dtype)
+        return torch.linalg.norm(pred_landmarks - gt_landmarks, dim=-1)
+    return np.linalg.norm(np.asarray(pred_landmarks) - np.asarray(gt_landmarks), axis=-1)
+
+
+def batch_axis_errors(pred_origin, pred_direction, gt_origin, gt_direction):
+    """
+    批量计算牙轴起点误差和方向夹角（不区分方向正反）
+    
+    Args:
+        pred_origin, pred_direction, gt_origin, gt_direction: (B, 3)（np.ndarray 或 torch.Tensor）
+    
+    Returns:
+        origin_error: (B,) 起点欧氏距离
+        angle_error: (B,) 方向夹角（度）
+    """
+    if torch.is_tensor(pred_origin):
+        as_tensor = lambda v: torch.as_tensor(v, device=pred_origin.device, dtype=pred_origin.dtype)
+        gt_origin, pred_direction, gt_direction = map(as_tensor, (gt_origin, pred_direction, gt_direction))
+        origin_error = torch.linalg.norm(pred_origin - gt_origin, dim=-1)
+        cos_sim = (F.normalize(pred_direction, dim=-1) * F.normalize(gt_direction, dim=-1)).sum(dim=-1)
+        angle_error = torch.rad2deg(torch.arccos(cos_sim.abs().clamp(max=1.0)))
+        return origin_error, angle_error
+    
+    pred_origin, pred_direction, gt_origin, gt_direction = (
+        np.asarray(v) for v in (pred_origin, pred_direction, gt_origin, gt_direction))
+    origin_error = np.linalg.norm(pred_origin - gt_origin, axis=-1)
+    pred_direction = pred_direction / (np.linalg.norm(pred_direction, axis=-1, keepdims=True) + 1e-8)
+    gt_direction = gt_direction / (np.linalg.norm(gt_direction, axis=-1, keepdims=True) + 1e-8)
+    cos_sim = np.clip(np.abs((pred_direction * gt_direction).sum(axis=-1)), 0.0, 1.0)
+    angle_error = np.degrees(np.arccos(cos_sim))
+    return origin_error, angle_error
+
+
+def batch_landmark_metrics(pred_landmarks, gt_landmarks, thresholds=(1.0, 2.0, 3.0, 5.0)):
+    """批量计算地标点指标，见 LandmarkMeter"""
+    meter = LandmarkMeter(thresholds)
+    meter.update(pred_landmarks, gt_landmarks)
+    return meter.compute()
+
+
+def batch_axis_metrics(pred_origin, pred_direction, gt_origin, gt_direction,
+                       percentiles=(50, 90, 95)):
+    """批量计算牙轴指标，见 AxisMeter"""
+    meter = AxisMeter(percentiles)
+    meter.update((pred_origin, pred_direction), (gt_origin, gt_direction))
+    return meter.compute()
+
+
+def _rescale(errors, scale):
+    """按样本把 (B, ...) 误差乘以 (B,) 的归一化缩放系数，换算回原始坐标单位"""
+    if torch.is_tensor(errors):
+        scale = torch.as_tensor(scale, device=errors.device, dtype=errors.dtype)
+    else:
+        scale = np.asarray(scale.cpu() if torch.is_tensor(scale) else scale)
+    return errors * scale.reshape((-1,) + (1,) * (errors.ndim - 1))
+
+
+def _concat(chunks):
+    """拼接按批次累计的误差，torch.Tensor 在这里才拷回 CPU"""
+    if all(torch.is_tensor(chunk) and chunk.device == chunks[0].device for chunk in chunks):
+        return torch.cat(chunks).cpu().numpy()
+    return np.concatenate([chunk.cpu().numpy() if torch.is_tensor(chunk) else chunk
+                           for chunk in chunks])
+
+
+class LandmarkMeter:
+    """
+    地标点指标累加器
+    
+    按批次累计每个地标点的径向误差（torch.Tensor 保留在原设备上），
+    compute 时计算 MRE、标准差和任意阈值的 PCK。误差单位与传入的坐标相同；
+    坐标经过归一化时需要随真值传入缩放系数，误差才是 mm。
+    
+    Args:
+        thresholds: PCK 阈值（mm）
+    """
+    
+    def __init__(self, thresholds=(1.0, 2.0, 3.0, 5.0)):
+        self.thresholds = tuple(thresholds)
+        self.reset()
+    
+    def reset(self):
+        self._errors = []
+    
+    def update(self, pred_landmarks, gt_landmarks):
+        """
+        累加一个批次
+        
+        Args:
+            pred_landmarks: (B, L, 3) 预测
+            gt_landmarks: (B, L, 3) 真值，或 (真值, scale)，scale 为 (B,) 的归一化缩放系数，
+                误差乘以它换算回原始坐标单位
+        """
+        scale = None
+        if isinstance(gt_landmarks, (tuple, list)):
+            gt_landmarks, scale = gt_landmarks
+        errors = batch_landmark_errors(pred_landmarks, gt_landmarks)
+        if scale is not None:
+            errors = _rescale(errors, scale)
+        self._errors.append(errors.detach() if torch.is_tensor(errors) else errors)
+    
+    def merge(self, other):
+        """合并另一个累加器的误差（例如分布式验证时其他进程的结果）"""
+        self._errors.extend(other._errors)
+        return self
+    
+    def errors(self):
+        """(num_cases, L) 全部径向误差"""
+        return _concat(self._errors) if self._errors else np.zeros((0, 0))
+    
+    def compute(self, thresholds=None):
+        """
+        Args:
+            thresholds: PCK 阈值，默认使用构造时的阈值
+        
+        Returns:
+            dict: mre、std、pck@<阈值>mm、per_landmark_mre
+        """
+        distances = self.errors()
+        if distances.size == 0:
+            return {}
+        
+        metrics = {
+            'mre': float(distances.mean()),
+            'std': float(distances.std()),
+        }
+        for threshold in (thresholds or self.thresholds):
+            metrics[f'pck@{threshold}mm'] = float((distances < threshold).mean())
+        metrics['per_landmark_mre'] = distances.mean(axis=0)
+        return metrics
+
+
+class AxisMeter:
+    """
+    牙轴指标累加器
+    
+    按批次累计起点误差和方向夹角（torch.Tensor 保留在原设备上），
+    compute 时计算均值和夹角分位数。起点经过归一化时需要随真值传入缩放系数，
+    起点误差才是 mm。
+    
+    Args:
+        percentiles: 夹角误差的分位数
+    """
+    
+    def __init__(self, percentiles=(50, 90, 95)):
+        self.percentiles = tuple(percentiles)
+        self.reset()
+    
+    def reset(self):
+        self._origin_errors = []
+        self._angle_errors = []
+    
+    def update(self, pred, target):
+        """
+        累加一个批次
+        
+        Args:
+            pred: (origin, direction)，各为 (B, 3)
+            target: (origin, direction)，各为 (B, 3)；也可以是 (origin, direction, scale)，
+                scale 为 (B,) 的归一化缩放系数，起点误差乘以它换算回原始坐标单位
+        """
+        origin_error, angle_error = batch_axis_errors(pred[0], pred[1], target[0], target[1])
+        if len(target) > 2:
+            origin_error = _rescale(origin_error, target[2])
+        if torch.is_tensor(origin_error):
+            origin_error, angle_error = origin_error.detach(), angle_error.detach()
+        self._origin_errors.append(origin_error)
+        self._angle_errors.append(angle_error)
+    
+    def merge(self, other):
+        """合并另一个累加器的误差（例如分布式验证时其他进程的结果）"""
+        self._origin_errors.extend(other._origin_errors)
+        self._angle_errors.extend(other._angle_errors)
+        return self
+    
+    def errors(self):
+        """(origin_error, angle_error) 两个 (num_cases,) 数组"""
+        if not self._origin_errors:
+            return np.zeros(0), np.zeros(0)
+        return _concat(self._origin_errors), _concat(self._angle_errors)
+    
+    def compute(self, percentiles=None):
+        """
+        Args:
+            percentiles: 夹角误差分位数，默认使用构造时的分位数
+        
+        Returns:
+            dict: origin_error、origin_error_std、angle_error_deg、angle_error_p<分位数>
+        """
+        origin_error, angle_error = self.errors()
+        if len(origin_error) == 0:
+            return {}
+        
+        metrics = {
+            'origin_error': float(origin_error.mean()),
+            'origin_error_std': float(origin_error.std()),
+            'angle_error_deg': float(angle_error.mean()),
+        }
+        for q in (percentiles or self.percentiles):
+            metrics[f'angle_error_p{q}'] = float(np.percentile(angle_error, q))
+        return metrics
+
+
+class LandmarkAxisMeter:
+    """
+    地标点 + 牙轴多任务指标累加器
+    
+    输出和真值均为 (landmarks, origin, direction)，分别交给 LandmarkMeter 和 AxisMeter。
+    真值可以附带归一化缩放系数 (landmarks, origin, direction, scale)，地标点和起点误差换算回 mm。
+    
+    Args:
+        thresholds: PCK 阈值（mm）
+        percentiles: 夹角误差的分位数
+    """
     
-    # Origin error
-    origin_error = np.linalg.norm(pred_origin - gt_origin)
-    metrics['origin_error'] = origin_error
+    def __init__(self, thresholds=(1.0, 2.0, 3.0, 5.0), percentiles=(50, 90, 95)):
+        self.landmarks = LandmarkMeter(thresholds)
+        self.axis = AxisMeter(percentiles)
     
-    # Direction error (角度)
-    pred_direction = pred_direction / (np.linalg.norm(pred_direction) + 1e-8)
-    gt_direction = gt_direction / (np.linalg.norm(gt_direction) + 1e-8)
+    def reset(self):
+        self.landmarks.reset()
+        self.axis.reset()
     
-    cos_sim = np.dot(pred_direction, gt_direction)
-    cos_sim = np.clip(cos_sim, -1.0, 1.0)
-    angle_error = np.arccos(np.abs(cos_sim)) * 180 / np.pi
+    def update(self, pred, target):
+        if len(target) > 3:
+            self.landmarks.update(pred[0], (target[0], target[3]))
+        else:
+            self.landmarks.update(pred[0], target[0])
+        self.axis.update(pred[1:], target[1:])
     
-    metrics['angle_error_deg'] = angle_error
+    def merge(self, other):
+        self.landmarks.merge(other.landmarks)
+        self.axis.merge(other.axis)
+        return self
     
-    return metrics
+    def compute(self):
+        """地标点和牙轴指标合并到一个字典"""
+        return {**self.landmarks.compute(), **self.axis.compute()}
 
 
 def compute_iou(pred_mask, gt_mask):
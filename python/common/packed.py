@@ -0,0 +1,196 @@
+"""
+打包数据集格式
+
+把一个任务的全部样本合并成每个字段一个连续的大文件（例如 points.bin、
+labels.bin），再加一个记录 dtype、形状和每个样本偏移量的 index.json。
+读取时通过 np.memmap 切片拿到样本，同一台机器上的多个 DataLoader worker
+共享操作系统的页缓存，不会各自持有一份拷贝。
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+__all__ = ['PackedWriter', 'PackedArrays']
+
+INDEX_FILE = 'index.json'
+
+
+class PackedWriter:
+    """
+    顺序写入打包数据集
+
+    Args:
+        pack_dir: 输出目录
+        task: 任务名称，写入索引供读取时校验
+        ragged: 每个样本长度可变的字段（按第一维拼接并记录偏移量），
+            其余字段每个样本形状固定
+        meta: 写入索引的附加信息（例如点云金字塔的层级）
+    """
+
+    def __init__(self, pack_dir, task, ragged=(), meta=None):
+        self.pack_dir = Path(pack_dir)
+        self.pack_dir.mkdir(parents=True, exist_ok=True)
+        self.task = task
+        self.ragged = set(ragged)
+        self.meta = meta or {}
+
+        self.names = []
+        self.fields = {}
+        self.offsets = {}
+        self._files = {}
+
+    def add(self, name, arrays):
+        """
+        追加一个样本
+
+        Args:
+            name: 样本名称
+            arrays: {字段名: np.ndarray}
+        """
+        for field, array in arrays.items():
+            array = np.asarray(array)
+            if field not in self.fields:
+                self._open_field(field, array)
+
+            info = self.fields[field]
+            array = np.ascontiguousarray(array, dtype=info['dtype'])
+            sample_shape = list(array.shape[1:] if field in self.ragged else array.shape)
+            if sample_shape != info['sample_shape']:
+                raise ValueError(f"样本 {name} 的字段 {field} 形状 {array.shape} 与之前的样本不一致")
+
+            self._files[field].write(array.tobytes())
+            if field in self.ragged:
+                self.offsets[field].append(self.offsets[field][-1] + len(array))
+
+        self.names.append(name)
+
+    def close(self):
+        """关闭数据文件并写出索引"""
+        for f in self._files.values():
+            f.close()
+
+        num_samples = len(self.names)
+        for field, info in self.fields.items():
+            rows = self.offsets[field][-1] if field in self.ragged else num_samples
+            info['shape'] = [rows] + info['sample_shape']
+
+        index = {
+            'task': self.task,
+            'num_samples': num_samples,
+            'names': self.names,
+            'fields': self.fields,
+            'offsets': self.offsets,
+            'meta': self.meta,
+        }
+        with open(self.pack_dir / INDEX_FILE, 'w') as f:
+            json.dump(index, f)
+
+    def _open_field(self, field, array):
+        sample_shape = array.shape[1:] if field in self.ragged else array.shape
+        self.fields[field] = {
+            'file': f"{field}.bin",
+            'dtype': array.dtype.str,
+            'sample_shape': list(sample_shape),
+            'ragged': field in self.ragged,
+        }
+        if field in self.ragged:
+            self.offsets[field] = [0]
+        self._files[field] = open(self.pack_dir / f"{field}.bin", 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for f in self._files.values():
+                f.close()
+
+
+class PackedArrays:
+    """
+    打包数据集的只读访问
+
+    内存映射在首次访问时才打开，因此对象可以安全地传给 DataLoader worker。
+    返回的数组是写时复制映射上的视图，在转成 tensor 之前不会发生拷贝。
+
+    带点云金字塔的数据（tools/pack_dataset.py --levels）中，逐点字段按层级
+    分别存放为 points_<点数>、labels_<点数>，通过 get 的 level 参数读取。
+    """
+
+    def __init__(self, pack_dir, task=None):
+        self.pack_dir = Path(pack_dir)
+        with open(self.pack_dir / INDEX_FILE, 'r') as f:
+            index = json.load(f)
+
+        if task is not None and index['task'] != task:
+            raise ValueError(f"{pack_dir} 是 {index['task']} 任务的数据，而不是 {task}")
+
+        self.task = index['task']
+        self.names = index['names']
+        self.fields = index['fields']
+        self.offsets = {field: np.asarray(offsets, dtype=np.int64)
+                        for field, offsets in index['offsets'].items()}
+        self.meta = index.get('meta', {})
+        self._arrays = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def levels(self):
+        """点云金字塔各层的点数，没有金字塔时为空列表"""
+        return self.meta.get('levels', [])
+
+    def resolve_level(self, num_points, level=None):
+        """
+        选择读取的金字塔层级
+
+        Args:
+            num_points: 训练使用的采样点数
+            level: 指定层级，默认取不小于 num_points 的最小层级，都不够时取最大层级
+
+        Returns:
+            层级点数，没有金字塔时返回 None
+        """
+        if not self.levels:
+            if level is not None:
+                raise ValueError(f"{self.pack_dir} 不包含点云金字塔")
+            return None
+        if level is not None:
+            if level not in self.levels:
+                raise ValueError(f"{self.pack_dir} 没有 {level} 点的层级，可选: {self.levels}")
+            return level
+        candidates = [l for l in self.levels if l >= num_points]
+        return min(candidates) if candidates else max(self.levels)
+
+    def get(self, field, idx, level=None):
+        """返回第 idx 个样本的字段数据，level 为金字塔层级（逐点字段）"""
+        if level is not None:
+            field = f"{field}_{level}"
+        array = self._array(field)
+        if field in self.offsets:
+            offsets = self.offsets[field]
+            return array[offsets[idx]:offsets[idx + 1]]
+        return array[idx]
+
+    def _array(self, field):
+        if field not in self._arrays:
+            info = self.fields[field]
+            if info['shape'][0] == 0:
+                # 空文件无法内存映射
+                self._arrays[field] = np.zeros(info['shape'], dtype=np.dtype(info['dtype']))
+                return self._arrays[field]
+            self._arrays[field] = np.memmap(self.pack_dir / info['file'],
+                                            dtype=np.dtype(info['dtype']),
+                                            mode='c', shape=tuple(info['shape']))
+        return self._arrays[field]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_arrays'] = {}
+        return state
@@ -0,0 +1,169 @@
+"""
+点云采样与分组算子（PyTorch）
+
+PointNet++ Set Abstraction 层使用的批量最远点采样、基于网格哈希的球查询和
+按索引取点，全部为张量运算，CPU / GPU 通用，可被 torch.jit.trace 追踪。
+"""
+
+import warnings
+
+import torch
+
+
+__all__ = ['farthest_point_sample', 'ball_query', 'index_points']
+
+
+# 3x3x3 邻域网格偏移
+_NEIGHBOR_OFFSETS = torch.stack(torch.meshgrid(
+    torch.arange(-1, 2), torch.arange(-1, 2), torch.arange(-1, 2), indexing='ij'
+), dim=-1).reshape(-1, 3)
+
+
+def index_points(points, idx):
+    """
+    按索引取点
+
+    Args:
+        points: (B, N, C)
+        idx: (B, ...) 每个 batch 内的点索引
+
+    Returns:
+        (B, ..., C)
+    """
+    B = points.shape[0]
+    batch = torch.arange(B, device=points.device).view((B,) + (1,) * (idx.dim() - 1))
+    return points[batch, idx]
+
+
+def _farthest_point_sample(xyz: torch.Tensor, npoint: int, random_start: bool = False) -> torch.Tensor:
+    """
+    批量最远点采样
+
+    每次迭代对整个 batch 的全部点同时更新到已选点集的最小距离，
+    迭代次数为 npoint，与点数 N 无关。脚本化后追踪导出时保留为循环，不会展开。
+
+    Args:
+        xyz: (B, N, 3) 点坐标
+        npoint: 采样点数
+        random_start: 是否随机选择起始点（训练时使用），否则从第 0 个点开始
+
+    Returns:
+        (B, npoint) 采样点索引
+    """
+    B, N = xyz.shape[0], xyz.shape[1]
+    device = xyz.device
+
+    distance = torch.full((B, N), float('inf'), device=device, dtype=xyz.dtype)
+    if random_start:
+        farthest = torch.randint(0, N, (B,), device=device)
+    else:
+        farthest = torch.zeros(B, dtype=torch.long, device=device)
+    batch = torch.arange(B, device=device)
+
+    # 按坐标分量存放 (3, B, N)，逐分量计算距离比 (B, N, 3) 上求和更快
+    points = xyz.permute(2, 0, 1).contiguous()
+    px, py, pz = points[0], points[1], points[2]
+
+    centroids = []
+    for _ in range(npoint):
+        centroids.append(farthest)
+        centroid = xyz[batch, farthest].unsqueeze(-1)  # (B, 3, 1)
+        dx = px - centroid[:, 0]
+        dy = py - centroid[:, 1]
+        dz = pz - centroid[:, 2]
+        distance = torch.minimum(distance, dx * dx + dy * dy + dz * dz)
+        farthest = distance.argmax(dim=-1)
+    return torch.stack(centroids, dim=1)
+
+
+# 新版本 torch 对 torch.jit.script 给出弃用警告，脚本化只为导出时保留循环
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', FutureWarning)
+    farthest_point_sample = torch.jit.script(_farthest_point_sample)
+
+
+def ball_query(xyz, new_xyz, radius, nsample):
+    """
+    球查询：为每个中心点找 radius 范围内的 nsample 个邻居
+
+    把点按边长为 radius 的网格分桶并按桶编号排序，每个中心点只检查所在网格及
+    26 个相邻网格中的点（每个网格最多取 nsample 个候选），计算量与点数 N 无关。
+    不足 nsample 个邻居时用第一个邻居补齐。导出 ONNX 时改用等价的稠密距离实现。
+
+    Args:
+        xyz: (B, N, 3) 全部点
+        new_xyz: (B, S, 3) 中心点
+        radius: 查询半径
+        nsample: 每个中心点的邻居数
+
+    Returns:
+        (B, S, nsample) 邻居点索引
+    """
+    if torch.onnx.is_in_onnx_export():
+        return _ball_query_dense(xyz, new_xyz, radius, nsample)
+
+    B, N, _ = xyz.shape
+    S = new_xyz.shape[1]
+    device = xyz.device
+
+    # 网格坐标，+1 保证相邻网格偏移后仍为非负
+    origin = xyz.amin(dim=1, keepdim=True)
+    cells = torch.floor((xyz - origin) / radius).long() + 1
+    dims = cells.amax(dim=(0, 1)) + 2
+    batch = torch.arange(B, device=device).view(B, 1)
+
+    def cell_key(cells, batch):
+        return ((batch * dims[0] + cells[..., 0]) * dims[1] + cells[..., 1]) * dims[2] + cells[..., 2]
+
+    # 按网格编号排序，同一网格的点连续存放
+    sorted_key, order = cell_key(cells, batch).view(-1).sort()
+
+    # 每个中心点的 27 个相邻网格在排序数组中的区间
+    query_cells = torch.floor((new_xyz - origin) / radius).long() + 1
+    query_cells = query_cells.unsqueeze(2) + _NEIGHBOR_OFFSETS.to(device)  # (B, S, 27, 3)
+    query_cells = torch.minimum(query_cells.clamp(min=0), dims - 1)
+    query_key = cell_key(query_cells, batch.view(B, 1, 1))
+    start = torch.searchsorted(sorted_key, query_key)
+    end = torch.searchsorted(sorted_key, query_key, right=True)
+
+    # 每个相邻网格最多取 nsample 个候选点；点稀疏时按实际最大网格点数截断，
+    # 追踪导出时保持固定形状
+    max_per_cell = nsample
+    if not torch.jit.is_tracing():
+        max_per_cell = max(1, min(nsample, int((end - start).max())))
+    slots = start.unsqueeze(-1) + torch.arange(max_per_cell, device=device)  # (B, S, 27, max_per_cell)
+    valid = (slots < end.unsqueeze(-1)).view(B, S, -1)
+    slots = slots.clamp(max=B * N - 1).view(B, S, -1)
+
+    # 在排序后的坐标上计算距离，只对选中的邻居映射回原始索引
+    sorted_xyz = xyz.reshape(-1, 3)[order]
+    dist = ((sorted_xyz[slots] - new_xyz.unsqueeze(2)) ** 2).sum(dim=-1)
+    valid = valid & (dist <= radius ** 2)
+
+    # 按候选顺序取前 nsample 个有效邻居，多余的写入末尾丢弃位
+    position = valid.cumsum(dim=-1) - 1
+    position = torch.where(valid & (position < nsample), position, nsample)
+    selected = torch.zeros(B, S, nsample + 1, dtype=slots.dtype, device=device)
+    selected = selected.scatter(-1, position, slots)[..., :nsample]
+    idx = order[selected]
+
+    # 不足 nsample 时用第一个邻居补齐（中心点来自 xyz 时至少能找到自身）
+    found = torch.arange(nsample, device=device) < valid.sum(dim=-1, keepdim=True)
+    idx = torch.where(found, idx, idx[..., :1])
+    return idx - batch.unsqueeze(-1) * N
+
+
+def _ball_query_dense(xyz, new_xyz, radius, nsample):
+    """
+    稠密实现：计算中心点到全部点的距离，只用 ONNX 支持的算子
+
+    半径外的点记为哨兵值 N。N 必须由张量运算得到：写成 Python 数值会在追踪时
+    固定为导出示例的点数，点数更多的输入会把半径外的点当作邻居返回。
+    """
+    dist = torch.cdist(new_xyz, xyz) ** 2  # (B, S, N)
+    arange = torch.arange(xyz.shape[1], device=xyz.device).to(dist.dtype)
+    sentinel = arange[-1:] + 1
+    rank = torch.where(dist <= radius ** 2, arange, sentinel)
+    idx = torch.topk(rank, nsample, dim=-1, largest=False)[0]
+    idx = torch.where(idx < sentinel, idx, idx[..., :1])
+    return torch.minimum(idx, sentinel - 1).long()
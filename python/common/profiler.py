@@ -0,0 +1,147 @@
+"""
+训练循环的分阶段计时
+
+统计每一步中等待数据、拷贝到设备、前向、反向、优化器更新和 loss.item()
+同步各自的耗时，以及每秒样本数 / 点数，按 epoch 汇总后追加写入 JSON lines 文件。
+可选地在指定步数区间用 torch.profiler 导出 Chrome trace（chrome://tracing 打开）。
+
+CUDA 上的算子是异步执行的，默认不额外同步，GPU 计算时间会体现在下一个需要
+同步的阶段（通常是 sync）；cuda_sync=True 时每个阶段结束都同步，各阶段耗时
+准确但会降低吞吐。
+"""
+
+import contextlib
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import torch
+
+
+__all__ = ['StepProfiler']
+
+
+class StepProfiler:
+    """
+    分阶段计时器
+
+    Args:
+        device: 训练设备
+        enabled: 关闭时所有计时都是空操作
+        cuda_sync: 每个阶段结束时是否同步 CUDA
+        trace_steps: (start, end)，在该步数区间内用 torch.profiler 记录，None 表示不记录
+        trace_path: Chrome trace 输出路径
+        point_axis: 三维模型输入中点（面）所在的维度，(B, N, 3) 点云为 1，
+            (B, C, N) 逐面特征（MeshSegNet）为 -1
+    """
+
+    def __init__(self, device, enabled=True, cuda_sync=False, trace_steps=None, trace_path=None,
+                 point_axis=1):
+        self.device = torch.device(device)
+        self.enabled = enabled
+        self.cuda_sync = cuda_sync and self.device.type == 'cuda'
+        self.trace_steps = trace_steps
+        self.trace_path = trace_path
+        self.point_axis = point_axis
+
+        self.times = defaultdict(float)
+        self.steps = 0
+        self.samples = 0
+        self.points = 0
+        self._start = None
+        self._torch_profiler = None
+
+    def iterate(self, loader):
+        """包装数据迭代器，统计等待下一个批次的时间"""
+        self._start = time.perf_counter()
+        iterator = iter(loader)
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                return
+            if self.enabled:
+                self.times['data_wait'] += time.perf_counter() - start
+            yield batch
+
+    @contextlib.contextmanager
+    def section(self, name):
+        """统计一个阶段的耗时"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.cuda_sync:
+                torch.cuda.synchronize(self.device)
+            self.times[name] += time.perf_counter() - start
+
+    def step(self, inputs=None):
+        """
+        结束一步
+
+        Args:
+            inputs: 本步的模型输入，三维输入时同时统计点数（沿 point_axis）
+        """
+        self.steps += 1
+        if torch.is_tensor(inputs):
+            self.samples += inputs.shape[0]
+            if inputs.dim() == 3:
+                self.points += inputs.shape[0] * inputs.shape[self.point_axis]
+        if self._torch_profiler is not None:
+            self._torch_profiler.step()
+
+    @contextlib.contextmanager
+    def trace(self):
+        """在 trace_steps 区间内运行 torch.profiler 并导出 Chrome trace"""
+        if not (self.enabled and self.trace_steps and self.trace_path):
+            yield
+            return
+
+        start, end = self.trace_steps
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if self.device.type == 'cuda':
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        schedule = torch.profiler.schedule(wait=max(start - 1, 0), warmup=min(start, 1),
+                                           active=max(end - start, 1), repeat=1)
+        trace_path = str(self.trace_path)
+
+        with torch.profiler.profile(activities=activities, schedule=schedule,
+                                    on_trace_ready=lambda p: p.export_chrome_trace(trace_path),
+                                    record_shapes=True) as profiler:
+            self._torch_profiler = profiler
+            try:
+                yield
+            finally:
+                self._torch_profiler = None
+
+    def summary(self):
+        """汇总本 epoch 的计时"""
+        elapsed = time.perf_counter() - self._start if self._start else 0.0
+        summary = {
+            'steps': self.steps,
+            'samples': self.samples,
+            'elapsed_s': elapsed,
+            'samples_per_s': self.samples / elapsed if elapsed > 0 else 0.0,
+            'time_s': dict(self.times),
+            'mean_ms': {name: seconds / max(self.steps, 1) * 1000
+                        for name, seconds in self.times.items()},
+        }
+        if self.points:
+            summary['points'] = self.points
+            summary['points_per_s'] = self.points / elapsed if elapsed > 0 else 0.0
+        return summary
+
+    def write(self, path, **extra):
+        """把汇总追加写入 JSON lines 文件"""
+        if not self.enabled:
+            return
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = dict(extra, **self.summary())
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
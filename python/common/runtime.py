@@ -0,0 +1,106 @@
+"""
+导出模型的运行时
+
+加载 tools/export_model.py 导出的冻结 TorchScript（.pt）或 ONNX（.onnx）模型，
+不依赖训练代码和模型类定义。两种后端都以 torch.Tensor 输入输出，
+可以直接替换 nn.Module 用在现有推理代码里。
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import torch
+
+
+__all__ = ['ExportedModel', 'load_exported_model', 'META_FILE']
+
+
+# TorchScript 文件内 / ONNX 旁路文件中记录任务信息的文件名
+META_FILE = 'meta.json'
+
+
+def load_exported_model(model_path, device='cpu', backend=None):
+    """
+    加载导出模型
+
+    Args:
+        model_path: .pt（TorchScript）或 .onnx 文件
+        device: 计算设备，ONNX 后端在 CUDA 可用且安装了 GPU 版 onnxruntime 时使用 GPU
+        backend: 'torchscript' / 'onnx'，默认按扩展名判断
+
+    Returns:
+        ExportedModel
+    """
+    return ExportedModel(model_path, device, backend)
+
+
+class ExportedModel:
+    """
+    导出模型的统一封装
+
+    Args:
+        model_path: .pt（TorchScript）或 .onnx 文件
+        device: 计算设备
+        backend: 'torchscript' / 'onnx'，默认按扩展名判断
+
+    属性 task / num_classes / num_points 等来自导出时写入的元信息。
+    """
+
+    def __init__(self, model_path, device='cpu', backend=None):
+        self.model_path = Path(model_path)
+        self.device = torch.device(device)
+        if backend is None:
+            backend = 'onnx' if self.model_path.suffix == '.onnx' else 'torchscript'
+        self.backend = backend
+
+        if backend == 'onnx':
+            self.meta = self._load_onnx()
+        elif backend == 'torchscript':
+            self.meta = self._load_torchscript()
+        else:
+            raise ValueError(f"未知后端: {backend}")
+
+        for key, value in self.meta.items():
+            setattr(self, key, value)
+
+    def _load_torchscript(self):
+        extra_files = {META_FILE: ''}
+        self.module = torch.jit.load(str(self.model_path), map_location=self.device,
+                                     _extra_files=extra_files)
+        self.module.eval()
+        return json.loads(extra_files[META_FILE] or '{}')
+
+    def _load_onnx(self):
+        import onnxruntime as ort
+
+        providers = ['CPUExecutionProvider']
+        if self.device.type == 'cuda' and 'CUDAExecutionProvider' in ort.get_available_providers():
+            providers.insert(0, 'CUDAExecutionProvider')
+        self.session = ort.InferenceSession(str(self.model_path), providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+        meta_path = self.model_path.with_suffix('.json')
+        if meta_path.exists():
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def eval(self):
+        """与 nn.Module 接口保持一致，导出模型始终处于推理模式"""
+        return self
+
+    def to(self, device):
+        if self.backend == 'torchscript':
+            self.module.to(device)
+        self.device = torch.device(device)
+        return self
+
+    def __call__(self, inputs):
+        if self.backend == 'torchscript':
+            return self.module(inputs.to(self.device))
+
+        array = np.ascontiguousarray(inputs.detach().cpu().numpy(), dtype=np.float32)
+        outputs = [torch.from_numpy(output).to(self.device)
+                   for output in self.session.run(None, {self.input_name: array})]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
@@ -4,9 +4,13 @@
 
 import numpy as np
 import logging
+import json
+from functools import partial
 from pathlib import Path
 import sys
 
+from .mesh_io import read_mesh, write_mesh
+
 
 def setup_logger(name, log_dir='logs', level=logging.INFO):
     """设置日志"""
@@ -37,38 +41,66 @@ def setup_logger(name, log_dir='logs', level=logging.INFO):
     return logger
 
 
-def load_mesh(file_path):
-    """加载网格文件"""
-    vertices = []
-    faces = []
-    
+def load_mesh(file_path, load_faces=True, cache=None):
+    """
+    加载网格文件（OBJ 或 PLY）
+
+    Args:
+        file_path: 网格文件路径
+        load_faces: 是否读取面，只需要点云时可设为 False
+        cache: 可选的 MeshCache，命中时直接读取二进制缓存
+
+    Returns:
+        vertices: (N, 3) float32 顶点
+        faces: (F, 3) int32 面
+    """
+    if cache is None:
+        return read_mesh(file_path, load_faces=load_faces)
+
+    arrays = cache.load(file_path, partial(_load_mesh_arrays, load_faces=load_faces),
+                        kind='mesh' if load_faces else 'points')
+    return arrays['vertices'], arrays['faces']
+
+
+def _load_mesh_arrays(file_path, load_faces):
+    vertices, faces = read_mesh(file_path, load_faces=load_faces)
+    return {'vertices': vertices, 'faces': faces}
+
+
+def load_json_arrays(file_path, fields, cache=None):
+    """
+    从 JSON 标注文件读取数组字段
+
+    Args:
+        file_path: JSON 文件路径
+        fields: {字段名: dtype}
+        cache: 可选的 MeshCache
+
+    Returns:
+        dict[str, np.ndarray]: 每个字段对应的数组
+    """
+    if cache is None:
+        return _load_json_arrays(file_path, fields)
+
+    kind = 'json:' + ','.join(f"{name}={np.dtype(dtype).str}"
+                              for name, dtype in fields.items())
+    return cache.load(file_path, partial(_load_json_arrays, fields=fields), kind=kind)
+
+
+def _load_json_arrays(file_path, fields):
     with open(file_path, 'r') as f:
-        for line in f:
-            if line.startswith('v '):
-                parts = line.strip().split()
-                vertex = [float(parts[1]), float(parts[2]), float(parts[3])]
-                vertices.append(vertex)
-            elif line.startswith('f '):
-                parts = line.strip().split()
-                face = [int(p.split('/')[0]) - 1 for p in parts[1:]]
-                faces.append(face)
-    
-    return np.array(vertices, dtype=np.float32), np.array(faces, dtype=np.int32)
+        data = json.load(f)
+    return {name: np.array(data[name], dtype=dtype) for name, dtype in fields.items()}
 
 
 def save_mesh(file_path, vertices, faces, labels=None):
-    """保存网格文件"""
-    with open(file_path, 'w') as f:
-        # 写入顶点
-        for i, v in enumerate(vertices):
-            if labels is not None:
-                f.write(f"v {v[0]} {v[1]} {v[2]} # label: {labels[i]}\n")
-            else:
-                f.write(f"v {v[0]} {v[1]} {v[2]}\n")
-        
-        # 写入面
-        for face in faces:
-            f.write(f"f {face[0]+1} {face[1]+1} {face[2]+1}\n")
+    """
+    保存网格文件
+
+    扩展名为 .ply 时写出二进制 PLY（标签为顶点 label 属性），
+    否则写出文本 OBJ（标签以 `# label:` 注释附在顶点行尾）。
+    """
+    write_mesh(file_path, vertices, faces, labels=labels)
 
 
 def visualize_segmentation(vertices, labels):
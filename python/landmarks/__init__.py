@@ -2,7 +2,8 @@
 地标点检测模块
 """
 
-from .model import LandmarkDetectionModel, HeatmapBasedLandmarkModel
-from .dataset import LandmarkDataset
+from .model import LandmarkDetectionModel, HeatmapBasedLandmarkModel, LandmarkLoss
+from .dataset import LandmarkDataset, PackedLandmarkDataset
 
-__all__ = ['LandmarkDetectionModel', 'HeatmapBasedLandmarkModel', 'LandmarkDataset']
+__all__ = ['LandmarkDetectionModel', 'HeatmapBasedLandmarkModel', 'LandmarkLoss', 'LandmarkDataset',
+           'PackedLandmarkDataset']
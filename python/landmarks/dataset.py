@@ -6,18 +6,27 @@ import torch
 from torch.utils.data import Dataset
 import numpy as np
 from pathlib import Path
-import json
+
+from common.utils import load_mesh, load_json_arrays
+from common.mesh_cache import MeshCache
+from common.packed import PackedArrays
 
 
 class LandmarkDataset(Dataset):
     """
     地标点检测数据集
+    
+    点云和地标点平移到质心并缩放到单位球。return_scale=True 时额外返回缩放系数，
+    验证时用它把误差换算回原始单位（mm）。
     """
     
-    def __init__(self, data_path, num_points=2048, augment=False):
+    def __init__(self, data_path, num_points=2048, augment=False,
+                 cache_dir=None, cache_max_size_gb=None, return_scale=False):
         self.data_path = Path(data_path)
         self.num_points = num_points
         self.augment = augment
+        self.return_scale = return_scale
+        self.cache = MeshCache(cache_dir, cache_max_size_gb) if cache_dir else None
         
         self.samples = self._load_samples()
     
@@ -30,7 +39,7 @@ class LandmarkDataset(Dataset):
         if not scan_dir.exists():
             return samples
         
-        for scan_file in scan_dir.glob('*.obj'):
+        for scan_file in sorted(scan_dir.glob('*.obj')) + sorted(scan_dir.glob('*.ply')):
             landmark_file = landmark_dir / f"{scan_file.stem}.json"
             if landmark_file.exists():
                 samples.append({
@@ -44,13 +53,8 @@ class LandmarkDataset(Dataset):
         return len(self.samples)
     
     def __getitem__(self, idx):
-        sample = self.samples[idx]
-        
-        # 加载点云
-        points = self._load_points(sample['scan'])
-        
-        # 加载地标点
-        landmarks = self._load_landmarks(sample['landmarks'])
+        # 加载点云和地标点
+        points, landmarks = self.load_raw(idx)
         
         # 采样
         if len(points) > self.num_points:
@@ -65,9 +69,9 @@ class LandmarkDataset(Dataset):
         points = points - centroid
         landmarks = landmarks - centroid
         
-        max_dist = np.max(np.linalg.norm(points, axis=1))
-        points = points / (max_dist + 1e-8)
-        landmarks = landmarks / (max_dist + 1e-8)
+        max_dist = np.max(np.linalg.norm(points, axis=1)) + 1e-8
+        points = points / max_dist
+        landmarks = landmarks / max_dist
         
         # 数据增强
         if self.augment:
@@ -76,23 +80,24 @@ class LandmarkDataset(Dataset):
         points = torch.from_numpy(points).float()
         landmarks = torch.from_numpy(landmarks).float()
         
+        if self.return_scale:
+            return points, landmarks, torch.tensor(max_dist, dtype=torch.float32)
+        return points, landmarks
+    
+    def load_raw(self, idx):
+        """读取原始点云和地标点（未采样、未归一化）"""
+        sample = self.samples[idx]
+        points = self._load_points(sample['scan'])
+        landmarks = self._load_landmarks(sample['landmarks'])
         return points, landmarks
     
     def _load_points(self, scan_path):
-        vertices = []
-        with open(scan_path, 'r') as f:
-            for line in f:
-                if line.startswith('v '):
-                    parts = line.strip().split()
-                    vertex = [float(parts[1]), float(parts[2]), float(parts[3])]
-                    vertices.append(vertex)
-        return np.array(vertices, dtype=np.float32)
+        vertices, _ = load_mesh(scan_path, load_faces=False, cache=self.cache)
+        return vertices
     
     def _load_landmarks(self, landmark_path):
-        with open(landmark_path, 'r') as f:
-            data = json.load(f)
-        landmarks = np.array(data['landmarks'], dtype=np.float32)
-        return landmarks
+        return load_json_arrays(landmark_path, {'landmarks': np.float32},
+                                cache=self.cache)['landmarks']
     
     def _augment(self, points, landmarks):
         # 随机旋转
@@ -107,3 +112,22 @@ class LandmarkDataset(Dataset):
             landmarks = landmarks @ rotation_matrix.T
         
         return points, landmarks
+
+
+class PackedLandmarkDataset(LandmarkDataset):
+    """
+    从打包分片读取的地标点检测数据集
+    """
+    
+    def __init__(self, data_path, num_points=2048, augment=False, level=None, return_scale=False):
+        self.requested_level = level
+        super().__init__(data_path, num_points=num_points, augment=augment, return_scale=return_scale)
+    
+    def _load_samples(self):
+        self.pack = PackedArrays(self.data_path, task='landmarks')
+        # 点云金字塔只读取一个层级，默认取不小于 num_points 的最小层级
+        self.level = self.pack.resolve_level(self.num_points, self.requested_level)
+        return self.pack.names
+    
+    def load_raw(self, idx):
+        return self.pack.get('points', idx, self.level), self.pack.get('landmarks', idx)
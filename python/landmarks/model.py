@@ -154,3 +154,16 @@ class HeatmapBasedLandmarkModel(nn.Module):
         heatmaps = torch.sigmoid(self.out(dec1))
         
         return heatmaps
+
+
+class LandmarkLoss(nn.Module):
+    """
+    地标点坐标 MSE 损失
+    
+    验证集返回缩放系数时 targets 为 (landmarks, scale)，scale 只用于指标换算，损失忽略它。
+    """
+    
+    def forward(self, outputs, targets):
+        if isinstance(targets, (tuple, list)):
+            targets = targets[0]
+        return F.mse_loss(outputs, targets)
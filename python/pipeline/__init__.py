@@ -0,0 +1,7 @@
+"""
+整牙弓推理流水线
+"""
+
+from .arch import ArchPipeline
+
+__all__ = ['ArchPipeline']
@@ -0,0 +1,154 @@
+"""
+整牙弓推理流水线：分割 → 拆分单颗牙齿 → 批量牙轴 / 地标点检测
+"""
+
+import contextlib
+import time
+
+import numpy as np
+import torch
+
+from common.utils import load_mesh
+from common.geometry import group_by_label, sample_groups
+from segmentation.inference import predict_vertices
+
+
+__all__ = ['ArchPipeline']
+
+
+class ArchPipeline:
+    """
+    整牙弓推理
+    
+    网格只读取一次；分割得到每个顶点的牙齿标签后，用一次排序把所有牙齿的顶点分组、
+    采样并归一化成 (T, num_points, 3) 的批次，牙轴和地标点模型对整个牙弓只做一次前向。
+    提供 multitask_model（tooth_multitask.ToothMultiTaskModel）时用共享主干同时得到两者。
+    
+    Args:
+        segmentation_model: 分割模型（检查点构建的模型或 common.runtime 导出模型）
+        device: 计算设备
+        landmark_model: 地标点模型，None 表示不检测地标点
+        axis_model: 牙轴模型，None 表示不检测牙轴
+        multitask_model: 多任务模型，给出时忽略 landmark_model / axis_model
+        seg_points: 分割模型输入点数
+        tooth_points: 单颗牙齿模型输入点数
+        knn: 分割标签传播到全部顶点时的近邻数
+        min_tooth_points: 顶点数少于该值的标签视为分割噪声，不输出
+        background_labels: 不属于牙齿的标签
+        seed: 随机种子，分割采样点和牙齿采样共用；种子和处理顺序相同时结果可复现
+    """
+    
+    def __init__(self, segmentation_model, device, landmark_model=None, axis_model=None,
+                 multitask_model=None, seg_points=10000, tooth_points=2048, knn=1,
+                 min_tooth_points=100, background_labels=(0,), seed=None):
+        self.segmentation_model = segmentation_model
+        self.device = device
+        self.landmark_model = landmark_model
+        self.axis_model = axis_model
+        self.multitask_model = multitask_model
+        self.seg_points = seg_points
+        self.tooth_points = tooth_points
+        self.knn = knn
+        self.min_tooth_points = min_tooth_points
+        self.background_labels = tuple(background_labels)
+        self.rng = np.random.default_rng(seed)
+    
+    @contextlib.contextmanager
+    def _stage(self, timings, name):
+        """记录一个阶段的耗时（毫秒），CUDA 上先同步"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.device.type == 'cuda':
+                torch.cuda.synchronize(self.device)
+            timings[name] = (time.perf_counter() - start) * 1000
+    
+    def process_file(self, path):
+        """读取网格并运行整条流水线，返回结果字典（见 run）"""
+        timings = {}
+        with self._stage(timings, 'load_ms'):
+            vertices, _ = load_mesh(str(path), load_faces=False)
+        result = self.run(vertices, timings)
+        result['file'] = str(path)
+        return result
+    
+    def run(self, vertices, timings=None):
+        """
+        Args:
+            vertices: (N, 3) 牙弓顶点
+            timings: 已有的阶段耗时（例如 load_ms），新的阶段追加在后面，total_ms 包含 load_ms
+        
+        Returns:
+            dict: num_vertices、labels（每个顶点的标签，np.ndarray）、
+                teeth（每颗牙齿的标签、顶点数、地标点、牙轴）、timings（各阶段毫秒数）
+        """
+        timings = {} if timings is None else timings
+        start = time.perf_counter()
+        vertices = np.asarray(vertices, dtype=np.float32)
+        
+        with self._stage(timings, 'segmentation_ms'):
+            labels = predict_vertices(self.segmentation_model, vertices, self.seg_points,
+                                      self.device, k=self.knn, rng=self.rng)
+        
+        with self._stage(timings, 'split_ms'):
+            teeth, points, centroid, scale = self._split_teeth(vertices, labels)
+        
+        with self._stage(timings, 'tooth_inference_ms'):
+            outputs = self._predict_teeth(points)
+        
+        # 还原到牙弓坐标系
+        if 'landmarks' in outputs:
+            outputs['landmarks'] = outputs['landmarks'] * scale[:, None, None] + centroid[:, None]
+        if 'origin' in outputs:
+            outputs['origin'] = outputs['origin'] * scale[:, None] + centroid
+        for i, tooth in enumerate(teeth):
+            for key, value in outputs.items():
+                tooth[key] = value[i].tolist()
+        
+        timings['total_ms'] = (time.perf_counter() - start) * 1000 + timings.get('load_ms', 0.0)
+        return {'num_vertices': len(vertices), 'labels': labels, 'teeth': teeth, 'timings': timings}
+    
+    def _split_teeth(self, vertices, labels):
+        """
+        把所有牙齿的顶点分组、采样并归一化为一个批次
+        
+        Returns:
+            teeth: 每颗牙齿的 {'label', 'num_vertices'}
+            points: (T, tooth_points, 3) 归一化后的点云
+            centroid: (T, 3) 各牙齿的质心
+            scale: (T,) 各牙齿的缩放系数
+        """
+        unique, order, starts, counts = group_by_label(labels, ignore=self.background_labels,
+                                                       shuffle=True, rng=self.rng)
+        keep = counts >= self.min_tooth_points
+        unique, starts, counts = unique[keep], starts[keep], counts[keep]
+        teeth = [{'label': int(label), 'num_vertices': int(count)}
+                 for label, count in zip(unique, counts)]
+        if not teeth:
+            return teeth, np.zeros((0, self.tooth_points, 3), dtype=np.float32), None, None
+        
+        # 与单颗牙齿数据集相同的归一化：平移到质心并缩放到单位球
+        points = vertices[sample_groups(order, starts, counts, self.tooth_points)]
+        centroid = points.mean(axis=1)
+        points = points - centroid[:, None]
+        scale = np.linalg.norm(points, axis=2).max(axis=1) + 1e-8
+        points = points / scale[:, None, None]
+        return teeth, points.astype(np.float32), centroid, scale
+    
+    def _predict_teeth(self, points):
+        """整个牙弓的牙齿一次前向，返回 {'landmarks', 'origin', 'direction'} 中可用的项"""
+        outputs = {}
+        if len(points) == 0:
+            return outputs
+        with torch.no_grad():
+            batch = torch.from_numpy(points).to(self.device)
+            if self.multitask_model is not None:
+                landmarks, origin, direction = self.multitask_model(batch)
+                outputs.update(landmarks=landmarks, origin=origin, direction=direction)
+            else:
+                if self.landmark_model is not None:
+                    outputs['landmarks'] = self.landmark_model(batch)
+                if self.axis_model is not None:
+                    outputs['origin'], outputs['direction'] = self.axis_model(batch)
+        return {key: value.float().cpu().numpy() for key, value in outputs.items()}
@@ -0,0 +1,121 @@
+"""
+整牙弓推理：分割 → 拆分单颗牙齿 → 批量牙轴 / 地标点检测，结果写入一个 JSON 文件
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import torch
+
+from pipeline.arch import ArchPipeline
+from serving.models import load_model
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='整牙弓推理流水线')
+    parser.add_argument('--segmentation_model', type=str, required=True,
+                        help='分割模型检查点')
+    parser.add_argument('--landmark_model', type=str, default=None,
+                        help='地标点模型检查点')
+    parser.add_argument('--axis_model', type=str, default=None,
+                        help='牙轴模型检查点')
+    parser.add_argument('--multitask_model', type=str, default=None,
+                        help='地标点 + 牙轴多任务模型检查点（给出时不使用 --landmark_model / --axis_model）')
+    parser.add_argument('--input', type=str, default=None,
+                        help='输入牙弓网格')
+    parser.add_argument('--input_dir', type=str, default=None,
+                        help='输入文件夹（批量处理）')
+    parser.add_argument('--output', type=str, default='arch_result.json',
+                        help='单个文件的结果路径')
+    parser.add_argument('--output_dir', type=str, default='results',
+                        help='批量处理时的结果文件夹，每个网格一个 JSON')
+    parser.add_argument('--seg_points', type=int, default=10000,
+                        help='分割模型采样点数')
+    parser.add_argument('--tooth_points', type=int, default=2048,
+                        help='每颗牙齿的采样点数')
+    parser.add_argument('--knn', type=int, default=1,
+                        help='分割标签传播到全部顶点时的近邻数')
+    parser.add_argument('--min_tooth_points', type=int, default=100,
+                        help='顶点数少于该值的标签视为分割噪声')
+    parser.add_argument('--save_labels', action='store_true',
+                        help='结果中包含每个顶点的分割标签')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='分割和牙齿采样的随机种子')
+    parser.add_argument('--device', type=str, default='cuda',
+                        help='计算设备')
+    return parser.parse_args()
+
+
+def build_pipeline(args, device):
+    """按命令行参数加载模型并构建流水线"""
+    models = {'segmentation_model': load_model('segmentation', args.segmentation_model, device)}
+    if args.multitask_model:
+        models['multitask_model'] = load_model('tooth_multitask', args.multitask_model, device)
+    else:
+        if args.landmark_model:
+            models['landmark_model'] = load_model('landmarks', args.landmark_model, device)
+        if args.axis_model:
+            models['axis_model'] = load_model('tooth_axis', args.axis_model, device)
+    return ArchPipeline(device=device, seg_points=args.seg_points, tooth_points=args.tooth_points,
+                        knn=args.knn, min_tooth_points=args.min_tooth_points, seed=args.seed, **models)
+
+
+def save_result(result, output_file, save_labels=False):
+    """写出结构化结果（JSON）"""
+    labels = result.pop('labels')
+    if save_labels:
+        result['labels'] = labels.tolist()
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+def format_timings(timings):
+    return ", ".join(f"{key[:-3]} {value:.1f} ms" for key, value in timings.items())
+
+
+def main():
+    args = parse_args()
+    
+    device = torch.device(args.device if torch.cuda.is_available() else 'cpu')
+    print(f"使用设备: {device}")
+    pipeline = build_pipeline(args, device)
+    
+    if args.input:
+        result = pipeline.process_file(args.input)
+        print(f"{args.input}: {len(result['teeth'])} 颗牙齿，{format_timings(result['timings'])}")
+        save_result(result, args.output, args.save_labels)
+        print(f"结果已保存到: {args.output}")
+    
+    elif args.input_dir:
+        input_path = Path(args.input_dir)
+        output_path = Path(args.output_dir)
+        files = sorted(input_path.glob('*.obj')) + sorted(input_path.glob('*.ply'))
+        print(f"找到 {len(files)} 个文件")
+        
+        start = time.perf_counter()
+        totals = {}
+        for file in files:
+            result = pipeline.process_file(file)
+            print(f"{file.name}: {len(result['teeth'])} 颗牙齿，{format_timings(result['timings'])}")
+            for key, value in result['timings'].items():
+                totals[key] = totals.get(key, 0.0) + value
+            save_result(result, output_path / f"{file.stem}.json", args.save_labels)
+        
+        elapsed = time.perf_counter() - start
+        print(f"共处理 {len(files)} 个文件，用时 {elapsed:.2f}s")
+        if files:
+            print("平均每个文件: " + format_timings({key: value / len(files) for key, value in totals.items()}))
+        print(f"所有结果已保存到: {args.output_dir}")
+    
+    else:
+        print("请指定 --input 或 --input_dir")
+
+
+if __name__ == '__main__':
+    main()
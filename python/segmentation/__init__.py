@@ -2,7 +2,9 @@
 牙齿分割模块
 """
 
-from .model import SegmentationModel, MeshSegNet
-from .dataset import ToothSegmentationDataset
+from .model import SegmentationModel, MeshSegNet, GraphConv
+from .dataset import (ToothSegmentationDataset, PackedToothSegmentationDataset, MeshSegDataset,
+                      collate_mesh_graphs)
 
-__all__ = ['SegmentationModel', 'MeshSegNet', 'ToothSegmentationDataset']
+__all__ = ['SegmentationModel', 'MeshSegNet', 'GraphConv', 'ToothSegmentationDataset',
+           'PackedToothSegmentationDataset', 'MeshSegDataset', 'collate_mesh_graphs']
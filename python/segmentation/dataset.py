@@ -6,7 +6,12 @@ import torch
 from torch.utils.data import Dataset
 import numpy as np
 from pathlib import Path
-import json
+
+from common.utils import load_mesh, load_json_arrays
+from common.mesh_cache import MeshCache
+from common.mesh_features import (load_mesh_features, face_labels_from_vertices, adjacency_matrix,
+                                  sample_face_patches, block_diagonal_adjacency)
+from common.packed import PackedArrays
 
 
 class ToothSegmentationDataset(Dataset):
@@ -14,11 +19,15 @@ class ToothSegmentationDataset(Dataset):
     牙齿分割数据集
     """
     
-    def __init__(self, data_path, num_points=10000, augment=False):
+    def __init__(self, data_path, num_points=10000, augment=False,
+                 cache_dir=None, cache_max_size_gb=None):
         self.data_path = Path(data_path)
         self.num_points = num_points
         self.augment = augment
         
+        # 二进制缓存：首个 epoch 解析后写入 .npy，之后直接内存映射读取
+        self.cache = MeshCache(cache_dir, cache_max_size_gb) if cache_dir else None
+        
         # 加载数据列表
         self.samples = self._load_samples()
     
@@ -48,13 +57,8 @@ class ToothSegmentationDataset(Dataset):
         return len(self.samples)
     
     def __getitem__(self, idx):
-        sample = self.samples[idx]
-        
-        # 加载点云
-        points = self._load_points(sample['scan'])
-        
-        # 加载标签
-        labels = self._load_labels(sample['label'], len(points))
+        # 加载点云和标签
+        points, labels = self.load_raw(idx)
         
         # 采样固定数量的点
         if len(points) > self.num_points:
@@ -77,27 +81,23 @@ class ToothSegmentationDataset(Dataset):
         
         return points, labels
     
+    def load_raw(self, idx):
+        """读取原始点云和标签（未采样、未增强）"""
+        sample = self.samples[idx]
+        points = self._load_points(sample['scan'])
+        labels = self._load_labels(sample['label'], len(points))
+        return points, labels
+    
     def _load_points(self, scan_path):
         """加载点云数据"""
-        # 简化实现：从 obj 文件读取顶点
-        vertices = []
-        
-        with open(scan_path, 'r') as f:
-            for line in f:
-                if line.startswith('v '):
-                    parts = line.strip().split()
-                    vertex = [float(parts[1]), float(parts[2]), float(parts[3])]
-                    vertices.append(vertex)
-        
-        return np.array(vertices, dtype=np.float32)
+        vertices, _ = load_mesh(scan_path, load_faces=False, cache=self.cache)
+        return vertices
     
     def _load_labels(self, label_path, num_points):
         """加载标签数据"""
         try:
-            with open(label_path, 'r') as f:
-                label_data = json.load(f)
-            
-            labels = np.array(label_data.get('labels', []), dtype=np.int64)
+            labels = load_json_arrays(label_path, {'labels': np.int64},
+                                      cache=self.cache)['labels']
             
             # 如果标签数量不匹配，返回全0标签
             if len(labels) != num_points:
@@ -139,3 +139,150 @@ class ToothSegmentationDataset(Dataset):
         points = points / (max_dist + 1e-8)
         
         return points
+
+
+class PackedToothSegmentationDataset(ToothSegmentationDataset):
+    """
+    从打包分片读取的牙齿分割数据集
+
+    data_path 为 tools/pack_dataset.py 生成的目录，样本通过内存映射切片读取。
+    带点云金字塔时只读取 level 指定的层级（默认取不小于 num_points 的最小层级）。
+    """
+    
+    def __init__(self, data_path, num_points=10000, augment=False, level=None):
+        self.requested_level = level
+        super().__init__(data_path, num_points=num_points, augment=augment)
+    
+    def _load_samples(self):
+        self.pack = PackedArrays(self.data_path, task='segmentation')
+        # 点云金字塔只读取一个层级，默认取不小于 num_points 的最小层级
+        self.level = self.pack.resolve_level(self.num_points, self.requested_level)
+        return self.pack.names
+    
+    def load_raw(self, idx):
+        return (self.pack.get('points', idx, self.level),
+                self.pack.get('labels', idx, self.level))
+
+
+class MeshSegDataset(ToothSegmentationDataset):
+    """
+    MeshSegNet 网格分割数据集
+    
+    目录结构与 ToothSegmentationDataset 相同（scans/ + labels/），扫描必须包含面。
+    每个样本为 (features, labels)：features 为 (15, num_faces) 逐面特征（见 common.mesh_features），
+    labels 为 (num_faces,) 逐面标签。特征和面邻接在第一次读取时计算并写入 cache_dir，
+    之后每个 epoch 只做面采样和增强。标签文件可以是逐顶点标签（按面的多数顶点转换）或逐面标签。
+    num_faces 为 None 时返回全部面（样本面数不同）。
+    
+    adjacency 为 'edge' / 'vertex' 时样本为 (features, labels, adjacency)，adjacency 为所选面之间的
+    scipy CSR 邻接，需要用 collate_mesh_graphs 组成批次。此时不再独立随机采样面（诱导子图会去掉
+    大部分邻居），而是从 face_patches 个种子面沿邻接扩张出连通面片（见 sample_face_patches），
+    面数少于 num_faces 的网格使用全部面。
+    """
+    
+    def __init__(self, data_path, num_faces=10000, augment=False,
+                 cache_dir=None, cache_max_size_gb=None, adjacency=None, face_patches=8):
+        self.num_faces = num_faces
+        self.adjacency = adjacency
+        self.face_patches = face_patches
+        super().__init__(data_path, num_points=num_faces, augment=augment,
+                         cache_dir=cache_dir, cache_max_size_gb=cache_max_size_gb)
+    
+    def __getitem__(self, idx):
+        arrays, labels = self.load_raw(idx)
+        features = arrays['features']
+        
+        # 采样固定数量的面；图卷积时采样连通面片，保留面片内部的邻接
+        matrix = None
+        if self.adjacency is not None:
+            matrix = adjacency_matrix(arrays, self.adjacency)
+            if self.num_faces is not None and len(features) > self.num_faces:
+                indices = sample_face_patches(matrix, self.num_faces, self.face_patches)
+                features = features[indices]
+                labels = labels[indices]
+                matrix = matrix[indices][:, indices]
+            else:
+                features = np.array(features)
+        elif self.num_faces is not None and len(features) != self.num_faces:
+            replace = len(features) < self.num_faces
+            indices = np.random.choice(len(features), self.num_faces, replace=replace)
+            features = features[indices]
+            labels = labels[indices]
+        else:
+            features = np.array(features)
+        
+        # 数据增强
+        if self.augment:
+            features = self._augment(features)
+        
+        features = torch.from_numpy(np.ascontiguousarray(features.T)).float()
+        labels = torch.from_numpy(labels).long()
+        
+        if matrix is None:
+            return features, labels
+        return features, labels, matrix
+    
+    def load_raw(self, idx):
+        """读取缓存的特征 / 邻接数组和逐面标签（未采样、未增强）"""
+        sample = self.samples[idx]
+        arrays = load_mesh_features(sample['scan'], cache=self.cache)
+        labels = self._load_face_labels(sample['label'], arrays)
+        return arrays, labels
+    
+    def _load_face_labels(self, label_path, arrays):
+        """加载标签并转换为逐面标签"""
+        num_faces = len(arrays['faces'])
+        try:
+            labels = load_json_arrays(label_path, {'labels': np.int64},
+                                      cache=self.cache)['labels']
+        except Exception as e:
+            print(f"加载标签失败: {e}")
+            return np.zeros(num_faces, dtype=np.int64)
+        
+        if len(labels) == int(arrays['num_vertices'][0]):
+            return face_labels_from_vertices(arrays['faces'], labels)
+        if len(labels) == num_faces:
+            return np.asarray(labels)
+        print(f"警告: 标签数量 ({len(labels)}) 与顶点数或面数 ({num_faces}) 不匹配")
+        return np.zeros(num_faces, dtype=np.int64)
+    
+    def _augment(self, features):
+        """数据增强：坐标和法向同步绕 z 轴旋转，坐标随机缩放"""
+        triplets = features.reshape(len(features), 5, 3)
+        
+        # 随机旋转（三个顶点、重心、法向）
+        if np.random.random() > 0.5:
+            theta = np.random.uniform(0, 2 * np.pi)
+            rotation_matrix = np.array([
+                [np.cos(theta), -np.sin(theta), 0],
+                [np.sin(theta), np.cos(theta), 0],
+                [0, 0, 1]
+            ], dtype=np.float32)
+            triplets = triplets @ rotation_matrix.T
+        
+        # 随机缩放（法向不变）
+        if np.random.random() > 0.5:
+            scale = np.random.uniform(0.9, 1.1)
+            triplets = np.concatenate([triplets[:, :4] * scale, triplets[:, 4:]], axis=1)
+        
+        return triplets.reshape(len(features), 15).astype(np.float32)
+
+
+def collate_mesh_graphs(samples):
+    """
+    把 MeshSegDataset(adjacency=...) 的样本组成批次，邻接拼成块对角矩阵
+    
+    各样本面数相同时 features 为 (B, 15, N)、labels 为 (B, N)；面数不同时沿面维拼接为
+    (1, 15, ΣN)、(1, ΣN)。两种情况下邻接的面编号都与特征展平后的顺序一致。
+    
+    Returns:
+        [(features, adjacency), labels]，adjacency 为 (ΣN, ΣN) 对称归一化的 torch 稀疏 CSR 张量
+    """
+    features, labels, adjacency = zip(*samples)
+    if len({f.shape[1] for f in features}) == 1:
+        features = torch.stack(features)
+        labels = torch.stack(labels)
+    else:
+        features = torch.cat(features, dim=1).unsqueeze(0)
+        labels = torch.cat(labels).unsqueeze(0)
+    return [(features, block_diagonal_adjacency(adjacency)), labels]
@@ -4,33 +4,59 @@
 
 import torch
 import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from segmentation.model import SegmentationModel
+from segmentation.dataset import ToothSegmentationDataset
 from common.utils import load_mesh, save_mesh, visualize_segmentation
+from common.geometry import propagate_labels
+from common.quantization import quantize_model, calibration_batches
+from common.runtime import load_exported_model
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description='牙齿分割推理')
     parser.add_argument('--model', type=str, required=True,
-                        help='模型权重路径')
+                        help='模型权重路径（torch 后端为检查点，其余为 tools/export_model.py 导出的文件）')
+    parser.add_argument('--backend', type=str, default='torch',
+                        choices=['torch', 'torchscript', 'onnx'],
+                        help='推理后端：torch 从检查点构建模型，torchscript/onnx 加载导出的冻结图')
     parser.add_argument('--input', type=str, default=None,
                         help='输入文件路径')
     parser.add_argument('--input_dir', type=str, default=None,
                         help='输入文件夹路径（批量处理）')
-    parser.add_argument('--output', type=str, default='output.obj',
-                        help='输出文件路径')
+    parser.add_argument('--output', type=str, default='output.ply',
+                        help='输出文件路径（扩展名决定格式：.ply 二进制 / .obj 文本）')
     parser.add_argument('--output_dir', type=str, default='results',
                         help='输出文件夹路径')
+    parser.add_argument('--output_format', type=str, default='ply', choices=['ply', 'obj'],
+                        help='批量处理时的输出格式')
     parser.add_argument('--num_points', type=int, default=10000,
                         help='采样点数')
+    parser.add_argument('--knn', type=int, default=1,
+                        help='把采样点预测传播到全部顶点时的近邻数（>1 时加权投票）')
+    parser.add_argument('--batch_size', type=int, default=8,
+                        help='批量处理时每次前向的文件数')
+    parser.add_argument('--num_workers', type=int, default=4,
+                        help='批量处理时加载/采样网格的进程数')
+    parser.add_argument('--num_writers', type=int, default=2,
+                        help='批量处理时标签传播和写出结果的线程数')
     parser.add_argument('--visualize', action='store_true',
                         help='可视化结果')
     parser.add_argument('--device', type=str, default='cuda',
                         help='计算设备')
+    parser.add_argument('--quantize', action='store_true',
+                        help='使用 int8 量化模型在 CPU 上推理')
+    parser.add_argument('--calibration_data', type=str, default=None,
+                        help='量化校准用的分割数据集目录，默认用待推理的网格校准')
+    parser.add_argument('--calibration_samples', type=int, default=16,
+                        help='量化校准样本数')
     return parser.parse_args()
 
 
@@ -49,16 +75,157 @@ def inference_single(model, points, device):
     return pred
 
 
-def main():
-    args = parse_args()
+def predict_vertices(model, vertices, num_points, device, k=1, rng=np.random):
+    """
+    全分辨率分割：对采样点推理，再按最近邻把标签传播到所有顶点
     
-    # 设置设备
-    device = torch.device(args.device if torch.cuda.is_available() else 'cpu')
-    print(f"使用设备: {device}")
+    Args:
+        rng: 采样点使用的随机数生成器（np.random 或 np.random.Generator）
+
+    Returns:
+        labels: (N,) 每个顶点的预测标签
+    """
+    if len(vertices) <= num_points:
+        return inference_single(model, vertices, device)
     
-    # 加载模型
-    print(f"加载模型: {args.model}")
-    checkpoint = torch.load(args.model, map_location=device)
+    # 采样点云
+    indices = rng.choice(len(vertices), num_points, replace=False)
+    points = vertices[indices]
+    
+    # 推理
+    pred = inference_single(model, points, device)
+    
+    # 传播到全部顶点
+    return propagate_labels(points, pred, vertices, k=k,
+                            num_classes=model.num_classes)
+
+
+def sample_points(vertices, num_points, rng=np.random):
+    """采样固定数量的点，点数不足时重复采样以便组成批次"""
+    replace = len(vertices) < num_points
+    indices = rng.choice(len(vertices), num_points, replace=replace)
+    return vertices[indices]
+
+
+def inference_batch(model, points, device):
+    """
+    批量推理
+
+    Args:
+        points: (B, N, 3) 采样点
+
+    Returns:
+        pred: (B, N) 预测标签
+    """
+    model.eval()
+    
+    with torch.no_grad():
+        points_tensor = torch.from_numpy(points).float().to(device)
+        output = model(points_tensor)
+        pred = output.argmax(dim=1).cpu().numpy()
+    
+    return pred
+
+
+def _load_and_sample(file, num_points):
+    """加载进程：读取网格并采样，返回耗时"""
+    start = time.perf_counter()
+    vertices, faces = load_mesh(str(file))
+    points = sample_points(vertices, num_points, np.random.default_rng())
+    return file, vertices, faces, points, time.perf_counter() - start
+
+
+def _propagate_and_save(output_file, vertices, faces, points, pred, k, num_classes):
+    """写出线程：把采样点预测传播到全部顶点并保存，返回耗时"""
+    start = time.perf_counter()
+    labels = propagate_labels(points, pred, vertices, k=k, num_classes=num_classes)
+    save_mesh(str(output_file), vertices, faces, labels=labels)
+    return time.perf_counter() - start
+
+
+def run_batched(model, files, output_path, args, device):
+    """
+    流水线批量推理
+
+    加载进程池预取并采样后续文件，主线程对凑满的批次做前向，
+    写出线程池在后台完成标签传播和保存，三个阶段相互重叠。
+    """
+    timings = {'load': 0.0, 'wait': 0.0, 'forward': 0.0, 'write': 0.0}
+    max_pending = 2 * args.batch_size
+    start = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=args.num_workers) as loader, \
+            ThreadPoolExecutor(max_workers=args.num_writers) as writer:
+        remaining = iter(files)
+        loads = deque()
+        writes = deque()
+        
+        def prefetch():
+            while len(loads) < max_pending:
+                file = next(remaining, None)
+                if file is None:
+                    break
+                loads.append(loader.submit(_load_and_sample, file, args.num_points))
+        
+        def finish_write():
+            timings['write'] += writes.popleft().result()
+        
+        prefetch()
+        while loads:
+            # 取一个批次（按文件顺序）
+            wait_start = time.perf_counter()
+            batch = [loads.popleft().result()
+                     for _ in range(min(args.batch_size, len(loads)))]
+            timings['wait'] += time.perf_counter() - wait_start
+            timings['load'] += sum(item[-1] for item in batch)
+            prefetch()
+            
+            # 批量前向
+            forward_start = time.perf_counter()
+            preds = inference_batch(model, np.stack([item[3] for item in batch]), device)
+            timings['forward'] += time.perf_counter() - forward_start
+            
+            # 后台写出，限制排队中的结果数量以控制内存
+            for (file, vertices, faces, points, _), pred in zip(batch, preds):
+                output_file = output_path / f"{file.stem}_seg.{args.output_format}"
+                writes.append(writer.submit(_propagate_and_save, output_file, vertices,
+                                            faces, points, pred, args.knn, model.num_classes))
+                print(f"处理: {file.name}")
+            while len(writes) > max_pending:
+                finish_write()
+        
+        while writes:
+            finish_write()
+    
+    elapsed = time.perf_counter() - start
+    num_files = len(files)
+    print(f"共处理 {num_files} 个文件，用时 {elapsed:.2f}s，"
+          f"{num_files / max(elapsed, 1e-9):.2f} 文件/秒")
+    print("各阶段耗时（load/write 为各进程/线程累计，wait/forward 为主线程）:")
+    for stage, seconds in timings.items():
+        print(f"  {stage:8s}: 总计 {seconds:8.3f}s, 平均 {seconds / max(num_files, 1) * 1000:8.1f} ms/文件")
+    
+    return timings
+
+
+def build_calibration_data(args, files):
+    """构建量化校准输入"""
+    if args.calibration_data:
+        dataset = ToothSegmentationDataset(args.calibration_data, num_points=args.num_points)
+        return calibration_batches(dataset, num_samples=args.calibration_samples)
+    
+    # 没有标注数据时用待推理的网格本身校准
+    batches = []
+    for file in files[:args.calibration_samples]:
+        vertices, _ = load_mesh(str(file), load_faces=False)
+        points = sample_points(vertices, args.num_points)
+        batches.append(torch.from_numpy(points).float().unsqueeze(0))
+    return batches
+
+
+def load_checkpoint_model(model_path, device):
+    """从训练检查点构建模型"""
+    checkpoint = torch.load(model_path, map_location=device)
     
     model = SegmentationModel(
         num_classes=checkpoint.get('num_classes', 33),
@@ -67,6 +234,37 @@ def main():
     
     model.load_state_dict(checkpoint['model_state_dict'])
     model.eval()
+    return model
+
+
+def main():
+    args = parse_args()
+    
+    # 设置设备
+    device = torch.device(args.device if torch.cuda.is_available() else 'cpu')
+    print(f"使用设备: {device}")
+    
+    # 加载模型
+    print(f"加载模型: {args.model}")
+    if args.backend == 'torch':
+        model = load_checkpoint_model(args.model, device)
+    else:
+        model = load_exported_model(args.model, device, backend=args.backend)
+        print(f"使用导出模型 ({model.backend})")
+    
+    # int8 量化（仅 CPU）
+    if args.quantize:
+        if args.backend != 'torch':
+            raise ValueError("--quantize 只支持 torch 后端")
+        if args.input:
+            files = [Path(args.input)]
+        elif args.input_dir:
+            files = sorted(Path(args.input_dir).glob('*.obj')) + sorted(Path(args.input_dir).glob('*.ply'))
+        else:
+            files = []
+        device = torch.device('cpu')
+        model, mode = quantize_model(model, build_calibration_data(args, files))
+        print(f"已量化模型 (int8 {mode})，使用设备: {device}")
     
     # 单个文件推理
     if args.input:
@@ -75,15 +273,8 @@ def main():
         # 加载网格
         vertices, faces = load_mesh(args.input)
         
-        # 采样点云
-        if len(vertices) > args.num_points:
-            indices = np.random.choice(len(vertices), args.num_points, replace=False)
-            points = vertices[indices]
-        else:
-            points = vertices
-        
-        # 推理
-        pred_labels = inference_single(model, points, device)
+        # 推理（采样点推理 + 最近邻传播到全部顶点）
+        pred_labels = predict_vertices(model, vertices, args.num_points, device, k=args.knn)
         
         # 保存结果
         save_mesh(args.output, vertices, faces, labels=pred_labels)
@@ -103,23 +294,8 @@ def main():
         files = list(input_path.glob('*.obj')) + list(input_path.glob('*.ply'))
         print(f"找到 {len(files)} 个文件")
         
-        for file in files:
-            print(f"处理: {file.name}")
-            
-            # 加载和推理
-            vertices, faces = load_mesh(str(file))
-            
-            if len(vertices) > args.num_points:
-                indices = np.random.choice(len(vertices), args.num_points, replace=False)
-                points = vertices[indices]
-            else:
-                points = vertices
-            
-            pred_labels = inference_single(model, points, device)
-            
-            # 保存
-            output_file = output_path / f"{file.stem}_seg{file.suffix}"
-            save_mesh(str(output_file), vertices, faces, labels=pred_labels)
+        # 流水线批量推理
+        run_batched(model, files, output_path, args, device)
         
         print(f"所有结果已保存到: {args.output_dir}")
     
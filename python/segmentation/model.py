@@ -6,6 +6,8 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from common.point_ops import farthest_point_sample, ball_query, index_points
+
 
 class PointNetSetAbstraction(nn.Module):
     """PointNet++ Set Abstraction层"""
@@ -25,28 +27,34 @@ class PointNetSetAbstraction(nn.Module):
             last_channel = out_channel
     
     def forward(self, xyz, points):
-        # xyz: (B, N, 3)
-        # points: (B, C, N)
-        
-        # 简化版实现
-        B, N, C = xyz.shape
+        """
+        Args:
+            xyz: (B, N, 3) 点坐标
+            points: (B, C, N) 点特征，第一层为 None
         
-        # 随机采样
-        if self.npoint < N:
-            idx = torch.randperm(N)[:self.npoint]
-            new_xyz = xyz[:, idx, :]
-        else:
-            new_xyz = xyz
+        Returns:
+            new_xyz: (B, npoint, 3) 采样中心点
+            new_points: (B, C', npoint) 局部区域特征
+        """
+        # 最远点采样（训练时随机起点）
+        fps_idx = farthest_point_sample(xyz, self.npoint, random_start=self.training)
+        new_xyz = index_points(xyz, fps_idx)
         
-        # 特征聚合
+        # 球查询分组: (B, npoint, nsample)
+        idx = ball_query(xyz, new_xyz, self.radius, self.nsample)
+        grouped_xyz = index_points(xyz, idx) - new_xyz.unsqueeze(2)  # (B, npoint, nsample, 3)
         if points is not None:
-            new_points = points
-            for i, conv in enumerate(self.mlp_convs):
-                bn = self.mlp_bns[i]
-                new_points = F.relu(bn(conv(new_points.unsqueeze(-1))))
-            new_points = torch.max(new_points, 2)[0]
+            grouped_points = index_points(points.transpose(1, 2), idx)
+            grouped_points = torch.cat([grouped_xyz, grouped_points], dim=-1)
         else:
-            new_points = None
+            grouped_points = grouped_xyz
+        
+        # 共享 MLP + 局部最大池化
+        new_points = grouped_points.permute(0, 3, 2, 1)  # (B, 3 + C, nsample, npoint)
+        for i, conv in enumerate(self.mlp_convs):
+            bn = self.mlp_bns[i]
+            new_points = F.relu(bn(conv(new_points)))
+        new_points = torch.max(new_points, dim=2)[0]  # (B, C', npoint)
         
         return new_xyz, new_points
 
@@ -64,8 +72,8 @@ class SegmentationModel(nn.Module):
         
         # 特征提取
         self.sa1 = PointNetSetAbstraction(1024, 0.1, 32, 3, [32, 32, 64])
-        self.sa2 = PointNetSetAbstraction(256, 0.2, 32, 64, [64, 64, 128])
-        self.sa3 = PointNetSetAbstraction(64, 0.4, 32, 128, [128, 128, 256])
+        self.sa2 = PointNetSetAbstraction(256, 0.2, 32, 64 + 3, [64, 64, 128])
+        self.sa3 = PointNetSetAbstraction(64, 0.4, 32, 128 + 3, [128, 128, 256])
         
         # 全局特征
         self.fc1 = nn.Linear(256, 512)
@@ -79,6 +87,16 @@ class SegmentationModel(nn.Module):
         
         self.fc3 = nn.Linear(256, num_classes)
     
+    def load_state_dict(self, state_dict, *args, **kwargs):
+        """加载参数；旧版 Set Abstraction 的检查点（sa2 / sa3 不含相对坐标输入通道）给出明确的错误"""
+        weight = state_dict.get('sa2.mlp_convs.0.weight')
+        expected = self.sa2.mlp_convs[0].weight.shape[1]
+        if weight is not None and weight.shape[1] == expected - 3:
+            raise RuntimeError(
+                "分割检查点来自旧版 PointNet++ 分组（sa2 / sa3 的输入不含相对坐标，"
+                f"sa2 输入通道 {weight.shape[1]}，当前模型为 {expected}），与当前模型不兼容，需要重新训练")
+        return super().load_state_dict(state_dict, *args, **kwargs)
+    
     def forward(self, xyz):
         """
         Args:
@@ -111,15 +129,89 @@ class SegmentationModel(nn.Module):
         return out
 
 
+class _SymmetricSparseMM(torch.autograd.Function):
+    """
+    A @ X，A 为对称的稀疏 CSR 矩阵
+    
+    反向传播需要 A^T @ G，A 对称时就是 A @ G，不需要 autograd 默认的 CSR 转置。
+    """
+    
+    @staticmethod
+    def forward(ctx, adjacency, x):
+        ctx.adjacency = adjacency
+        return adjacency @ x
+    
+    @staticmethod
+    def backward(ctx, grad):
+        return None, ctx.adjacency @ grad
+
+
+def aggregate_neighbors(x, adjacency):
+    """
+    按面邻接聚合邻居特征
+    
+    Args:
+        x: (B, C, N) 逐面特征
+        adjacency: (B*N, B*N) 对称归一化的块对角稀疏 CSR 矩阵
+            （common.mesh_features.block_diagonal_adjacency），样本 b 的第 n 个面编号为 b*N + n
+    
+    Returns:
+        (B, C, N) 邻居特征的加权和
+    """
+    B, C, N = x.shape
+    # 稀疏矩阵乘法不支持低精度，autocast 下也用邻接矩阵的精度（fp32）计算
+    with torch.autocast(x.device.type, enabled=False):
+        flat = x.transpose(1, 2).reshape(B * N, C).to(adjacency.dtype)
+        out = _SymmetricSparseMM.apply(adjacency, flat)
+    return out.to(x.dtype).reshape(B, N, C).transpose(1, 2)
+
+
+class GraphConv(nn.Module):
+    """
+    面邻接上的图卷积：out = W_self x + W_neighbor (A x)
+    
+    邻居聚合为稀疏矩阵乘法，显存和计算量与邻接边数成正比。
+    输出通道数不大于输入时先投影再聚合（A (x W) = (A x) W），聚合的通道数取两者中较小的一个。
+    """
+    
+    def __init__(self, in_channels, out_channels):
+        super(GraphConv, self).__init__()
+        self.self_weight = nn.Conv1d(in_channels, out_channels, 1)
+        self.neighbor_weight = nn.Conv1d(in_channels, out_channels, 1, bias=False)
+        self.project_first = out_channels <= in_channels
+    
+    def forward(self, x, adjacency):
+        """
+        Args:
+            x: (B, in_channels, N) 逐面特征
+            adjacency: 见 aggregate_neighbors
+        
+        Returns:
+            (B, out_channels, N)
+        """
+        if self.project_first:
+            neighbors = aggregate_neighbors(self.neighbor_weight(x), adjacency)
+        else:
+            neighbors = self.neighbor_weight(aggregate_neighbors(x, adjacency))
+        return self.self_weight(x) + neighbors
+
+
 class MeshSegNet(nn.Module):
     """
     基于图卷积的网格分割模型
+    
+    graph_conv=True 时在逐面 MLP 之间加入两层面邻接图卷积（局部上下文），
+    forward 需要同时给出块对角邻接矩阵；False 时只有逐面 MLP。
     """
     
-    def __init__(self, num_classes=33, num_channels=15):
+    # 输入为 (B, C, N)，训练计时按最后一维统计面数
+    point_axis = -1
+    
+    def __init__(self, num_classes=33, num_channels=15, graph_conv=False):
         super(MeshSegNet, self).__init__()
         
         self.num_classes = num_classes
+        self.graph_conv = graph_conv
         
         # MeshConv layers (简化实现)
         self.conv1 = nn.Conv1d(num_channels, 64, 1)
@@ -130,22 +222,37 @@ class MeshSegNet(nn.Module):
         self.bn2 = nn.BatchNorm1d(128)
         self.bn3 = nn.BatchNorm1d(256)
         
+        # 面邻接图卷积
+        if graph_conv:
+            self.graph1 = GraphConv(64, 64)
+            self.graph2 = GraphConv(128, 128)
+            self.graph_bn1 = nn.BatchNorm1d(64)
+            self.graph_bn2 = nn.BatchNorm1d(128)
+        
         # 分类头
         self.fc1 = nn.Conv1d(256, 128, 1)
         self.fc2 = nn.Conv1d(128, num_classes, 1)
         
         self.dropout = nn.Dropout(0.5)
     
-    def forward(self, x):
+    def forward(self, x, adjacency=None):
         """
         Args:
             x: (B, num_channels, N) 网格特征
+            adjacency: graph_conv=True 时必需，(B*N, B*N) 块对角稀疏邻接（见 aggregate_neighbors）
         
         Returns:
             out: (B, num_classes, N)
         """
+        if self.graph_conv and adjacency is None:
+            raise ValueError("graph_conv=True 时需要提供面邻接矩阵")
+        
         x = F.relu(self.bn1(self.conv1(x)))
+        if self.graph_conv:
+            x = F.relu(self.graph_bn1(self.graph1(x, adjacency)))
         x = F.relu(self.bn2(self.conv2(x)))
+        if self.graph_conv:
+            x = F.relu(self.graph_bn2(self.graph2(x, adjacency)))
         x = F.relu(self.bn3(self.conv3(x)))
         
         x = F.relu(self.fc1(x))
@@ -7,15 +7,20 @@ import torch.nn as nn
 from torch.utils.data import DataLoader
 import argparse
 import yaml
+from functools import partial
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
-from segmentation.model import SegmentationModel
-from segmentation.dataset import ToothSegmentationDataset
+from segmentation.model import SegmentationModel, MeshSegNet
+from segmentation.dataset import (ToothSegmentationDataset, PackedToothSegmentationDataset, MeshSegDataset,
+                                  collate_mesh_graphs)
 from common.base_trainer import BaseTrainer
-from common.metrics import segmentation_metrics
-from common.utils import setup_logger, save_checkpoint
+from common.augmentation import build_augmentation
+from common.metrics import SegmentationMeter
+from common.distributed import (launch, setup_distributed, cleanup_distributed, build_sampler,
+                                get_world_size, setup_main_logger)
+from common.loader_tuning import tune_dataloader
 
 
 def parse_args():
@@ -26,64 +31,122 @@ def parse_args():
                         help='从检查点继续训练')
     parser.add_argument('--gpus', type=str, default='0',
                         help='使用的GPU ID，逗号分隔')
+    parser.add_argument('--nproc', type=int, default=None,
+                        help='数据并行的进程数，默认为 --gpus 中的 GPU 数（无 CUDA 时为 1）')
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
-    
+    gpus = [int(gpu) for gpu in args.gpus.split(',')]
+    world_size = args.nproc or (len(gpus) if torch.cuda.is_available() else 1)
+    launch(train, world_size, args)
+
+
+def train(args):
+    """单个训练进程，多进程时每个进程各运行一次"""
     # 加载配置
     with open(args.config, 'r') as f:
         config = yaml.safe_load(f)
     
     # 设置日志
-    logger = setup_logger('segmentation_train', config['training']['log_dir'])
+    logger = setup_main_logger('segmentation_train', config['training']['log_dir'])
     logger.info(f"加载配置: {args.config}")
     
     # 设置设备
-    device = torch.device(f"cuda:{args.gpus.split(',')[0]}" if torch.cuda.is_available() else "cpu")
+    device = setup_distributed([int(gpu) for gpu in args.gpus.split(',')])
     logger.info(f"使用设备: {device}")
     
+    # MeshSegNet 的输入是逐面特征而不是点云
+    mesh_model = config['model']['name'] == 'meshsegnet'
+    
+    # 批量增强（stage 为 collate / device 时代替数据集中的逐样本增强），只适用于点云输入
+    augmentation = None if mesh_model else build_augmentation(config.get('augmentation'),
+                                                              target_types=('labels',))
+    
     # 创建数据集
     logger.info("加载数据集...")
-    train_dataset = ToothSegmentationDataset(
+    # 图卷积使用的面邻接（edge / vertex），null 时 MeshSegNet 只有逐面 MLP
+    adjacency = config['data'].get('adjacency') if mesh_model else None
+    if mesh_model:
+        # 逐面特征和面邻接缓存在 cache_dir，每个样本采样 num_faces 个面（图卷积时为连通面片）
+        dataset_cls = MeshSegDataset
+        dataset_kwargs = dict(
+            num_faces=config['data'].get('num_faces', 10000),
+            adjacency=adjacency,
+            face_patches=config['data'].get('face_patches', 8),
+            cache_dir=config['data'].get('cache_dir'),
+            cache_max_size_gb=config['data'].get('cache_max_size_gb')
+        )
+    elif config['data'].get('packed', False):
+        # train_path/val_path 为 tools/pack_dataset.py 打包后的目录
+        dataset_cls = PackedToothSegmentationDataset
+        dataset_kwargs = dict(
+            num_points=config['data']['num_points'],
+            level=config['data'].get('pyramid_level')
+        )
+    else:
+        dataset_cls = ToothSegmentationDataset
+        dataset_kwargs = dict(
+            num_points=config['data']['num_points'],
+            cache_dir=config['data'].get('cache_dir'),
+            cache_max_size_gb=config['data'].get('cache_max_size_gb')
+        )
+    train_dataset = dataset_cls(
         data_path=config['data']['train_path'],
-        num_points=config['data']['num_points'],
-        augment=True
+        augment=augmentation is None,
+        **dataset_kwargs
     )
-    val_dataset = ToothSegmentationDataset(
+    val_dataset = dataset_cls(
         data_path=config['data']['val_path'],
-        num_points=config['data']['num_points'],
-        augment=False
-    )
-    
-    train_loader = DataLoader(
-        train_dataset,
-        batch_size=config['training']['batch_size'],
-        shuffle=True,
-        num_workers=4,
-        pin_memory=True
-    )
-    val_loader = DataLoader(
-        val_dataset,
-        batch_size=config['training']['batch_size'],
-        shuffle=False,
-        num_workers=4,
-        pin_memory=True
+        augment=False,
+        **dataset_kwargs
     )
     
     logger.info(f"训练样本数: {len(train_dataset)}, 验证样本数: {len(val_dataset)}")
     
     # 创建模型
     logger.info("创建模型...")
-    model = SegmentationModel(
-        num_classes=config['data']['num_classes'],
-        model_type=config['model']['name']
-    ).to(device)
+    if mesh_model:
+        model = MeshSegNet(num_classes=config['data']['num_classes'],
+                           graph_conv=adjacency is not None).to(device)
+    else:
+        model = SegmentationModel(
+            num_classes=config['data']['num_classes'],
+            model_type=config['model']['name']
+        ).to(device)
     
     # 损失函数
     criterion = nn.CrossEntropyLoss(ignore_index=-1)
     
+    # 图卷积的样本带邻接矩阵，拼成块对角批次
+    collate_fn = augmentation.collate_fn if augmentation else None
+    val_collate_fn = None
+    if adjacency is not None:
+        collate_fn = val_collate_fn = collate_mesh_graphs
+    
+    # DataLoader 参数：配置中未指定的由校准选择（读取耗时 vs 模型步耗时）
+    loader_kwargs = tune_dataloader(train_dataset, model, criterion, device, config['training'],
+                                    collate_fn=collate_fn, world_size=get_world_size(), logger=logger)
+    
+    # 多进程时每个进程只读取 DistributedSampler 分到的样本
+    train_sampler = build_sampler(train_dataset, shuffle=True)
+    val_sampler = build_sampler(val_dataset, shuffle=False)
+    train_loader = DataLoader(
+        train_dataset,
+        shuffle=train_sampler is None,
+        sampler=train_sampler,
+        collate_fn=collate_fn,
+        **loader_kwargs
+    )
+    val_loader = DataLoader(
+        val_dataset,
+        shuffle=False,
+        sampler=val_sampler,
+        collate_fn=val_collate_fn,
+        **loader_kwargs
+    )
+    
     # 优化器
     optimizer = torch.optim.Adam(
         model.parameters(),
@@ -106,17 +169,17 @@ def main():
         optimizer=optimizer,
         scheduler=scheduler,
         device=device,
-        config=config
+        config=config,
+        metrics=partial(SegmentationMeter, config['data']['num_classes']),
+        logger=logger,
+        augmentation=augmentation
     )
     
     # 从检查点恢复
     start_epoch = 0
     if args.resume:
         logger.info(f"从检查点恢复: {args.resume}")
-        checkpoint = torch.load(args.resume)
-        model.load_state_dict(checkpoint['model_state_dict'])
-        optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
-        start_epoch = checkpoint['epoch'] + 1
+        start_epoch = trainer.load_checkpoint(args.resume)
     
     # 开始训练
     logger.info("开始训练...")
@@ -127,6 +190,7 @@ def main():
     )
     
     logger.info("训练完成！")
+    cleanup_distributed()
 
 
 if __name__ == '__main__':
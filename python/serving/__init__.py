@@ -0,0 +1,9 @@
+"""
+推理服务模块
+"""
+
+from .batcher import DynamicBatcher
+from .models import load_model, SegmentationPredictor, LandmarkPredictor, ToothAxisPredictor
+
+__all__ = ['DynamicBatcher', 'load_model', 'SegmentationPredictor',
+           'LandmarkPredictor', 'ToothAxisPredictor']
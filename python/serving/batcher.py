@@ -0,0 +1,107 @@
+"""
+动态批处理
+
+请求先进入队列，后台线程取出第一个请求后在 max_wait_ms 时间窗口内
+继续收集，凑满 max_batch_size 或窗口结束即合并为一个批次前向。
+"""
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+__all__ = ['DynamicBatcher']
+
+
+class DynamicBatcher:
+    """
+    单个模型的动态批处理器
+
+    Args:
+        predictor: 提供 forward(batch) 的预测器
+        max_batch_size: 单个批次的最大请求数
+        max_wait_ms: 收集批次的最长等待时间（毫秒）
+        latency_window: 统计延迟分位数时保留的最近请求数
+    """
+
+    def __init__(self, predictor, max_batch_size=16, max_wait_ms=5.0,
+                 latency_window=10000):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._latencies = deque(maxlen=latency_window)
+        self._num_requests = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"batcher-{predictor.task}")
+        self._thread.start()
+
+    def submit(self, inputs):
+        """提交一个样本，返回 Future，结果为该样本的模型输出"""
+        future = Future()
+        self._queue.put((inputs, future))
+        return future
+
+    def record_latency(self, seconds):
+        """记录一次完整请求（含前后处理）的延迟"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def stats(self):
+        """队列深度、批大小直方图和延迟分位数"""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000.0
+            histogram = dict(sorted(self._batch_sizes.items()))
+            num_requests = self._num_requests
+
+        stats = {
+            'queue_depth': self._queue.qsize(),
+            'requests': num_requests,
+            'batches': sum(histogram.values()),
+            'batch_size_histogram': {str(size): count for size, count in histogram.items()},
+        }
+        if len(latencies):
+            stats['latency_ms'] = {
+                'p50': float(np.percentile(latencies, 50)),
+                'p99': float(np.percentile(latencies, 99)),
+                'mean': float(latencies.mean()),
+            }
+        return stats
+
+    def _collect(self):
+        """阻塞等待第一个请求，然后在时间窗口内继续收集"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                outputs = self.predictor.forward(np.stack([item[0] for item in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._num_requests += len(batch)
@@ -0,0 +1,149 @@
+"""
+推理服务使用的模型加载与前后处理
+
+每个 Predictor 负责：把一次请求的点云预处理成固定大小的模型输入、
+对一个批次做前向、把单个样本的输出还原为请求坐标系下的结果。
+"""
+
+import numpy as np
+import torch
+
+from common.geometry import propagate_labels
+from segmentation.model import SegmentationModel
+from landmarks.model import LandmarkDetectionModel
+from tooth_axis.model import ToothAxisModel
+from tooth_multitask.model import ToothMultiTaskModel
+
+
+__all__ = ['load_model', 'SegmentationPredictor', 'LandmarkPredictor',
+           'ToothAxisPredictor', 'PREDICTORS']
+
+
+def load_model(task, checkpoint_path, device):
+    """
+    从 BaseTrainer.save_checkpoint 保存的检查点构建模型
+
+    Args:
+        task: 'segmentation' / 'landmarks' / 'tooth_axis' / 'tooth_multitask'
+        checkpoint_path: 检查点路径
+        device: 计算设备
+
+    Returns:
+        处于 eval 模式的模型
+    """
+    checkpoint = torch.load(checkpoint_path, map_location=device)
+
+    if task == 'segmentation':
+        model = SegmentationModel(
+            num_classes=checkpoint.get('num_classes', 33),
+            model_type=checkpoint.get('model_type', 'pointnet++')
+        )
+    elif task == 'landmarks':
+        model = LandmarkDetectionModel(num_landmarks=checkpoint.get('num_landmarks', 10))
+    elif task == 'tooth_axis':
+        model = ToothAxisModel()
+    elif task == 'tooth_multitask':
+        model = ToothMultiTaskModel(num_landmarks=checkpoint.get('num_landmarks', 10))
+    else:
+        raise ValueError(f"未知任务: {task}")
+
+    model.load_state_dict(checkpoint['model_state_dict'])
+    return model.to(device).eval()
+
+
+def _sample(points, num_points):
+    replace = len(points) < num_points
+    indices = np.random.choice(len(points), num_points, replace=replace)
+    return points[indices]
+
+
+def _normalize(points):
+    """与训练数据集一致：平移到质心并缩放到单位球"""
+    centroid = points.mean(axis=0)
+    points = points - centroid
+    scale = np.max(np.linalg.norm(points, axis=1)) + 1e-8
+    return points / scale, centroid, scale
+
+
+class SegmentationPredictor:
+    """牙齿分割：采样点推理后把标签传播回全部输入点"""
+
+    task = 'segmentation'
+
+    def __init__(self, model, device, num_points=10000, knn=1):
+        self.model = model
+        self.device = device
+        self.num_points = num_points
+        self.knn = knn
+
+    def preprocess(self, points):
+        sampled = _sample(points, self.num_points)
+        return sampled, (points, sampled)
+
+    def forward(self, batch):
+        with torch.no_grad():
+            output = self.model(torch.from_numpy(batch).to(self.device))
+        return output.argmax(dim=1).cpu().numpy()
+
+    def postprocess(self, pred, context):
+        points, sampled = context
+        labels = propagate_labels(sampled, pred, points, k=self.knn,
+                                  num_classes=self.model.num_classes)
+        return {'labels': labels.tolist()}
+
+
+class LandmarkPredictor:
+    """单颗牙齿地标点检测"""
+
+    task = 'landmarks'
+
+    def __init__(self, model, device, num_points=2048):
+        self.model = model
+        self.device = device
+        self.num_points = num_points
+
+    def preprocess(self, points):
+        sampled, centroid, scale = _normalize(_sample(points, self.num_points))
+        return sampled, (centroid, scale)
+
+    def forward(self, batch):
+        with torch.no_grad():
+            output = self.model(torch.from_numpy(batch).to(self.device))
+        return output.cpu().numpy()
+
+    def postprocess(self, landmarks, context):
+        centroid, scale = context
+        return {'landmarks': (landmarks * scale + centroid).tolist()}
+
+
+class ToothAxisPredictor:
+    """单颗牙齿牙轴检测"""
+
+    task = 'tooth_axis'
+
+    def __init__(self, model, device, num_points=2048):
+        self.model = model
+        self.device = device
+        self.num_points = num_points
+
+    def preprocess(self, points):
+        sampled, centroid, scale = _normalize(_sample(points, self.num_points))
+        return sampled, (centroid, scale)
+
+    def forward(self, batch):
+        with torch.no_grad():
+            origin, direction = self.model(torch.from_numpy(batch).to(self.device))
+        return list(zip(origin.cpu().numpy(), direction.cpu().numpy()))
+
+    def postprocess(self, output, context):
+        origin, direction = output
+        centroid, scale = context
+        return {'origin': (origin * scale + centroid).tolist(),
+                'direction': direction.tolist()}
+
+
+PREDICTORS = {
+    'segmentation': SegmentationPredictor,
+    'landmarks': LandmarkPredictor,
+    'tooth_axis': ToothAxisPredictor,
+}
@@ -0,0 +1,225 @@
+"""
+常驻推理服务
+
+进程启动时一次性加载分割、地标点、牙轴模型，之后通过 HTTP（TCP 或
+Unix 域套接字）接收请求，并发请求在短时间窗口内合并为批次推理。
+仅依赖标准库 + torch/numpy。
+
+接口:
+    POST /segmentation    JSON {"points": [[x, y, z], ...]}，也可以直接发送
+    POST /landmarks       application/octet-stream 的 float32 xyz 数据；启动时给出 --mesh_root 时
+    POST /tooth_axis      还接受 {"path": "scan.obj"}（只能读取该目录下的文件）
+    GET  /stats           队列深度、批大小直方图、p50/p99 延迟
+    GET  /health
+
+用法:
+    python serving/server.py --segmentation_model checkpoints/segmentation/best_model.pth \\
+        --landmark_model checkpoints/landmarks/best_model.pth --port 8080
+    python serving/server.py --axis_model checkpoints/tooth_axis/best_model.pth \\
+        --unix_socket /tmp/dental_ai.sock
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import torch
+
+from common.utils import load_mesh
+from serving.batcher import DynamicBatcher
+from serving.models import load_model, PREDICTORS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='常驻推理服务')
+    parser.add_argument('--segmentation_model', type=str, default=None,
+                        help='分割模型检查点')
+    parser.add_argument('--landmark_model', type=str, default=None,
+                        help='地标点模型检查点')
+    parser.add_argument('--axis_model', type=str, default=None,
+                        help='牙轴模型检查点')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='监听地址')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='监听端口')
+    parser.add_argument('--unix_socket', type=str, default=None,
+                        help='使用 Unix 域套接字而不是 TCP')
+    parser.add_argument('--max_batch_size', type=int, default=16,
+                        help='单个批次的最大请求数')
+    parser.add_argument('--max_wait_ms', type=float, default=5.0,
+                        help='合并批次的最长等待时间（毫秒）')
+    parser.add_argument('--device', type=str, default='cuda',
+                        help='计算设备')
+    parser.add_argument('--mesh_root', type=str, default=None,
+                        help='允许 {"path": ...} 请求读取的网格目录，默认不接受 path 请求')
+    return parser.parse_args()
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    """监听 Unix 域套接字的 HTTP 服务"""
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def resolve_mesh_path(mesh_root, path):
+    """
+    把请求中的 path 解析为 mesh_root 下的文件（相对路径相对于 mesh_root）
+
+    解析符号链接和 .. 之后不在 mesh_root 下，或服务未配置 mesh_root 时抛出 PermissionError。
+    """
+    if mesh_root is None:
+        raise PermissionError("服务未开启 --mesh_root，不接受 path 请求，请直接发送点坐标")
+    root = Path(mesh_root).resolve()
+    resolved = (root / path).resolve()
+    try:
+        resolved.relative_to(root)
+    except ValueError:
+        raise PermissionError(f"路径不在允许的目录下: {path}") from None
+    return resolved
+
+
+def make_handler(batchers, mesh_root=None):
+    """构建请求处理类，batchers 为 {任务名: DynamicBatcher}，mesh_root 见 resolve_mesh_path"""
+
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def address_string(self):
+            # Unix 域套接字没有客户端地址
+            return self.client_address[0] if self.client_address else 'unix'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send(200, {task: batcher.stats() for task, batcher in batchers.items()})
+            elif self.path == '/health':
+                self._send(200, {'status': 'ok', 'tasks': sorted(batchers)})
+            else:
+                self._send(404, {'error': f"未知路径: {self.path}"})
+
+        def do_POST(self):
+            task = self.path.strip('/')
+            if task not in batchers:
+                self._send(404, {'error': f"模型未加载或路径未知: {self.path}"})
+                return
+
+            start = time.perf_counter()
+            try:
+                points = self._read_points()
+            except PermissionError as e:
+                self._send(403, {'error': str(e)})
+                return
+            except (ValueError, KeyError, OSError) as e:
+                self._send(400, {'error': str(e)})
+                return
+
+            batcher = batchers[task]
+            predictor = batcher.predictor
+            try:
+                inputs, context = predictor.preprocess(points)
+                output = batcher.submit(inputs).result()
+                result = predictor.postprocess(output, context)
+            except Exception as e:
+                self._send(500, {'error': str(e)})
+                return
+
+            batcher.record_latency(time.perf_counter() - start)
+            self._send(200, result)
+
+        def _read_points(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+
+            if self.headers.get('Content-Type', '') == 'application/octet-stream':
+                points = np.frombuffer(body, dtype='<f4').reshape(-1, 3)
+            else:
+                request = json.loads(body)
+                if 'path' in request:
+                    path = resolve_mesh_path(mesh_root, request['path'])
+                    points, _ = load_mesh(str(path), load_faces=False)
+                else:
+                    points = np.asarray(request['points'], dtype=np.float32).reshape(-1, 3)
+
+            if len(points) == 0:
+                raise ValueError("点云为空")
+            return np.ascontiguousarray(points, dtype=np.float32)
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return InferenceHandler
+
+
+def build_batchers(args, device):
+    """加载模型并为每个任务启动一个批处理线程"""
+    checkpoints = {
+        'segmentation': args.segmentation_model,
+        'landmarks': args.landmark_model,
+        'tooth_axis': args.axis_model,
+    }
+
+    batchers = {}
+    for task, checkpoint_path in checkpoints.items():
+        if checkpoint_path is None:
+            continue
+        print(f"加载 {task} 模型: {checkpoint_path}")
+        model = load_model(task, checkpoint_path, device)
+        predictor = PREDICTORS[task](model, device)
+        batchers[task] = DynamicBatcher(predictor, max_batch_size=args.max_batch_size,
+                                        max_wait_ms=args.max_wait_ms)
+    return batchers
+
+
+def main():
+    args = parse_args()
+
+    device = torch.device(args.device if torch.cuda.is_available() else 'cpu')
+    print(f"使用设备: {device}")
+
+    batchers = build_batchers(args, device)
+    if not batchers:
+        print("请至少指定 --segmentation_model、--landmark_model、--axis_model 之一")
+        return
+
+    handler = make_handler(batchers, args.mesh_root)
+    if args.unix_socket:
+        server = UnixHTTPServer(args.unix_socket, handler)
+        print(f"服务已启动: unix://{args.unix_socket}")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+        print(f"服务已启动: http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.unlink(args.unix_socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+MeshCache 测试
+"""
+
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from common.mesh_cache import MeshCache, MANIFEST
+
+
+def _make_loader(calls):
+    def loader(path):
+        calls.append(path)
+        return {'vertices': np.arange(12, dtype=np.float32).reshape(4, 3),
+                'faces': np.array([[0, 1, 2], [1, 2, 3]], dtype=np.int32)}
+    return loader
+
+
+def _entry(cache):
+    entries = [p for p in cache.cache_dir.iterdir() if not p.name.startswith('.tmp-')]
+    assert len(entries) == 1
+    return entries[0]
+
+
+def test_hit_does_not_reparse(tmp_path):
+    source = tmp_path / 'scan.obj'
+    source.write_text('v 0 0 0\n')
+    cache = MeshCache(tmp_path / 'cache')
+    calls = []
+
+    cache.load(source, _make_loader(calls))
+    arrays = cache.load(source, _make_loader(calls))
+
+    assert len(calls) == 1
+    assert set(arrays) == {'vertices', 'faces'}
+
+
+def test_partial_entry_is_reparsed(tmp_path):
+    source = tmp_path / 'scan.obj'
+    source.write_text('v 0 0 0\n')
+    cache = MeshCache(tmp_path / 'cache')
+    calls = []
+    cache.load(source, _make_loader(calls))
+
+    # 模拟其他 worker 淘汰条目时只删掉了一部分文件
+    (_entry(cache) / 'vertices.npy').unlink()
+    arrays = cache.load(source, _make_loader(calls))
+
+    assert len(calls) == 2
+    np.testing.assert_array_equal(arrays['vertices'], np.arange(12).reshape(4, 3))
+    assert (_entry(cache) / 'vertices.npy').exists()
+
+
+def test_entry_without_manifest_is_reparsed(tmp_path):
+    source = tmp_path / 'scan.obj'
+    source.write_text('v 0 0 0\n')
+    cache = MeshCache(tmp_path / 'cache')
+    calls = []
+    cache.load(source, _make_loader(calls))
+
+    (_entry(cache) / MANIFEST).unlink()
+    arrays = cache.load(source, _make_loader(calls))
+
+    assert len(calls) == 2
+    assert set(arrays) == {'vertices', 'faces'}
@@ -0,0 +1,201 @@
+"""
+模型导出工具
+
+把 BaseTrainer.save_checkpoint 保存的检查点导出为冻结的 TorchScript 模块和
+ONNX 图（batch 与点数为动态维度），部署时只需 common/runtime.py，
+不再依赖训练代码和模型类定义。
+
+用法:
+    python tools/export_model.py --task segmentation \\
+        --checkpoint checkpoints/segmentation/best_model.pth --output_dir exported/segmentation
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import torch
+
+from common.point_ops import ball_query
+from common.runtime import load_exported_model, META_FILE
+from serving.models import load_model
+
+
+# 任务 -> (默认采样点数, 输出名)
+TASKS = {
+    'segmentation': (10000, ['logits']),
+    'landmarks': (2048, ['landmarks']),
+    'tooth_axis': (2048, ['origin', 'direction']),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='导出 TorchScript / ONNX 模型')
+    parser.add_argument('--task', type=str, required=True, choices=sorted(TASKS),
+                        help='任务类型')
+    parser.add_argument('--checkpoint', type=str, required=True,
+                        help='检查点路径')
+    parser.add_argument('--output_dir', type=str, default='exported',
+                        help='输出目录')
+    parser.add_argument('--formats', type=str, nargs='+', default=['torchscript', 'onnx'],
+                        choices=['torchscript', 'onnx'],
+                        help='导出格式')
+    parser.add_argument('--num_points', type=int, default=None,
+                        help='示例输入点数，默认使用任务的采样点数')
+    parser.add_argument('--opset', type=int, default=17,
+                        help='ONNX opset 版本')
+    parser.add_argument('--no_verify', action='store_true',
+                        help='跳过导出后与原模型的输出对比')
+    return parser.parse_args()
+
+
+def build_meta(task, model, num_points):
+    """导出模型附带的元信息，推理时代替检查点中的配置字段"""
+    meta = {'task': task, 'num_points': num_points}
+    if task == 'segmentation':
+        meta['num_classes'] = model.num_classes
+        meta['model_type'] = model.model_type
+    elif task == 'landmarks':
+        meta['num_landmarks'] = model.num_landmarks
+    return meta
+
+
+def export_torchscript(model, example, meta, output_file):
+    """追踪并冻结模型，元信息写入 TorchScript 文件内部"""
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    frozen = torch.jit.freeze(traced)
+    torch.jit.save(frozen, str(output_file), _extra_files={META_FILE: json.dumps(meta)})
+
+
+def export_onnx(model, example, meta, output_file, output_names, opset):
+    """导出 ONNX 图，batch 和点数为动态维度，元信息写入同名 .json"""
+    dynamic_axes = {'points': {0: 'batch', 1: 'num_points'}}
+    for name in output_names:
+        dynamic_axes[name] = {0: 'batch'}
+    if meta['task'] == 'segmentation':
+        dynamic_axes['logits'][2] = 'num_points'
+
+    with torch.no_grad():
+        torch.onnx.export(model, (example,), str(output_file), input_names=['points'],
+                          output_names=output_names, dynamic_axes=dynamic_axes,
+                          opset_version=opset, dynamo=False)
+    with open(output_file.with_suffix('.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def verify(model, exported_file, num_points, atol=1e-4):
+    """
+    用与示例输入不同的 batch 和明显更大的点数（2 倍）检查导出模型与原模型的输出一致
+
+    点数只比示例多几个时，被追踪成常量的点数相关值（例如球查询的哨兵）几乎不影响
+    最终输出，所以用 2 倍点数和较严的误差阈值。
+    """
+    exported = load_exported_model(exported_file)
+    inputs = torch.randn(3, num_points * 2, 3)
+    with torch.no_grad():
+        expected = model(inputs)
+        start = time.perf_counter()
+        actual = exported(inputs)
+        elapsed = time.perf_counter() - start
+
+    if not isinstance(expected, tuple):
+        expected, actual = (expected,), (actual,)
+    max_diff = max(float((e - a).abs().max()) for e, a in zip(expected, actual))
+    print(f"  {exported_file.name}: {inputs.shape[1]} 点，最大误差 {max_diff:.2e}, "
+          f"单次前向 {elapsed * 1000:.1f} ms")
+    if not np.isfinite(max_diff) or max_diff > atol:
+        raise RuntimeError(f"导出模型输出与原模型不一致（最大误差 {max_diff:.2e} > {atol:.0e}）: {exported_file}")
+
+
+class _BallQuery(torch.nn.Module):
+    def __init__(self, radius, nsample):
+        super().__init__()
+        self.radius = radius
+        self.nsample = nsample
+
+    def forward(self, xyz, new_xyz):
+        return ball_query(xyz, new_xyz, self.radius, self.nsample)
+
+
+def _neighbor_mask(idx, num_points):
+    """(B, S, nsample) 邻居索引 -> (B, S, N) 邻居集合，补齐的重复索引不影响结果"""
+    mask = torch.zeros(idx.shape[0], idx.shape[1], num_points, dtype=torch.bool)
+    return mask.scatter(2, idx.long(), True)
+
+
+def check_ball_query(opset, num_points=128, radius=0.1, nsample=64):
+    """
+    导出 ONNX 时球查询换成稠密实现，单独检查它在点数变化后仍然正确
+
+    以 num_points 个点导出，在 3 倍点数上运行，邻居集合须与 eager 的网格实现以及
+    按距离直接求出的结果一致（nsample 大于任何中心点的邻居数，集合不会被截断）。
+    """
+    import onnxruntime as ort
+
+    xyz = torch.rand(2, num_points, 3)
+    module = _BallQuery(radius, nsample)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        onnx_file = Path(tmp_dir) / 'ball_query.onnx'
+        with torch.no_grad():
+            torch.onnx.export(module, (xyz, xyz[:, :16]), str(onnx_file), input_names=['xyz', 'new_xyz'],
+                              output_names=['idx'], dynamic_axes={'xyz': {0: 'batch', 1: 'num_points'},
+                                                                  'new_xyz': {0: 'batch', 1: 'npoint'}},
+                              opset_version=opset, dynamo=False)
+        session = ort.InferenceSession(str(onnx_file), providers=['CPUExecutionProvider'])
+
+        num_test = num_points * 3
+        xyz = torch.rand(3, num_test, 3)
+        new_xyz = xyz[:, :64]
+        exported = torch.from_numpy(session.run(None, {'xyz': xyz.numpy(), 'new_xyz': new_xyz.numpy()})[0])
+
+    expected = ((xyz.unsqueeze(1) - new_xyz.unsqueeze(2)) ** 2).sum(dim=-1) <= radius ** 2
+    if int(expected.sum(dim=-1).max()) > nsample:
+        raise RuntimeError("球查询检查的邻居数超过 nsample，请减小 radius")
+    eager = _neighbor_mask(module(xyz, new_xyz), num_test)
+    if not torch.equal(eager, expected) or not torch.equal(_neighbor_mask(exported, num_test), expected):
+        raise RuntimeError(f"导出的球查询在 {num_test} 个点（导出示例 {num_points} 个点）上与 eager 结果不一致")
+    print(f"  ball_query (ONNX): 导出 {num_points} 点，运行 {num_test} 点，邻居集合一致")
+
+
+def main():
+    args = parse_args()
+
+    default_points, output_names = TASKS[args.task]
+    num_points = args.num_points or default_points
+
+    model = load_model(args.task, args.checkpoint, torch.device('cpu'))
+    meta = build_meta(args.task, model, num_points)
+    example = torch.randn(2, num_points, 3)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(args.checkpoint).stem
+
+    exported_files = []
+    if 'torchscript' in args.formats:
+        output_file = output_dir / f"{stem}.pt"
+        export_torchscript(model, example, meta, output_file)
+        exported_files.append(output_file)
+    if 'onnx' in args.formats:
+        output_file = output_dir / f"{stem}.onnx"
+        export_onnx(model, example, meta, output_file, output_names, args.opset)
+        exported_files.append(output_file)
+
+    for output_file in exported_files:
+        print(f"已导出: {output_file}")
+    if not args.no_verify:
+        print("校验导出模型:")
+        if 'onnx' in args.formats:
+            check_ball_query(args.opset)
+        for output_file in exported_files:
+            verify(model, output_file, num_points)
+
+
+if __name__ == '__main__':
+    main()
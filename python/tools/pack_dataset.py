@@ -0,0 +1,135 @@
+"""
+数据集打包工具
+
+把逐文件存储的数据集（scans/ + labels/、scans/ + landmarks/、teeth/ + axes/）
+合并为连续的分片文件和偏移量索引，供 Packed*Dataset 内存映射读取。
+
+指定 --levels 时不保存全部顶点，而是为每个扫描预先计算几个分辨率的
+均匀子集（点云金字塔）及对应的逐点标签，训练时只读取需要的层级，
+单个样本的 I/O 和内存与 num_points 成正比，而不是与扫描的顶点数成正比。
+
+用法:
+    python tools/pack_dataset.py --task segmentation \\
+        --data_path data/segmentation/train --output data/packed/segmentation/train
+    python tools/pack_dataset.py --task segmentation --levels 2048 10000 50000 \\
+        --data_path data/segmentation/train --output data/packed/segmentation/train_pyramid
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from tqdm import tqdm
+
+from common.geometry import point_pyramid
+from common.packed import PackedWriter
+from segmentation.dataset import ToothSegmentationDataset
+from landmarks.dataset import LandmarkDataset
+from tooth_axis.dataset import ToothAxisDataset
+
+
+# 任务 -> (原始数据集类, 变长字段)
+TASKS = {
+    'segmentation': (ToothSegmentationDataset, ('points', 'labels')),
+    'landmarks': (LandmarkDataset, ('points', 'landmarks')),
+    'tooth_axis': (ToothAxisDataset, ('points',)),
+}
+
+# 逐点字段，构建金字塔时按层级切分
+POINT_FIELDS = ('points', 'labels')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='打包数据集为内存映射分片')
+    parser.add_argument('--task', type=str, required=True, choices=sorted(TASKS),
+                        help='任务类型')
+    parser.add_argument('--data_path', type=str, required=True,
+                        help='原始数据集目录')
+    parser.add_argument('--output', type=str, required=True,
+                        help='打包输出目录')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='解析进程数')
+    parser.add_argument('--levels', type=int, nargs='+', default=None,
+                        help='点云金字塔各层点数，例如 2048 10000 50000，默认保存全部顶点')
+    parser.add_argument('--method', type=str, default='fps', choices=['fps', 'voxel'],
+                        help='金字塔降采样方法')
+    return parser.parse_args()
+
+
+# 每个解析进程持有的数据集，由 _init_worker 设置
+_dataset = None
+_task = None
+_levels = None
+_method = None
+
+
+def _init_worker(dataset, task, levels=None, method='fps'):
+    global _dataset, _task, _levels, _method
+    _dataset, _task, _levels, _method = dataset, task, levels, method
+
+
+def _load_worker_sample(idx):
+    arrays = load_sample(_dataset, _task, idx)
+    if _levels:
+        arrays = build_levels(arrays, _levels, _method)
+    return arrays
+
+
+def load_sample(dataset, task, idx):
+    """读取一个样本的原始数组"""
+    if task == 'segmentation':
+        points, labels = dataset.load_raw(idx)
+        return {'points': points, 'labels': labels.astype(np.int32)}
+    if task == 'landmarks':
+        points, landmarks = dataset.load_raw(idx)
+        return {'points': points, 'landmarks': landmarks}
+    points, origin, direction = dataset.load_raw(idx)
+    return {'points': points, 'axes': np.concatenate([origin, direction])}
+
+
+def build_levels(arrays, levels, method='fps'):
+    """把逐点字段替换为各金字塔层级的子集，其余字段保持不变"""
+    pyramid = point_pyramid(arrays['points'], levels, method=method)
+    result = {field: array for field, array in arrays.items() if field not in POINT_FIELDS}
+    for level, indices in pyramid.items():
+        for field in POINT_FIELDS:
+            if field in arrays:
+                result[f"{field}_{level}"] = arrays[field][indices]
+    return result
+
+
+def pack(task, data_path, output, workers=4, levels=None, method='fps'):
+    """打包数据集，返回样本数"""
+    dataset_cls, ragged = TASKS[task]
+    dataset = dataset_cls(data_path)
+    names = [Path(next(iter(sample.values()))).stem for sample in dataset.samples]
+
+    meta = {}
+    if levels:
+        # 每层点数固定，逐点字段不再是变长字段
+        ragged = tuple(field for field in ragged if field not in POINT_FIELDS)
+        meta = {'levels': sorted(set(levels)), 'method': method}
+
+    with PackedWriter(output, task, ragged=ragged, meta=meta) as writer, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(dataset, task, levels, method)) as executor:
+        # map 保持样本顺序，解析并行、写入顺序进行
+        results = executor.map(_load_worker_sample, range(len(dataset)), chunksize=8)
+        for name, arrays in tqdm(zip(names, results), total=len(names), desc="Packing"):
+            writer.add(name, arrays)
+
+    return len(names)
+
+
+def main():
+    args = parse_args()
+    num_samples = pack(args.task, args.data_path, args.output, args.workers,
+                       levels=args.levels, method=args.method)
+    print(f"已打包 {num_samples} 个样本到: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+把带逐顶点标签的牙弓数据集拆分为单颗牙齿数据集
+
+输入为分割数据集目录（scans/*.obj 或 *.ply + labels/*.json），每个扫描按标签拆分为
+每颗牙齿一个紧凑网格（面的顶点索引重新编号），写到输出目录的 teeth/ 下，
+文件名为 {扫描名}_{标签}.obj（--format ply 时为 .ply），可直接作为 ToothAxisDataset /
+ToothMultiTaskDataset 的 teeth/ 目录或 LandmarkDataset 的 scans/ 目录（标注另行提供），
+这些数据集同时读取 .obj 和 .ply。每个扫描由进程池中的一个进程读取、拆分和写出，
+标签数与顶点数不一致的扫描给出警告并跳过。
+
+用法:
+    python tools/split_teeth.py --data_path data/segmentation/train --output data/teeth/train
+    python tools/split_teeth.py --data_path data/segmentation/train --output data/teeth/train \\
+        --format ply --min_vertices 200 --workers 8
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from tqdm import tqdm
+
+from common.utils import load_mesh, load_json_arrays, save_mesh
+from common.geometry import split_mesh_by_label
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='按分割标签拆分牙弓为单颗牙齿网格')
+    parser.add_argument('--data_path', type=str, required=True,
+                        help='分割数据集目录（scans/ + labels/）')
+    parser.add_argument('--output', type=str, required=True,
+                        help='输出目录，牙齿网格写到其中的 teeth/')
+    parser.add_argument('--format', type=str, default='obj', choices=['obj', 'ply'],
+                        help='输出格式')
+    parser.add_argument('--ignore', type=int, nargs='*', default=[0],
+                        help='不输出的标签（默认背景 0）')
+    parser.add_argument('--min_vertices', type=int, default=100,
+                        help='顶点数少于该值的标签不输出')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='进程数')
+    return parser.parse_args()
+
+
+def find_scans(data_path):
+    """返回 (扫描文件, 标签文件) 列表，只包含有标签的扫描"""
+    data_path = Path(data_path)
+    pairs = []
+    scan_dir = data_path / 'scans'
+    for scan_file in sorted(scan_dir.glob('*.obj')) + sorted(scan_dir.glob('*.ply')):
+        label_file = data_path / 'labels' / f"{scan_file.stem}.json"
+        if label_file.exists():
+            pairs.append((scan_file, label_file))
+    return pairs
+
+
+def split_scan(scan_file, label_file, output_dir, fmt='obj', ignore=(0,), min_vertices=100):
+    """
+    拆分一个扫描并写出所有牙齿网格
+
+    Returns:
+        (扫描名, 写出的牙齿数)
+    """
+    vertices, faces = load_mesh(str(scan_file))
+    labels = load_json_arrays(label_file, {'labels': np.int64})['labels']
+    parts = split_mesh_by_label(vertices, faces, labels, ignore=ignore, min_vertices=min_vertices)
+    for label, (tooth_vertices, tooth_faces) in parts.items():
+        save_mesh(str(Path(output_dir) / f"{scan_file.stem}_{label}.{fmt}"), tooth_vertices, tooth_faces)
+    return scan_file.stem, len(parts)
+
+
+def _split_worker(args):
+    """拆分一个扫描，标签与网格不匹配时返回 (扫描名, None, 错误信息)"""
+    try:
+        return split_scan(*args) + (None,)
+    except ValueError as e:
+        return args[0].stem, None, str(e)
+
+
+def split_dataset(data_path, output, fmt='obj', ignore=(0,), min_vertices=100, workers=4):
+    """拆分整个数据集，返回 (拆分的扫描数, 牙齿数, 跳过的扫描数)"""
+    pairs = find_scans(data_path)
+    output_dir = Path(output) / 'teeth'
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tasks = [(scan_file, label_file, output_dir, fmt, tuple(ignore), min_vertices)
+             for scan_file, label_file in pairs]
+    num_teeth = 0
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for name, count, error in tqdm(executor.map(_split_worker, tasks), total=len(tasks), desc="Splitting"):
+            if error is not None:
+                tqdm.write(f"警告: 跳过 {name}: {error}")
+                skipped += 1
+                continue
+            num_teeth += count
+    return len(pairs) - skipped, num_teeth, skipped
+
+
+def main():
+    args = parse_args()
+    num_scans, num_teeth, skipped = split_dataset(args.data_path, args.output, args.format, args.ignore,
+                                                  args.min_vertices, args.workers)
+    print(f"已拆分 {num_scans} 个扫描，共 {num_teeth} 颗牙齿，保存到: {Path(args.output) / 'teeth'}")
+    if skipped:
+        print(f"跳过 {skipped} 个标签与网格不匹配的扫描")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,8 @@
 牙轴检测模块
 """
 
-from .model import ToothAxisModel, angular_loss
-from .dataset import ToothAxisDataset
+from .model import ToothAxisModel, AxisLoss, angular_loss
+from .dataset import ToothAxisDataset, PackedToothAxisDataset
 
-__all__ = ['ToothAxisModel', 'angular_loss', 'ToothAxisDataset']
+__all__ = ['ToothAxisModel', 'AxisLoss', 'angular_loss', 'ToothAxisDataset',
+           'PackedToothAxisDataset']
@@ -6,16 +6,27 @@ import torch
 from torch.utils.data import Dataset
 import numpy as np
 from pathlib import Path
-import json
+
+from common.utils import load_mesh, load_json_arrays
+from common.mesh_cache import MeshCache
+from common.packed import PackedArrays
 
 
 class ToothAxisDataset(Dataset):
-    """牙轴检测数据集"""
+    """
+    牙轴检测数据集
+    
+    点云和牙轴起点平移到质心并缩放到单位球。return_scale=True 时额外返回缩放系数，
+    验证时用它把起点误差换算回原始单位（mm）。
+    """
     
-    def __init__(self, data_path, num_points=2048, augment=False):
+    def __init__(self, data_path, num_points=2048, augment=False,
+                 cache_dir=None, cache_max_size_gb=None, return_scale=False):
         self.data_path = Path(data_path)
         self.num_points = num_points
         self.augment = augment
+        self.return_scale = return_scale
+        self.cache = MeshCache(cache_dir, cache_max_size_gb) if cache_dir else None
         self.samples = self._load_samples()
     
     def _load_samples(self):
@@ -26,7 +37,7 @@ class ToothAxisDataset(Dataset):
         if not tooth_dir.exists():
             return samples
         
-        for tooth_file in tooth_dir.glob('*.obj'):
+        for tooth_file in sorted(tooth_dir.glob('*.obj')) + sorted(tooth_dir.glob('*.ply')):
             axis_file = axis_dir / f"{tooth_file.stem}.json"
             if axis_file.exists():
                 samples.append({
@@ -40,13 +51,8 @@ class ToothAxisDataset(Dataset):
         return len(self.samples)
     
     def __getitem__(self, idx):
-        sample = self.samples[idx]
-        
-        # 加载牙齿点云
-        points = self._load_points(sample['tooth'])
-        
-        # 加载牙轴
-        origin, direction = self._load_axis(sample['axis'])
+        # 加载牙齿点云和牙轴
+        points, origin, direction = self.load_raw(idx)
         
         # 采样点
         if len(points) > self.num_points:
@@ -61,32 +67,53 @@ class ToothAxisDataset(Dataset):
         points = points - centroid
         origin = origin - centroid
         
-        max_dist = np.max(np.linalg.norm(points, axis=1))
-        points = points / (max_dist + 1e-8)
-        origin = origin / (max_dist + 1e-8)
+        max_dist = np.max(np.linalg.norm(points, axis=1)) + 1e-8
+        points = points / max_dist
+        origin = origin / max_dist
         
         # 转为tensor
         points = torch.from_numpy(points).float()
         origin = torch.from_numpy(origin).float()
         direction = torch.from_numpy(direction).float()
         
+        if self.return_scale:
+            return points, origin, direction, torch.tensor(max_dist, dtype=torch.float32)
+        return points, origin, direction
+    
+    def load_raw(self, idx):
+        """读取原始牙齿点云和牙轴（未采样、未归一化）"""
+        sample = self.samples[idx]
+        points = self._load_points(sample['tooth'])
+        origin, direction = self._load_axis(sample['axis'])
         return points, origin, direction
     
     def _load_points(self, tooth_path):
-        vertices = []
-        with open(tooth_path, 'r') as f:
-            for line in f:
-                if line.startswith('v '):
-                    parts = line.strip().split()
-                    vertex = [float(parts[1]), float(parts[2]), float(parts[3])]
-                    vertices.append(vertex)
-        return np.array(vertices, dtype=np.float32)
+        vertices, _ = load_mesh(tooth_path, load_faces=False, cache=self.cache)
+        return vertices
     
     def _load_axis(self, axis_path):
-        with open(axis_path, 'r') as f:
-            data = json.load(f)
-        origin = np.array(data['origin'], dtype=np.float32)
-        direction = np.array(data['direction'], dtype=np.float32)
+        axis = load_json_arrays(axis_path, {'origin': np.float32, 'direction': np.float32},
+                                cache=self.cache)
+        origin = axis['origin']
+        direction = axis['direction']
         # 归一化方向向量
         direction = direction / (np.linalg.norm(direction) + 1e-8)
         return origin, direction
+
+
+class PackedToothAxisDataset(ToothAxisDataset):
+    """从打包分片读取的牙轴检测数据集"""
+    
+    def __init__(self, data_path, num_points=2048, augment=False, level=None, return_scale=False):
+        self.requested_level = level
+        super().__init__(data_path, num_points=num_points, augment=augment, return_scale=return_scale)
+    
+    def _load_samples(self):
+        self.pack = PackedArrays(self.data_path, task='tooth_axis')
+        # 点云金字塔只读取一个层级，默认取不小于 num_points 的最小层级
+        self.level = self.pack.resolve_level(self.num_points, self.requested_level)
+        return self.pack.names
+    
+    def load_raw(self, idx):
+        axis = self.pack.get('axes', idx)
+        return self.pack.get('points', idx, self.level), axis[:3], axis[3:]
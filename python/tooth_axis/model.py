@@ -99,3 +99,30 @@ def angular_loss(pred_direction, gt_direction):
     loss = 1.0 - cos_sim.abs()  # 使用 abs 因为方向可能相反
     
     return loss.mean()
+
+
+class AxisLoss(nn.Module):
+    """
+    牙轴组合损失：起点 MSE + 方向角度损失
+    
+    Args:
+        origin_weight: 起点损失权重
+        direction_weight: 方向损失权重
+    """
+    
+    def __init__(self, origin_weight=1.0, direction_weight=2.0):
+        super(AxisLoss, self).__init__()
+        self.origin_weight = origin_weight
+        self.direction_weight = direction_weight
+    
+    def forward(self, outputs, targets):
+        """
+        Args:
+            outputs: (origin, direction) 模型输出
+            targets: (origin, direction) 真实牙轴，验证集可以附带缩放系数 (origin, direction, scale)，
+                scale 只用于指标换算，损失忽略它
+        """
+        pred_origin, pred_direction = outputs
+        gt_origin, gt_direction = targets[0], targets[1]
+        return (self.origin_weight * F.mse_loss(pred_origin, gt_origin) +
+                self.direction_weight * angular_loss(pred_direction, gt_direction))
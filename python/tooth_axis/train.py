@@ -3,18 +3,22 @@
 """
 
 import torch
-import torch.nn as nn
 from torch.utils.data import DataLoader
 import argparse
 import yaml
+from functools import partial
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
-from tooth_axis.model import ToothAxisModel
-from tooth_axis.dataset import ToothAxisDataset
+from tooth_axis.model import ToothAxisModel, AxisLoss
+from tooth_axis.dataset import ToothAxisDataset, PackedToothAxisDataset
 from common.base_trainer import BaseTrainer
-from common.utils import setup_logger
+from common.augmentation import build_augmentation
+from common.metrics import AxisMeter
+from common.distributed import (launch, setup_distributed, cleanup_distributed, build_sampler,
+                                get_world_size, setup_main_logger)
+from common.loader_tuning import tune_dataloader
 
 
 def parse_args():
@@ -22,43 +26,83 @@ def parse_args():
     parser.add_argument('--config', type=str, default='tooth_axis/config.yaml')
     parser.add_argument('--resume', type=str, default=None)
     parser.add_argument('--gpus', type=str, default='0')
+    parser.add_argument('--nproc', type=int, default=None,
+                        help='数据并行的进程数，默认为 --gpus 中的 GPU 数（无 CUDA 时为 1）')
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
-    
+    gpus = [int(gpu) for gpu in args.gpus.split(',')]
+    world_size = args.nproc or (len(gpus) if torch.cuda.is_available() else 1)
+    launch(train, world_size, args)
+
+
+def train(args):
+    """单个训练进程，多进程时每个进程各运行一次"""
     with open(args.config, 'r') as f:
         config = yaml.safe_load(f)
     
-    device = torch.device(f"cuda:{args.gpus.split(',')[0]}" if torch.cuda.is_available() else "cpu")
-    logger = setup_logger('tooth_axis_train', config['training']['log_dir'])
+    device = setup_distributed([int(gpu) for gpu in args.gpus.split(',')])
+    logger = setup_main_logger('tooth_axis_train', config['training']['log_dir'])
     
-    # 数据集
-    train_dataset = ToothAxisDataset(config['data']['train_path'], augment=True)
-    val_dataset = ToothAxisDataset(config['data']['val_path'], augment=False)
+    # 批量增强（stage 为 collate / device 时代替数据集中的逐样本增强）
+    augmentation = build_augmentation(config.get('augmentation'), target_types=('points', 'directions'))
     
-    train_loader = DataLoader(train_dataset, batch_size=config['training']['batch_size'],
-                             shuffle=True, num_workers=4)
-    val_loader = DataLoader(val_dataset, batch_size=config['training']['batch_size'],
-                           shuffle=False, num_workers=4)
+    # 数据集
+    if config['data'].get('packed', False):
+        dataset_cls = PackedToothAxisDataset
+        dataset_kwargs = dict(level=config['data'].get('pyramid_level'))
+    else:
+        dataset_cls = ToothAxisDataset
+        dataset_kwargs = dict(cache_dir=config['data'].get('cache_dir'),
+                              cache_max_size_gb=config['data'].get('cache_max_size_gb'))
+    train_dataset = dataset_cls(config['data']['train_path'], augment=augmentation is None,
+                                **dataset_kwargs)
+    # 验证集额外返回归一化缩放系数，起点误差换算回 mm
+    val_dataset = dataset_cls(config['data']['val_path'], augment=False, return_scale=True,
+                              **dataset_kwargs)
     
     # 模型
     model = ToothAxisModel(backbone=config['model']['backbone']).to(device)
     
     # 损失函数：Angular loss for direction + MSE for origin
-    criterion = nn.MSELoss()
+    criterion = AxisLoss(origin_weight=config['loss'].get('origin_weight', 1.0),
+                         direction_weight=config['loss'].get('direction_weight', 2.0))
+    
+    # DataLoader 参数：配置中未指定的由校准选择（读取耗时 vs 模型步耗时）
+    collate_fn = augmentation.collate_fn if augmentation else None
+    loader_kwargs = tune_dataloader(train_dataset, model, criterion, device, config['training'],
+                                    collate_fn=collate_fn, world_size=get_world_size(), logger=logger)
+    
+    # 多进程时每个进程只读取 DistributedSampler 分到的样本
+    train_sampler = build_sampler(train_dataset, shuffle=True)
+    val_sampler = build_sampler(val_dataset, shuffle=False)
+    train_loader = DataLoader(train_dataset, shuffle=train_sampler is None, sampler=train_sampler,
+                             collate_fn=collate_fn, **loader_kwargs)
+    val_loader = DataLoader(val_dataset, shuffle=False, sampler=val_sampler, **loader_kwargs)
     
     optimizer = torch.optim.Adam(model.parameters(), 
                                 lr=config['training']['learning_rate'])
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, 
                                                            T_max=config['training']['epochs'])
     
+    # 验证指标：起点误差（mm）、方向夹角及其分位数
+    metrics = partial(AxisMeter, config.get('evaluation', {}).get('angle_percentiles', (50, 90, 95)))
+    
     trainer = BaseTrainer(model, train_loader, val_loader, criterion,
-                         optimizer, scheduler, device, config)
+                         optimizer, scheduler, device, config, metrics=metrics,
+                         logger=logger, augmentation=augmentation)
     
-    trainer.train(epochs=config['training']['epochs'],
+    start_epoch = 0
+    if args.resume:
+        logger.info(f"从检查点恢复: {args.resume}")
+        start_epoch = trainer.load_checkpoint(args.resume)
+    
+    trainer.train(epochs=config['training']['epochs'], start_epoch=start_epoch,
                  save_dir=config['training']['checkpoint_dir'])
+    
+    cleanup_distributed()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,8 @@
+"""
+单颗牙齿多任务模块（地标点 + 牙轴，共享主干）
+"""
+
+from .model import ToothMultiTaskModel, MultiTaskLoss
+from .dataset import ToothMultiTaskDataset
+
+__all__ = ['ToothMultiTaskModel', 'MultiTaskLoss', 'ToothMultiTaskDataset']
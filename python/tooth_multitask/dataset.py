@@ -0,0 +1,101 @@
+"""
+单颗牙齿多任务数据集（地标点 + 牙轴）
+"""
+
+import torch
+from torch.utils.data import Dataset
+import numpy as np
+from pathlib import Path
+
+from common.utils import load_mesh, load_json_arrays
+from common.mesh_cache import MeshCache
+
+
+class ToothMultiTaskDataset(Dataset):
+    """
+    单颗牙齿多任务数据集
+    
+    目录结构为 teeth/*.obj（或 *.ply）+ landmarks/*.json + axes/*.json，同名文件为同一颗牙齿，
+    只使用同时有地标点和牙轴标注的牙齿。归一化与 LandmarkDataset / ToothAxisDataset 相同，
+    return_scale=True 时额外返回缩放系数。
+    """
+    
+    def __init__(self, data_path, num_points=2048, augment=False,
+                 cache_dir=None, cache_max_size_gb=None, return_scale=False):
+        self.data_path = Path(data_path)
+        self.num_points = num_points
+        self.augment = augment
+        self.return_scale = return_scale
+        self.cache = MeshCache(cache_dir, cache_max_size_gb) if cache_dir else None
+        self.samples = self._load_samples()
+    
+    def _load_samples(self):
+        samples = []
+        tooth_dir = self.data_path / 'teeth'
+        landmark_dir = self.data_path / 'landmarks'
+        axis_dir = self.data_path / 'axes'
+        
+        if not tooth_dir.exists():
+            return samples
+        
+        for tooth_file in sorted(tooth_dir.glob('*.obj')) + sorted(tooth_dir.glob('*.ply')):
+            landmark_file = landmark_dir / f"{tooth_file.stem}.json"
+            axis_file = axis_dir / f"{tooth_file.stem}.json"
+            if landmark_file.exists() and axis_file.exists():
+                samples.append({
+                    'tooth': str(tooth_file),
+                    'landmarks': str(landmark_file),
+                    'axis': str(axis_file)
+                })
+        
+        return samples
+    
+    def __len__(self):
+        return len(self.samples)
+    
+    def __getitem__(self, idx):
+        points, landmarks, origin, direction = self.load_raw(idx)
+        
+        # 采样点
+        replace = len(points) < self.num_points
+        if len(points) != self.num_points:
+            indices = np.random.choice(len(points), self.num_points, replace=replace)
+            points = points[indices]
+        
+        # 归一化：点云、地标点和牙轴起点使用同样的平移和缩放
+        centroid = points.mean(axis=0)
+        points = points - centroid
+        max_dist = np.max(np.linalg.norm(points, axis=1)) + 1e-8
+        points = points / max_dist
+        landmarks = (landmarks - centroid) / max_dist
+        origin = (origin - centroid) / max_dist
+        
+        # 随机绕 z 轴旋转，方向向量同步旋转
+        if self.augment and np.random.random() > 0.5:
+            theta = np.random.uniform(0, 2 * np.pi)
+            rotation_matrix = np.array([
+                [np.cos(theta), -np.sin(theta), 0],
+                [np.sin(theta), np.cos(theta), 0],
+                [0, 0, 1]
+            ], dtype=np.float32)
+            points = points @ rotation_matrix.T
+            landmarks = landmarks @ rotation_matrix.T
+            origin = origin @ rotation_matrix.T
+            direction = direction @ rotation_matrix.T
+        
+        sample = (torch.from_numpy(points).float(), torch.from_numpy(landmarks).float(),
+                  torch.from_numpy(origin).float(), torch.from_numpy(direction).float())
+        if self.return_scale:
+            sample += (torch.tensor(max_dist, dtype=torch.float32),)
+        return sample
+    
+    def load_raw(self, idx):
+        """读取原始牙齿点云、地标点和牙轴（未采样、未归一化）"""
+        sample = self.samples[idx]
+        vertices, _ = load_mesh(sample['tooth'], load_faces=False, cache=self.cache)
+        landmarks = load_json_arrays(sample['landmarks'], {'landmarks': np.float32},
+                                     cache=self.cache)['landmarks']
+        axis = load_json_arrays(sample['axis'], {'origin': np.float32, 'direction': np.float32},
+                                cache=self.cache)
+        direction = axis['direction'] / (np.linalg.norm(axis['direction']) + 1e-8)
+        return vertices, landmarks, axis['origin'], direction
@@ -0,0 +1,155 @@
+"""
+单颗牙齿多任务模型：地标点 + 牙轴
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from tooth_axis.model import AxisLoss
+
+
+class ToothMultiTaskModel(nn.Module):
+    """
+    共享 PointNet 主干的地标点 + 牙轴模型
+    输入: 单个牙齿的点云
+    输出: 地标点坐标、牙轴起点和方向
+    
+    主干与 LandmarkDetectionModel / ToothAxisModel 相同（3→64→128→256→512 的逐点 MLP +
+    全局最大池化），全局特征只计算一次，分别送入地标点头和牙轴头，
+    两个头与对应单任务模型的回归层结构相同，可以用 load_single_task_weights 初始化。
+    """
+    
+    def __init__(self, num_landmarks=10, input_dim=3):
+        super(ToothMultiTaskModel, self).__init__()
+        
+        self.num_landmarks = num_landmarks
+        
+        # 共享特征提取器（与 LandmarkDetectionModel.feature_extractor 的参数名一致）
+        self.feature_extractor = nn.Sequential(
+            nn.Conv1d(input_dim, 64, 1),
+            nn.BatchNorm1d(64),
+            nn.ReLU(),
+            
+            nn.Conv1d(64, 128, 1),
+            nn.BatchNorm1d(128),
+            nn.ReLU(),
+            
+            nn.Conv1d(128, 256, 1),
+            nn.BatchNorm1d(256),
+            nn.ReLU(),
+            
+            nn.Conv1d(256, 512, 1),
+            nn.BatchNorm1d(512),
+            nn.ReLU()
+        )
+        
+        # 地标点回归头
+        self.landmark_head = nn.ModuleDict({
+            'fc1': nn.Linear(512, 256),
+            'fc2': nn.Linear(256, 128),
+            'fc3': nn.Linear(128, num_landmarks * 3),
+        })
+        
+        # 牙轴回归头
+        self.axis_head = nn.ModuleDict({
+            'fc1': nn.Linear(512, 256),
+            'fc2': nn.Linear(256, 128),
+            'fc_origin': nn.Linear(128, 3),
+            'fc_direction': nn.Linear(128, 3),
+        })
+        
+        self.dropout = nn.Dropout(0.5)
+    
+    def forward(self, x):
+        """
+        Args:
+            x: (B, N, 3) 牙齿点云
+        
+        Returns:
+            landmarks: (B, num_landmarks, 3) 地标点坐标
+            origin: (B, 3) 牙轴起点
+            direction: (B, 3) 牙轴方向（单位向量）
+        """
+        B = x.shape[0]
+        
+        # 共享全局特征
+        features = self.feature_extractor(x.transpose(1, 2))  # (B, 512, N)
+        features = torch.max(features, dim=2)[0]  # (B, 512)
+        
+        # 地标点
+        head = self.landmark_head
+        y = self.dropout(F.relu(head['fc1'](features)))
+        y = self.dropout(F.relu(head['fc2'](y)))
+        landmarks = head['fc3'](y).view(B, self.num_landmarks, 3)
+        
+        # 牙轴
+        head = self.axis_head
+        y = self.dropout(F.relu(head['fc1'](features)))
+        y = self.dropout(F.relu(head['fc2'](y)))
+        origin = head['fc_origin'](y)
+        direction = F.normalize(head['fc_direction'](y), p=2, dim=1)
+        
+        return landmarks, origin, direction
+    
+    def load_single_task_weights(self, landmark_state=None, axis_state=None, backbone='landmarks'):
+        """
+        从单任务模型的参数初始化
+        
+        两个单任务模型各自训练了一个主干，这里只能保留其中一个，另一个任务的回归头
+        原本接在不同的主干上，需要在多任务数据上微调后才能使用。
+        
+        Args:
+            landmark_state: LandmarkDetectionModel 的 state_dict
+            axis_state: ToothAxisModel 的 state_dict
+            backbone: 主干参数来自 'landmarks' 还是 'tooth_axis'
+        
+        Returns:
+            未能从单任务参数初始化的参数名列表
+        """
+        state = {}
+        if landmark_state is not None:
+            for key, value in landmark_state.items():
+                if key.startswith('fc'):
+                    state[f'landmark_head.{key}'] = value
+                elif key.startswith('feature_extractor.') and backbone == 'landmarks':
+                    state[key] = value
+        if axis_state is not None:
+            for key, value in axis_state.items():
+                name, _, param = key.partition('.')
+                if name.startswith('fc'):
+                    state[f'axis_head.{key}'] = value
+                elif backbone == 'tooth_axis' and name[:-1] in ('conv', 'bn'):
+                    # convK / bnK 对应 Sequential 中第 3(K-1) / 3(K-1)+1 层
+                    index = 3 * (int(name[-1]) - 1) + (name[:-1] == 'bn')
+                    state[f'feature_extractor.{index}.{param}'] = value
+        
+        missing, unexpected = self.load_state_dict(state, strict=False)
+        if unexpected:
+            raise KeyError(f"无法识别的参数: {unexpected}")
+        return missing
+
+
+class MultiTaskLoss(nn.Module):
+    """
+    多任务组合损失：地标点 MSE + 牙轴起点 MSE + 方向角度损失
+    
+    Args:
+        landmark_weight: 地标点损失权重
+        origin_weight: 牙轴起点损失权重
+        direction_weight: 牙轴方向损失权重
+    """
+    
+    def __init__(self, landmark_weight=1.0, origin_weight=1.0, direction_weight=2.0):
+        super(MultiTaskLoss, self).__init__()
+        self.landmark_weight = landmark_weight
+        self.axis_loss = AxisLoss(origin_weight, direction_weight)
+    
+    def forward(self, outputs, targets):
+        """
+        Args:
+            outputs: (landmarks, origin, direction) 模型输出
+            targets: (landmarks, origin, direction) 真值，验证集附带的缩放系数被忽略
+        """
+        return (self.landmark_weight * F.mse_loss(outputs[0], targets[0]) +
+                self.axis_loss(outputs[1:], targets[1:3]))
@@ -0,0 +1,135 @@
+"""
+地标点 + 牙轴多任务模型训练
+"""
+
+import torch
+from torch.utils.data import DataLoader
+import argparse
+import yaml
+from functools import partial
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tooth_multitask.model import ToothMultiTaskModel, MultiTaskLoss
+from tooth_multitask.dataset import ToothMultiTaskDataset
+from common.base_trainer import BaseTrainer
+from common.augmentation import build_augmentation
+from common.metrics import LandmarkAxisMeter
+from common.distributed import (launch, setup_distributed, cleanup_distributed, build_sampler,
+                                get_world_size, setup_main_logger)
+from common.loader_tuning import tune_dataloader
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='训练地标点 + 牙轴多任务模型')
+    parser.add_argument('--config', type=str, default='tooth_multitask/config.yaml')
+    parser.add_argument('--resume', type=str, default=None)
+    parser.add_argument('--landmark_checkpoint', type=str, default=None,
+                        help='用地标点模型检查点初始化（覆盖配置 model.init）')
+    parser.add_argument('--axis_checkpoint', type=str, default=None,
+                        help='用牙轴模型检查点初始化（覆盖配置 model.init）')
+    parser.add_argument('--backbone_from', type=str, default=None, choices=['landmarks', 'tooth_axis'])
+    parser.add_argument('--gpus', type=str, default='0')
+    parser.add_argument('--nproc', type=int, default=None,
+                        help='数据并行的进程数，默认为 --gpus 中的 GPU 数（无 CUDA 时为 1）')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    gpus = [int(gpu) for gpu in args.gpus.split(',')]
+    world_size = args.nproc or (len(gpus) if torch.cuda.is_available() else 1)
+    launch(train, world_size, args)
+
+
+def load_model_state(path):
+    """读取 BaseTrainer 检查点中的模型参数"""
+    if path is None:
+        return None
+    return torch.load(path, map_location='cpu')['model_state_dict']
+
+
+def train(args):
+    """单个训练进程，多进程时每个进程各运行一次"""
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    
+    device = setup_distributed([int(gpu) for gpu in args.gpus.split(',')])
+    logger = setup_main_logger('tooth_multitask_train', config['training']['log_dir'])
+    
+    # 批量增强：地标点和牙轴起点随点云一起变换，方向只旋转
+    augmentation = build_augmentation(config.get('augmentation'),
+                                      target_types=('points', 'points', 'directions'))
+    
+    # 数据集
+    dataset_kwargs = dict(num_points=config['data'].get('num_points', 2048),
+                          cache_dir=config['data'].get('cache_dir'),
+                          cache_max_size_gb=config['data'].get('cache_max_size_gb'))
+    train_dataset = ToothMultiTaskDataset(config['data']['train_path'], augment=augmentation is None,
+                                          **dataset_kwargs)
+    # 验证集额外返回归一化缩放系数，地标点和起点误差换算回 mm
+    val_dataset = ToothMultiTaskDataset(config['data']['val_path'], augment=False, return_scale=True,
+                                        **dataset_kwargs)
+    
+    # 模型：共享主干，地标点头 + 牙轴头
+    model = ToothMultiTaskModel(num_landmarks=config['data']['num_landmarks'])
+    
+    # 从单任务检查点初始化（--resume 时会被检查点中的参数覆盖）
+    init = config['model'].get('init') or {}
+    landmark_checkpoint = args.landmark_checkpoint or init.get('landmark_checkpoint')
+    axis_checkpoint = args.axis_checkpoint or init.get('axis_checkpoint')
+    if landmark_checkpoint or axis_checkpoint:
+        missing = model.load_single_task_weights(
+            landmark_state=load_model_state(landmark_checkpoint),
+            axis_state=load_model_state(axis_checkpoint),
+            backbone=args.backbone_from or init.get('backbone_from', 'landmarks'))
+        logger.info(f"从单任务检查点初始化，{len(missing)} 个参数保持随机初始化")
+    model = model.to(device)
+    
+    # 损失函数：地标点 MSE + 牙轴起点 MSE + 方向角度损失
+    criterion = MultiTaskLoss(landmark_weight=config['loss'].get('landmark_weight', 1.0),
+                              origin_weight=config['loss'].get('origin_weight', 1.0),
+                              direction_weight=config['loss'].get('direction_weight', 2.0))
+    
+    # DataLoader 参数：配置中未指定的由校准选择（读取耗时 vs 模型步耗时）
+    collate_fn = augmentation.collate_fn if augmentation else None
+    loader_kwargs = tune_dataloader(train_dataset, model, criterion, device, config['training'],
+                                    collate_fn=collate_fn, world_size=get_world_size(), logger=logger)
+    
+    # 多进程时每个进程只读取 DistributedSampler 分到的样本
+    train_sampler = build_sampler(train_dataset, shuffle=True)
+    val_sampler = build_sampler(val_dataset, shuffle=False)
+    train_loader = DataLoader(train_dataset, shuffle=train_sampler is None, sampler=train_sampler,
+                             collate_fn=collate_fn, **loader_kwargs)
+    val_loader = DataLoader(val_dataset, shuffle=False, sampler=val_sampler, **loader_kwargs)
+    
+    optimizer = torch.optim.Adam(model.parameters(), 
+                                lr=config['training']['learning_rate'])
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, 
+                                                           T_max=config['training']['epochs'])
+    
+    # 验证指标：地标点 MRE / PCK + 牙轴起点误差、方向夹角
+    evaluation = config.get('evaluation', {})
+    metrics = partial(LandmarkAxisMeter,
+                      evaluation.get('pck_thresholds', (1.0, 2.0, 3.0, 5.0)),
+                      evaluation.get('angle_percentiles', (50, 90, 95)))
+    
+    trainer = BaseTrainer(model, train_loader, val_loader, criterion,
+                         optimizer, scheduler, device, config, metrics=metrics,
+                         logger=logger, augmentation=augmentation)
+    
+    start_epoch = 0
+    if args.resume:
+        logger.info(f"从检查点恢复: {args.resume}")
+        start_epoch = trainer.load_checkpoint(args.resume)
+    
+    trainer.train(epochs=config['training']['epochs'], start_epoch=start_epoch,
+                 save_dir=config['training']['checkpoint_dir'])
+    
+    logger.info("训练完成！")
+    cleanup_distributed()
+
+
+if __name__ == '__main__':
+    main()